@@ -6,12 +6,17 @@
 # em um pipeline sequencial de processamento.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importações já explicadas nos scripts anteriores
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 load_dotenv()
 
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))  # providers.py: MODEL_PROVIDER (README)
+from providers import create_chat_model
+
 # Cria um template de prompt já explicado no script 1-fundamentos/3-prompt-template.py
 question_template = PromptTemplate(
     input_variables=["name"],
@@ -19,7 +24,7 @@ question_template = PromptTemplate(
 )
 
 # Configuração do modelo já explicada no script 1-fundamentos/1-hello-world.py
-model = ChatOpenAI(model="gpt-5-mini", temperature=0.5)
+model = create_chat_model(model="gpt-5-mini", temperature=0.5)
 
 # Cria uma chain conectando o template ao modelo usando o operador pipe (|)
 # O operador | conecta componentes em sequência: template -> modelo
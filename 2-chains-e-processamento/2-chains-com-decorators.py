@@ -6,14 +6,19 @@
 # Permite adicionar lógica customizada entre os componentes do LangChain.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importações já explicadas nos scripts anteriores
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 # Importa o decorador @chain para criar funções personalizadas
 from langchain_core.runnables import chain
 from dotenv import load_dotenv
 load_dotenv()
 
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))  # providers.py: MODEL_PROVIDER (README)
+from providers import create_chat_model
+
 # Cria uma função personalizada usando o decorador @chain
 # @chain: Transforma a função em um componente compatível com LCEL
 # input_dict:dict: Recebe um dicionário como entrada
@@ -31,7 +36,7 @@ question_template2 = PromptTemplate(
 )
 
 # Configuração do modelo já explicada no script 1-fundamentos/1-hello-world.py
-model = ChatOpenAI(model="gpt-5-mini", temperature=0.5)
+model = create_chat_model(model="gpt-5-mini", temperature=0.5)
 
 # Cria uma chain com 3 componentes: função personalizada -> template -> modelo
 # square: Calcula o quadrado do número
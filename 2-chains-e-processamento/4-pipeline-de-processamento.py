@@ -6,14 +6,19 @@
 # usando StrOutputParser para extrair apenas o texto das respostas.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importações já explicadas nos scripts anteriores
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 # Importa StrOutputParser para extrair apenas o texto das respostas
 from langchain_core.output_parsers import StrOutputParser
 from dotenv import load_dotenv
 load_dotenv()
 
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))  # providers.py: MODEL_PROVIDER (README)
+from providers import create_chat_model
+
 # Template para tradução já explicado no script 1-fundamentos/3-prompt-template.py
 template_translate = PromptTemplate(
     input_variables=["initial_text"],
@@ -27,7 +32,7 @@ template_summary = PromptTemplate(
 )
 
 # Configuração do modelo já explicada no script 1-fundamentos/1-hello-world.py
-llm_en = ChatOpenAI(model="gpt-5-mini", temperature=0)
+llm_en = create_chat_model(model="gpt-5-mini", temperature=0)
 
 # Cria a primeira chain: tradução
 # template_translate -> llm_en -> StrOutputParser
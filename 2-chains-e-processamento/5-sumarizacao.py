@@ -3,16 +3,25 @@
 # ========================================
 # Este exemplo demonstra como sumarizar textos longos usando
 # RecursiveCharacterTextSplitter para dividir o texto em chunks
-# e load_summarize_chain com técnica "stuff" para criar resumos.
+# e a técnica "stuff" para criar resumos. A estratégia é escolhida pelo
+# tamanho do texto: "stuff" quando ele cabe num único prompt (como aqui),
+# "refine" ou map-reduce quando não cabe.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importações já explicadas nos scripts anteriores
-from langchain_openai import ChatOpenAI
 # Importa RecursiveCharacterTextSplitter para dividir textos longos
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-# Importa load_summarize_chain para criar chains de sumarização
-from langchain.chains.summarize import load_summarize_chain
 from dotenv import load_dotenv
+
+# Roteador de sumarização do desafio (7-desafio/summarization.py)
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))
+from summarization import AdaptiveSummarizer
+from summary_cache import summary_cache_from_env
+from providers import create_chat_model
+
 load_dotenv()
 
 # Texto longo para ser sumarizado (poema sobre uma cidade)
@@ -66,16 +75,33 @@ parts = splitter.create_documents([long_text])
 #     print("-"*30)
 
 # Configuração do modelo já explicada no script 1-fundamentos/1-hello-world.py
-llm = ChatOpenAI(model="gpt-5-nano", temperature=0)
+llm = create_chat_model(model="gpt-5-nano", temperature=0)
 
-# Cria uma chain de sumarização usando técnica "stuff"
-# - chain_type="stuff": Técnica que coloca todo o texto em um único prompt
-# - verbose=False: Não mostra detalhes do processamento
-chain_sumarize = load_summarize_chain(llm, chain_type="stuff", verbose=False)
+# Cria o sumarizador adaptativo
+# Os tokens dos chunks são contados localmente (tiktoken) antes de chamar o modelo:
+# - "stuff": Técnica que coloca todo o texto em um único prompt (até SUMMARY_STUFF_TOKENS)
+# - "refine": Poucas chamadas em sequência, refinando o resumo seção a seção
+# - "map_reduce": Seções resumidas em paralelo e combinadas (textos longos)
+# cache: resumos já gerados em disco (7-desafio/summary_cache.py)
+summarizer = AdaptiveSummarizer(llm, cache=summary_cache_from_env())
 
-# Invoca a chain passando os documentos divididos
-# A chain sumariza todos os chunks e retorna um resumo final
-result = chain_sumarize.invoke({"input_documents": parts})
+# Mostra a estratégia escolhida e o custo estimado (chamadas e tokens)
+plan = summarizer.plan(parts)
+print(f"🧭 {plan.describe()}")
+
+# Sumariza todos os chunks e retorna um resumo final
+result = summarizer.summarize(parts)
 
 # Exibe o texto sumarizado
-print(result["output_text"])
\ No newline at end of file
+print(result)
+
+# ===== CÓDIGO COMENTADO - VERSÃO ALTERNATIVA =====
+# Sempre "stuff", com a chain pronta do LangChain
+# (estoura a janela de contexto com textos muito longos)
+# from langchain.chains.summarize import load_summarize_chain
+#
+# # - chain_type="stuff": Técnica que coloca todo o texto em um único prompt
+# # - verbose=False: Não mostra detalhes do processamento
+# chain_sumarize = load_summarize_chain(llm, chain_type="stuff", verbose=False)
+# result = chain_sumarize.invoke({"input_documents": parts})
+# print(result["output_text"])
\ No newline at end of file
@@ -6,13 +6,18 @@
 # processa cada chunk separadamente e depois combina os resultados.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importações já explicadas nos scripts anteriores
-from langchain_openai import ChatOpenAI
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.chains.summarize import load_summarize_chain
 from dotenv import load_dotenv
 load_dotenv()
 
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))  # providers.py: MODEL_PROVIDER (README)
+from providers import create_chat_model
+
 # Texto longo já explicado no script 2-chains-e-processamento/5-sumarizacao.py
 long_text = """
 A aurora costura um dourado pálido pelo beco de vidro.
@@ -61,7 +66,7 @@ parts = splitter.create_documents([long_text])
 #     print("-"*30)
 
 # Configuração do modelo já explicada no script 1-fundamentos/1-hello-world.py
-llm = ChatOpenAI(model="gpt-5-nano", temperature=0)
+llm = create_chat_model(model="gpt-5-nano", temperature=0)
 
 # Cria uma chain de sumarização usando técnica "map_reduce"
 # - chain_type="map_reduce": Técnica que processa chunks separadamente
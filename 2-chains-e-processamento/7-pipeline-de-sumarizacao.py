@@ -6,14 +6,20 @@
 # Permite controle total sobre cada etapa do processo.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importações já explicadas nos scripts anteriores
-from langchain_openai import ChatOpenAI
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnableLambda
 from dotenv import load_dotenv
 
+# Motor de sumarização map-reduce hierárquico do desafio (7-desafio/summarization.py)
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))
+from summarization import MapReduceSummarizer, SummaryLimits
+from summary_cache import summary_cache_from_env
+from providers import create_chat_model
+
 load_dotenv()
 
 # Texto longo em inglês para demonstração
@@ -59,7 +65,7 @@ parts = spliter.create_documents([long_text])
 #     print("-" * 10)
 
 # Configuração do modelo já explicada no script 1-fundamentos/1-hello-world.py
-llm = ChatOpenAI(model="gpt-5-nano", temperature=0)
+llm = create_chat_model(model="gpt-5-nano", temperature=0)
 
 # ===== FASE MAP: Sumarizar cada chunk individualmente =====
 
@@ -67,45 +73,59 @@ llm = ChatOpenAI(model="gpt-5-nano", temperature=0)
 # from_template: Cria um PromptTemplate a partir de uma string simples
 map_prompt = PromptTemplate.from_template("Write a concise summary of the following text:\n{context}")
 
-# Cria a chain para sumarização: prompt -> modelo -> extrair texto
-map_chain = map_prompt | llm | StrOutputParser()
-
-# Função para preparar os inputs da fase map
-# Converte documentos em lista de dicionários com a chave "context"
-prepare_map_inputs = RunnableLambda(lambda docs: [{"context": d.page_content} for d in docs])
-
-# Cria a etapa map que processa cada chunk
-# .map(): Aplica a chain a cada item da lista de inputs
-map_stage = prepare_map_inputs | map_chain.map()
-
 # ===== FASE REDUCE: Combinar os resumos em um resumo final =====
 
 # Cria o prompt para combinar os resumos
+# Usado tanto para juntar grupos de resumos (collapse) quanto no resumo final
 reduce_prompt = PromptTemplate.from_template("Combine the following summaries into a single concise summary:\n{context}")
 
-# Cria a chain para combinação: prompt -> modelo -> extrair texto
-reduce_chain = reduce_prompt | llm | StrOutputParser()
-
-# Função para preparar o input da fase reduce
-# Junta todos os resumos em uma única string
-prepare_reduce_input = RunnableLambda(lambda summaries: {"context": "\n".join(summaries)})
-
-# ===== PIPELINE COMPLETO =====
-
-# Conecta as duas fases: map -> prepare_reduce -> reduce
-pipeline = map_stage | prepare_reduce_input | reduce_chain
-
-# Executa o pipeline completo
-# O pipeline: 1) Sumariza cada chunk → 2) Combina os resumos → 3) Resumo final
-result = pipeline.invoke(parts)
+# ===== MOTOR MAP-REDUCE HIERÁRQUICO =====
+# MapReduceSummarizer monta as chains prompt -> modelo -> texto e:
+# 1) Sumariza os chunks em paralelo (max_concurrency chamadas por vez)
+# 2) Enquanto os resumos juntos passam de reduce_tokens tokens, agrupa
+#    resumos vizinhos até o orçamento e resume cada grupo (collapse em
+#    árvore: textos do tamanho de um livro não estouram o contexto)
+# 3) Combina os resumos restantes no resumo final
+# SUMMARY_MAX_CONCURRENCY e SUMMARY_REDUCE_TOKENS ajustam os padrões
+# cache: resumos em disco (7-desafio/summary_cache.py) pelo hash do texto,
+# prompt e modelo; rodar de novo só chama o modelo para chunks alterados e
+# para os nós da árvore acima deles (SUMMARY_CACHE=off desliga)
+summarizer = MapReduceSummarizer(
+    llm,
+    map_prompt=map_prompt,
+    reduce_prompt=reduce_prompt,
+    limits=SummaryLimits(max_concurrency=4, reduce_tokens=3000),
+    cache=summary_cache_from_env(),
+)
+
+# Executa a sumarização mostrando o progresso de cada etapa
+# on_progress: chamado a cada chunk/grupo resumido
+result = summarizer.summarize(parts, on_progress=lambda event: print(f"⏳ {event.describe()}"))
 
 # Exibe o resultado final
 print(result)
 
-
-
-
-
-
-
-
+# ===== CÓDIGO COMENTADO - VERSÃO ALTERNATIVA =====
+# Pipeline LCEL com um único reduce: todos os resumos num só prompt
+# (estoura a janela de contexto com textos muito longos)
+# from langchain_core.output_parsers import StrOutputParser
+# from langchain_core.runnables import RunnableLambda
+#
+# # Cria a chain para sumarização: prompt -> modelo -> extrair texto
+# map_chain = map_prompt | llm | StrOutputParser()
+#
+# # Converte documentos em lista de dicionários com a chave "context"
+# prepare_map_inputs = RunnableLambda(lambda docs: [{"context": d.page_content} for d in docs])
+#
+# # .map(): Aplica a chain a cada item da lista de inputs
+# map_stage = prepare_map_inputs | map_chain.map()
+#
+# # Cria a chain para combinação: prompt -> modelo -> extrair texto
+# reduce_chain = reduce_prompt | llm | StrOutputParser()
+#
+# # Junta todos os resumos em uma única string
+# prepare_reduce_input = RunnableLambda(lambda summaries: {"context": "\n".join(summaries)})
+#
+# # Conecta as duas fases: map -> prepare_reduce -> reduce
+# pipeline = map_stage | prepare_reduce_input | reduce_chain
+# result = pipeline.invoke(parts)
@@ -6,15 +6,20 @@
 # raciocina sobre qual ferramenta usar e executa ações para obter informações.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importações já explicadas nos scripts anteriores
 from langchain.tools import tool
-from langchain_openai import ChatOpenAI
 # Importa funções para criar agentes ReAct
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain.prompts import PromptTemplate
 from dotenv import load_dotenv
 load_dotenv()
 
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))  # providers.py: MODEL_PROVIDER (README)
+from providers import create_chat_model
+
 # ===== CRIANDO TOOLS (FERRAMENTAS) =====
 
 # Tool para cálculos matemáticos
@@ -52,7 +57,7 @@ def web_search_mock(query: str) -> str:
 
 # Configuração do modelo já explicada no script 1-fundamentos/1-hello-world.py
 # disable_streaming=True: Desabilita streaming para melhor compatibilidade com agentes
-llm = ChatOpenAI(model="gpt-5-mini", disable_streaming=True)
+llm = create_chat_model(model="gpt-5-mini", disable_streaming=True)
 
 # Lista de ferramentas disponíveis para o agente
 tools = [calculator, web_search_mock]
@@ -6,15 +6,20 @@
 # criar prompts personalizados do zero.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importações já explicadas nos scripts anteriores
 from langchain.tools import tool
-from langchain_openai import ChatOpenAI
 from langchain.agents import create_react_agent, AgentExecutor
 # Importa o hub para acessar prompts da comunidade
 from langchain import hub
 from dotenv import load_dotenv
 load_dotenv()
 
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))  # providers.py: MODEL_PROVIDER (README)
+from providers import create_chat_model
+
 # Tool para cálculos matemáticos já explicado no script 3-agentes-e-tools/1-agente-react-e-tools.py
 @tool("calculator", return_direct=True)
 def calculator(expression: str) -> str:
@@ -44,7 +49,7 @@ def web_search_mock(query: str) -> str:
     return "I don't know the capital of that country."
 
 # Configuração do modelo já explicada no script 1-fundamentos/1-hello-world.py
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.5)
+llm = create_chat_model(model="gpt-3.5-turbo", temperature=0.5)
 
 # Lista de ferramentas (apenas web_search_mock neste exemplo)
 tools = [web_search_mock]
@@ -53,7 +58,7 @@ tools = [web_search_mock]
 
 # Obtém um prompt ReAct pré-definido do Prompt Hub
 # "hwchase17/react": Prompt ReAct criado por Harrison Chase (criador do LangChain)
-# hub.pull(): Baixa o prompt da comunidade LangChain
+# hub.pull(): Baixa o prompt da comunidade LangChain (precisa de rede, mesmo com MODEL_PROVIDER=fake)
 prompt = hub.pull("hwchase17/react")
 
 # Cria o agente ReAct já explicado no script 3-agentes-e-tools/1-agente-react-e-tools.py
@@ -65,6 +70,9 @@ agent_executor = AgentExecutor.from_agent_and_tools(
     agent=agent_chain, 
     tools=tools, 
     verbose=True, 
+    # handle_parsing_errors=True: uma resposta fora do formato ReAct volta ao
+    # modelo como Observation em vez de interromper o agente
+    handle_parsing_errors=True,
     # max_iterations=5
 )
 
@@ -6,9 +6,11 @@
 # o contexto entre múltiplas interações com o modelo.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importações já explicadas nos scripts anteriores
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 # Importa InMemoryChatMessageHistory para armazenar histórico em memória
 from langchain_core.chat_history import InMemoryChatMessageHistory
@@ -17,6 +19,9 @@ from langchain_core.runnables import RunnableWithMessageHistory
 
 load_dotenv()
 
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))  # providers.py: MODEL_PROVIDER (README)
+from providers import create_chat_model
+
 # ===== CONFIGURAÇÃO DO PROMPT COM HISTÓRICO =====
 
 # Cria um prompt template que inclui histórico de mensagens
@@ -28,7 +33,7 @@ prompt = ChatPromptTemplate.from_messages([
 ])
 
 # Configuração do modelo já explicada no script 1-fundamentos/1-hello-world.py
-chat_model = ChatOpenAI(model="gpt-5-nano", temperature=0.9)
+chat_model = create_chat_model(model="gpt-5-nano", temperature=0.9)
 
 # Cria a chain básica já explicada no script 2-chains-e-processamento/1-iniciando-com-chains.py
 chain = prompt | chat_model
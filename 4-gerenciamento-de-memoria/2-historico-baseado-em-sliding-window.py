@@ -6,9 +6,11 @@
 # mantendo apenas as mensagens mais recentes dentro de um limite de tokens.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importações já explicadas nos scripts anteriores
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.chat_history import InMemoryChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
@@ -19,6 +21,9 @@ from langchain_core.runnables import RunnableLambda
 
 load_dotenv()
 
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))  # providers.py: MODEL_PROVIDER (README)
+from providers import create_chat_model
+
 # ===== CONFIGURAÇÃO DO PROMPT =====
 # Prompt já explicado no script 4-gerenciamento-de-memoria/1-armazenamento-de-historico.py
 prompt = ChatPromptTemplate.from_messages([
@@ -29,7 +34,7 @@ prompt = ChatPromptTemplate.from_messages([
 
 # ===== CONFIGURAÇÃO DO MODELO =====
 # Modelo já explicado no script 1-fundamentos/1-hello-world.py
-llm = ChatOpenAI(model="gpt-5-nano", temperature=0.9)
+llm = create_chat_model(model="gpt-5-nano", temperature=0.9)
 
 # ===== FUNÇÃO DE PREPARAÇÃO COM SLIDING WINDOW =====
 # Função que controla o tamanho do histórico usando trim_messages
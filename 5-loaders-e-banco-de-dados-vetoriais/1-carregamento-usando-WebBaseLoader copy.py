@@ -5,28 +5,50 @@
 # WebBaseLoader e dividir o texto em chunks usando RecursiveCharacterTextSplitter.
 # ========================================
 
+import sys
+from pathlib import Path
+
 # Importa WebBaseLoader para carregar conteúdo de páginas web
 from langchain_community.document_loaders import WebBaseLoader
 # RecursiveCharacterTextSplitter já explicado no script 2-chains-e-processamento/5-sumarizacao.py
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-# ===== CARREGAMENTO DE CONTEÚDO WEB =====
-# WebBaseLoader: Carrega conteúdo de URLs da web
-loader = WebBaseLoader("https://www.langchain.com/")
-# load(): Faz a requisição HTTP e extrai o texto da página
-docs = loader.load()
+# if __name__ == "__main__": no macOS e no Windows os processos filhos do
+# crawler importam este script de novo, e sem o if cada um recomeçaria o carregamento
+if __name__ == "__main__":
+    # ===== MODO CRAWLER (MUITAS URLS) =====
+    # python "1-carregamento-usando-WebBaseLoader copy.py" urls.txt
+    # Com um arquivo de URLs (uma por linha), as páginas são buscadas em paralelo
+    # pelo crawler do desafio (7-desafio/web_crawler.py): sessão aiohttp com
+    # limite por host, GET condicional (páginas inalteradas são puladas) e
+    # parsing num pool de processos. Os chunks saem enquanto o crawl continua.
+    if len(sys.argv) > 1:
+        sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))
+        from ingestion import iter_chunks
+        from web_crawler import CrawlStats, crawl
 
-# ===== DIVISÃO EM CHUNKS =====
-# RecursiveCharacterTextSplitter já explicado no script 2-chains-e-processamento/5-sumarizacao.py
-splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+        urls = [line.strip() for line in Path(sys.argv[1]).read_text(encoding="utf-8").splitlines() if line.strip()]
+        stats = CrawlStats()
+        splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+        total = sum(1 for _ in iter_chunks(crawl(urls, stats=stats), splitter))
+        print(f"{total} chunks | {stats.summary()}")
+        raise SystemExit(0)
+
+    # ===== CARREGAMENTO DE CONTEÚDO WEB =====
+    # WebBaseLoader: Carrega conteúdo de URLs da web
+    loader = WebBaseLoader("https://www.langchain.com/")
+    # load(): Faz a requisição HTTP e extrai o texto da página
+    docs = loader.load()
 
-# split_documents(): Divide os documentos em chunks menores
-chunks = splitter.split_documents(docs)
+    # ===== DIVISÃO EM CHUNKS =====
+    # RecursiveCharacterTextSplitter já explicado no script 2-chains-e-processamento/5-sumarizacao.py
+    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
 
-# ===== EXIBIÇÃO DOS CHUNKS =====
-# Itera sobre cada chunk e exibe seu conteúdo
-for chunk in chunks:
-    print(chunk)
-    print("-"*30)
+    # split_documents(): Divide os documentos em chunks menores
+    chunks = splitter.split_documents(docs)
 
-    
\ No newline at end of file
+    # ===== EXIBIÇÃO DOS CHUNKS =====
+    # Itera sobre cada chunk e exibe seu conteúdo
+    for chunk in chunks:
+        print(chunk)
+        print("-"*30)
@@ -5,26 +5,33 @@
 # PyPDFLoader e dividir o texto em chunks usando RecursiveCharacterTextSplitter.
 # ========================================
 
-# Importa PyPDFLoader para carregar arquivos PDF
-from langchain_community.document_loaders import PyPDFLoader
+import sys
+from pathlib import Path
+
 # RecursiveCharacterTextSplitter já explicado no script 2-chains-e-processamento/5-sumarizacao.py
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-# ===== CARREGAMENTO DE ARQUIVO PDF =====
-# PyPDFLoader: Carrega conteúdo de arquivos PDF locais
-loader = PyPDFLoader("./gpt5.pdf")
-# load(): Extrai texto de todas as páginas do PDF
-docs = loader.load()
-
-# ===== DIVISÃO EM CHUNKS =====
-# RecursiveCharacterTextSplitter já explicado no script 2-chains-e-processamento/5-sumarizacao.py
-splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+# ===== CARREGAMENTO EM PARALELO (MUITOS PDFS) =====
+# PyPDFLoader("./gpt5.pdf").load() extrai o texto em um único núcleo. Para
+# muitos PDFs (ou PDFs grandes), o load_pdfs do desafio
+# (7-desafio/parallel_pdf.py) divide as páginas entre vários processos e
+# devolve os mesmos Documents do PyPDFLoader, na mesma ordem.
+# PDF_WORKERS e PDF_PAGES_PER_SHARD controlam processos e tamanho das fatias.
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))
+from parallel_pdf import load_pdfs
 
-# split_documents(): Divide os documentos em chunks menores
-chunks = splitter.split_documents(docs)
+# if __name__ == "__main__": no macOS e no Windows os processos filhos
+# importam este script de novo, e sem o if cada um recomeçaria o carregamento
+if __name__ == "__main__":
+    docs = load_pdfs(["./gpt5.pdf"])
 
-# ===== EXIBIÇÃO DO RESULTADO =====
-# Exibe o número total de chunks criados
-print(len(chunks))
+    # ===== DIVISÃO EM CHUNKS =====
+    # RecursiveCharacterTextSplitter já explicado no script 2-chains-e-processamento/5-sumarizacao.py
+    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
 
+    # split_documents(): Divide os documentos em chunks menores
+    chunks = splitter.split_documents(docs)
 
+    # ===== EXIBIÇÃO DO RESULTADO =====
+    # Exibe o número total de chunks criados
+    print(len(chunks))
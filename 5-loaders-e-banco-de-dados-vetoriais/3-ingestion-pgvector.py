@@ -6,76 +6,97 @@
 # ========================================
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
-# PyPDFLoader já explicado no script 5-loaders-e-banco-de-dados-vetoriais/2-carregamento-de-pdf.py
-from langchain_community.document_loaders import PyPDFLoader
-# RecursiveCharacterTextSplitter já explicado no script 2-chains-e-processamento/5-sumarizacao.py
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-# Importa OpenAIEmbeddings para criar vetores dos documentos
-from langchain_openai import OpenAIEmbeddings
 # Document já explicado no script 5-loaders-e-banco-de-dados-vetoriais/1-carregamento-usando-WebBaseLoader copy.py
 from langchain_core.documents import Document
-# Importa PGVector para armazenar vetores no PostgreSQL
-from langchain_postgres import PGVector
 
-load_dotenv()
+# Reaproveita as funções de ingestão incremental do desafio (7-desafio/ingestion.py)
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))
+from embedding_dimensions import create_embeddings
+from fast_splitter import splitter_from_env
+from ingestion import ingest_incremental
+from numpy_store import create_vector_store, vector_store_kind
+from parallel_pdf import load_pdfs
+from providers import model_provider
 
-# ===== VERIFICAÇÃO DE VARIÁVEIS DE AMBIENTE =====
-# Verifica se todas as variáveis necessárias estão configuradas
-for k in ("OPENAI_API_KEY", "PGVECTOR_URL","PGVECTOR_COLLECTION"):
-    if not os.getenv(k):
-        raise RuntimeError(f"Environment variable {k} is not set")
+load_dotenv()
 
-# ===== CONFIGURAÇÃO DE CAMINHOS =====
-# Path(__file__).parent: Obtém o diretório do script atual
-current_dir = Path(__file__).parent
-# Constrói caminho para o arquivo PDF
-pdf_path = current_dir / "gpt5.pdf"
+# if __name__ == "__main__": no macOS e no Windows os processos filhos do
+# load_pdfs importam este script de novo, e sem o if cada um recomeçaria a ingestão
+if __name__ == "__main__":
+    # ===== VERIFICAÇÃO DE VARIÁVEIS DE AMBIENTE =====
+    # Verifica se todas as variáveis necessárias estão configuradas
+    # (com VECTOR_STORE=numpy não há PostgreSQL, então PGVECTOR_URL é dispensável,
+    # e com MODEL_PROVIDER=fake os embeddings são locais, sem OPENAI_API_KEY)
+    required = ("PGVECTOR_URL", "PGVECTOR_COLLECTION") if vector_store_kind() == "pgvector" else ("PGVECTOR_COLLECTION",)
+    if model_provider() == "openai":
+        required = ("OPENAI_API_KEY",) + required
+    for k in required:
+        if not os.getenv(k):
+            raise RuntimeError(f"Environment variable {k} is not set")
 
-# ===== CARREGAMENTO DO PDF =====
-# PyPDFLoader já explicado no script 5-loaders-e-banco-de-dados-vetoriais/2-carregamento-de-pdf.py
-docs = PyPDFLoader(str(pdf_path)).load()
+    # ===== CONFIGURAÇÃO DE CAMINHOS =====
+    # Path(__file__).parent: Obtém o diretório do script atual
+    current_dir = Path(__file__).parent
+    # Constrói caminho para o arquivo PDF
+    pdf_path = current_dir / "gpt5.pdf"
 
-# ===== DIVISÃO EM CHUNKS =====
-# RecursiveCharacterTextSplitter já explicado no script 2-chains-e-processamento/5-sumarizacao.py
-splits = RecursiveCharacterTextSplitter(
-    chunk_size=1000, 
-    chunk_overlap=150, add_start_index=False).split_documents(docs)
-if not splits:
-    raise SystemExit(0)
+    # ===== CARREGAMENTO DO PDF =====
+    # Mesmo resultado do PyPDFLoader(...).load(), com as páginas extraídas em
+    # vários processos (7-desafio/parallel_pdf.py)
+    docs = load_pdfs([pdf_path])
 
-# ===== LIMPEZA E ENRIQUECIMENTO DOS DOCUMENTOS =====
-# Remove metadados vazios ou nulos dos documentos
-enriched = [
-    Document(
-        page_content=d.page_content,
-        metadata={k: v for k, v in d.metadata.items() if v not in ("", None)}
-    )
-    for d in splits
-]    
+    # ===== DIVISÃO EM CHUNKS =====
+    # RecursiveCharacterTextSplitter já explicado no script 2-chains-e-processamento/5-sumarizacao.py
+    # splitter_from_env (7-desafio/fast_splitter.py) gera os mesmos chunks, mas
+    # fatiando o texto original por offsets em vez de reconcatenar pedaços.
+    # Com CHUNK_UNIT=tokens o tamanho é medido em tokens do OPENAI_MODEL (256/40)
+    splits = splitter_from_env(
+        chunk_size=1000,
+        chunk_overlap=150, token_size=256, token_overlap=40).split_documents(docs)
+    if not splits:
+        raise SystemExit(0)
 
-# ===== CRIAÇÃO DE IDs ÚNICOS =====
-# Gera IDs únicos para cada documento
-ids = [f"doc-{i}" for i in range(len(enriched))]
+    # ===== LIMPEZA E ENRIQUECIMENTO DOS DOCUMENTOS =====
+    # Remove metadados vazios ou nulos dos documentos
+    enriched = [
+        Document(
+            page_content=d.page_content,
+            metadata={k: v for k, v in d.metadata.items() if v not in ("", None)}
+        )
+        for d in splits
+    ]
 
-# ===== CONFIGURAÇÃO DOS EMBEDDINGS =====
-# OpenAIEmbeddings: Cria vetores numéricos dos textos
-embeddings = OpenAIEmbeddings(model=os.getenv("OPENAI_MODEL","text-embedding-3-small"))
+    # ===== CONFIGURAÇÃO DOS EMBEDDINGS =====
+    # create_embeddings (7-desafio/embedding_dimensions.py) cria o OpenAIEmbeddings,
+    # que transforma os textos em vetores numéricos:
+    # - guarda os vetores em disco (7-desafio/embedding_cache.py), então chunks
+    #   já embedados em execuções anteriores não voltam para a API
+    # - EMBEDDING_DIMENSIONS=N: vetores menores, pelo próprio modelo
+    #   (EMBEDDING_REDUCTION=native) ou por uma projeção PCA local (pca)
+    # A configuração fica gravada na coleção; a busca precisa usar a mesma
+    embeddings = create_embeddings(os.getenv("PGVECTOR_COLLECTION"))
 
-# ===== CONFIGURAÇÃO DO BANCO VETORIAL =====
-# PGVector: Armazena vetores no PostgreSQL com extensão pgvector
-store = PGVector(
-    embeddings=embeddings,  # Modelo para criar embeddings
-    collection_name=os.getenv("PGVECTOR_COLLECTION"),  # Nome da coleção
-    connection=os.getenv("PGVECTOR_URL"),  # URL de conexão com PostgreSQL
-    use_jsonb=True,  # Usa JSONB para metadados (mais eficiente)
-)
+    # ===== CONFIGURAÇÃO DO BANCO VETORIAL =====
+    # PGVector: Armazena vetores no PostgreSQL com extensão pgvector
+    # create_vector_store (7-desafio/numpy_store.py) cria o PGVector com:
+    # - embeddings: Modelo para criar embeddings
+    # - collection_name: Nome da coleção
+    # - connection: URL de conexão com PostgreSQL (PGVECTOR_URL)
+    # - use_jsonb=True: Usa JSONB para metadados (mais eficiente)
+    # VECTOR_STORE=numpy: grava numa matriz NumPy em disco, sem PostgreSQL
+    store = create_vector_store(embeddings, os.getenv("PGVECTOR_COLLECTION"))
 
-# ===== INGESTÃO DOS DOCUMENTOS =====
-# add_documents: Armazena documentos e seus embeddings no banco
-store.add_documents(documents=enriched, ids=ids)
+    # ===== INGESTÃO INCREMENTAL DOS DOCUMENTOS =====
+    # IDs determinísticos (fonte + página + hash do conteúdo) em vez de doc-{i}:
+    # - chunks já gravados e inalterados não são embedados de novo
+    # - uma edição no início do PDF não desloca os IDs dos chunks seguintes
+    # - chunks que sumiram do PDF são apagados do banco
+    report = ingest_incremental(enriched, store, source=str(pdf_path))
+    print(f"Novos: {report.added} | Inalterados: {report.unchanged} | Removidos: {report.deleted}")
 
 # ===== CÓDIGO COMENTADO - VERSÃO ALTERNATIVA =====
 # enriched = []
@@ -5,19 +5,31 @@
 # armazenados no banco vetorial PostgreSQL usando similaridade de embeddings.
 # ========================================
 
+import json
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
-# OpenAIEmbeddings já explicado no script 5-loaders-e-banco-de-dados-vetoriais/3-ingestion-pgvector.py
-from langchain_openai import OpenAIEmbeddings
-# PGVector já explicado no script 5-loaders-e-banco-de-dados-vetoriais/3-ingestion-pgvector.py
-from langchain_postgres import PGVector
+from sqlalchemy import create_engine
+
+# Embeddings do desafio, com cache e dimensões reduzidas (7-desafio/embedding_dimensions.py)
+sys.path.append(str(Path(__file__).parent.parent / "7-desafio"))
+from embedding_dimensions import check_embedding_spec, create_embeddings
+# Busca híbrida do desafio (7-desafio/hybrid_search.py)
+from hybrid_search import hybrid_search, search_mode
+# Store em processo para VECTOR_STORE=numpy (7-desafio/numpy_store.py)
+from numpy_store import create_vector_store, vector_store_kind
+from providers import model_provider
 
 load_dotenv()
 
 # ===== VERIFICAÇÃO DE VARIÁVEIS DE AMBIENTE =====
 # Verificação já explicada no script 5-loaders-e-banco-de-dados-vetoriais/3-ingestion-pgvector.py
-for k in ("OPENAI_API_KEY", "PGVECTOR_URL","PGVECTOR_COLLECTION"):
+required = ("PGVECTOR_URL", "PGVECTOR_COLLECTION") if vector_store_kind() == "pgvector" else ("PGVECTOR_COLLECTION",)
+if model_provider() == "openai":
+    required = ("OPENAI_API_KEY",) + required
+for k in required:
     if not os.getenv(k):
         raise RuntimeError(f"Environment variable {k} is not set")
 
@@ -25,29 +37,42 @@ for k in ("OPENAI_API_KEY", "PGVECTOR_URL","PGVECTOR_COLLECTION"):
 # Query: Pergunta ou termo de busca para encontrar documentos similares
 query = "Tell me more about the gpt-5 thinking evaluation and performance results comparing to gpt-4"
 
+# ===== FILTRO DE METADADOS (OPCIONAL) =====
+# METADATA_FILTER: JSON no formato do filtro do PGVector, ex.: '{"page": {"$lte": 5}}'
+# O filtro vira SQL e usa os índices de metadados criados na ingestão (7-desafio/metadata_filter.py)
+metadata_filter = json.loads(os.getenv("METADATA_FILTER") or "null")
+
 # ===== CONFIGURAÇÃO DOS EMBEDDINGS =====
-# OpenAIEmbeddings já explicado no script 5-loaders-e-banco-de-dados-vetoriais/3-ingestion-pgvector.py
-embeddings = OpenAIEmbeddings(model=os.getenv("OPENAI_MODEL","text-embedding-3-small"))
+# create_embeddings já explicado no script 5-loaders-e-banco-de-dados-vetoriais/3-ingestion-pgvector.py
+# Perguntas repetidas reaproveitam o vetor do cache em disco
+embeddings = create_embeddings(os.getenv("PGVECTOR_COLLECTION"))
 
 # ===== CONFIGURAÇÃO DO BANCO VETORIAL =====
-# PGVector já explicado no script 5-loaders-e-banco-de-dados-vetoriais/3-ingestion-pgvector.py
-store = PGVector(
-    embeddings=embeddings,
-    collection_name=os.getenv("PGVECTOR_COLLECTION"),
-    connection=os.getenv("PGVECTOR_URL"),
-    use_jsonb=True,
-)
-
-# ===== BUSCA POR SIMILARIDADE =====
-# similarity_search_with_score: Busca documentos similares e retorna scores de similaridade
-# k=3: Retorna os 3 documentos mais similares
-results = store.similarity_search_with_score(query, k=3)
+# create_vector_store já explicado no script 5-loaders-e-banco-de-dados-vetoriais/3-ingestion-pgvector.py
+# A engine é criada aqui para ser compartilhada com a busca híbrida
+# (VECTOR_STORE=numpy: sem engine, a busca é só vetorial na matriz em disco)
+engine = create_engine(os.getenv("PGVECTOR_URL")) if vector_store_kind() == "pgvector" else None
+store = create_vector_store(embeddings, os.getenv("PGVECTOR_COLLECTION"), engine)
+# Erro se EMBEDDING_DIMENSIONS/EMBEDDING_REDUCTION diferem dos usados na ingestão
+check_embedding_spec(store, embeddings)
+
+# ===== BUSCA POR SIMILARIDADE (OU HÍBRIDA) =====
+# similarity_search_with_score: score = distância de cosseno (menor = melhor)
+# SEARCH_MODE=hybrid (opcional): ranking full-text do PostgreSQL (tsvector +
+# índice GIN) e kNN do pgvector numa única consulta, fundidos por Reciprocal
+# Rank Fusion (score maior = melhor). Consultas curtas como "few-shot", que
+# casam forte no full-text, nem chamam a API de embeddings.
+# k=3: Retorna os 3 documentos mais relevantes
+if search_mode() == "hybrid":
+    results = hybrid_search(engine, embeddings, os.getenv("PGVECTOR_COLLECTION"), query, k=3, metadata_filter=metadata_filter)
+else:
+    results = store.similarity_search_with_score(query, k=3, filter=metadata_filter)
 
 # ===== EXIBIÇÃO DOS RESULTADOS =====
 # Itera sobre os resultados ordenados por similaridade
 for i, (doc, score) in enumerate(results, start=1):
     print("="*50)
-    print(f"Resultado {i} (score: {score:.2f}):")
+    print(f"Resultado {i} (score: {score:.4f}):")
     print("="*50)
 
     # Exibe o conteúdo do documento
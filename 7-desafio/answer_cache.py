@@ -0,0 +1,193 @@
+# ========================================
+# CACHE DE RESPOSTAS (EXATO + SEMÂNTICO) NA FRENTE DO call_model
+# ========================================
+# Duas camadas, ambas em memória com TTL e remoção LRU:
+# - exata: pergunta normalizada + hash do contexto recuperado
+# - semântica: reaproveita a resposta de uma pergunta cujo embedding tem
+#   similaridade de cosseno >= threshold com o da nova pergunta
+# Toda ingestão que altera a coleção incrementa a versão gravada nos
+# metadados da coleção (collection_metadata.py); o cache
+# confere essa versão periodicamente e se esvazia quando ela muda.
+# ========================================
+
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+
+@dataclass
+class AnswerCacheStats:
+    """Acertos por camada e latência economizada"""
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    saved_seconds: float = 0.0
+    invalidations: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.exact_hits + self.semantic_hits + self.misses
+
+    def summary(self) -> str:
+        lookups = self.lookups or 1
+        return (
+            f"exato {self.exact_hits / lookups:.0%} | semântico {self.semantic_hits / lookups:.0%} | "
+            f"falhas {self.misses / lookups:.0%} | economia {self.saved_seconds:.1f}s"
+        )
+
+
+@dataclass
+class _Entry:
+    answer: str
+    vector: np.ndarray | None  # None: pergunta respondida sem embedding (atalho léxico)
+    created_at: float
+    latency: float
+
+
+def normalize_question(question: str) -> str:
+    """Caixa, acentos compostos, espaços e pontuação final não importam"""
+    question = unicodedata.normalize("NFKC", question).casefold()
+    return re.sub(r"\s+", " ", question).strip(" ?!.")
+
+
+def context_hash(context: str) -> str:
+    """Hash do contexto recuperado que foi (ou seria) enviado ao modelo"""
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """Cache de respostas com camada exata e semântica"""
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl: float = 3600.0,
+        max_entries: int = 1000,
+        version_check_interval: float = 5.0,
+        version_source: Callable[[], str | None] | None = None,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_check_interval = version_check_interval
+        self.version_source = version_source
+        self.stats = AnswerCacheStats()
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._matrix: np.ndarray | None = None
+        self._matrix_keys: list[tuple[str, str]] = []
+        self._version: str | None = None
+        self._version_known = False
+        self._version_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    # ===== INVALIDAÇÃO =====
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def _check_version(self) -> None:
+        """Esvazia o cache se a coleção foi reingerida desde a última checagem"""
+        if self.version_source is None:
+            return
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+        version = self.version_source()
+        if version != self._version or not self._version_known:
+            if self._version_known:
+                self.stats.invalidations += 1
+            self._version = version
+            self._version_known = True
+            self.clear()
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    # ===== CONSULTA =====
+
+    def get_exact(self, question: str, context: str) -> str | None:
+        """Camada exata: mesma pergunta normalizada e mesmo contexto"""
+        self._check_version()
+        key = (normalize_question(question), context_hash(context))
+        with self._lock:
+            self._expire(time.time())
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.stats.exact_hits += 1
+            self.stats.saved_seconds += entry.latency
+            return entry.answer
+
+    def get_semantic(self, query_vector: list[float] | None) -> str | None:
+        """Camada semântica: pergunta parecida o bastante com uma já respondida"""
+        if query_vector is None:
+            return None
+        self._check_version()
+        with self._lock:
+            self._expire(time.time())
+            if self._matrix is None:
+                self._matrix_keys = [k for k, entry in self._entries.items() if entry.vector is not None]
+                if not self._matrix_keys:
+                    return None
+                self._matrix = np.stack([self._entries[k].vector for k in self._matrix_keys])
+            vector = _unit(query_vector)
+            similarities = self._matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            key = self._matrix_keys[best]
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            self.stats.semantic_hits += 1
+            self.stats.saved_seconds += entry.latency
+            return entry.answer
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.stats.misses += 1
+
+    def put(self, question: str, context: str, query_vector: list[float] | None, answer: str, latency: float) -> None:
+        """Guarda uma resposta nova; latency é o tempo que ela custou"""
+        key = (normalize_question(question), context_hash(context))
+        vector = _unit(query_vector) if query_vector is not None else None
+        with self._lock:
+            self._entries[key] = _Entry(answer, vector, time.time(), latency)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+
+def _unit(vector: list[float]) -> np.ndarray:
+    """Vetor float32 normalizado (produto interno = cosseno)"""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+def answer_cache_from_env(version_source: Callable[[], str | None] | None = None) -> AnswerCache | None:
+    """Cria o cache a partir das variáveis ANSWER_CACHE_*; None se desligado"""
+    if os.getenv("ANSWER_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    return AnswerCache(
+        threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+        ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+        max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+        version_source=version_source,
+    )
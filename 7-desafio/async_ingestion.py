@@ -0,0 +1,289 @@
+# ========================================
+# INGESTÃO ASSÍNCRONA COM EMBEDDINGS CONCORRENTES E LIMITE DE TAXA
+# ========================================
+# Motor usado pela ingestão (ingestion.py) para embedar os chunks:
+# - agrupa os chunks em lotes limitados por TOKENS (e por quantidade)
+# - envia vários lotes ao mesmo tempo via aembed_documents
+# - respeita um orçamento de requisições/minuto e tokens/minuto
+# - em erro 429 espera (Retry-After ou backoff exponencial) e tenta de novo
+# - grava cada lote no PGVector assim que o embedding dele termina
+#   (pelo ORM do PGVector ou, com INGEST_WRITER=copy, via COPY binário
+#   do bulk_writer.py)
+# ========================================
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Iterator
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_postgres import PGVector
+
+from bulk_writer import BulkWriter
+from retrieval_context import run_sync
+from tokenizer import estimate_tokens
+
+# Assinatura de quem grava um lote: (textos, vetores, metadados, ids)
+BatchWriter = Callable[[list[str], list[list[float]], list[dict], list[str]], Awaitable]
+
+
+@dataclass
+class EmbeddingLimits:
+    """Orçamento de concorrência, taxa e tamanho de lote para embeddings"""
+    max_concurrency: int = 4
+    requests_per_minute: int | None = None
+    tokens_per_minute: int | None = None
+    batch_tokens: int = 100_000
+    # 1000 = textos por requisição do OpenAIEmbeddings (chunk_size): lotes
+    # maiores seriam quebrados em mais requisições. O limite que de fato
+    # fecha o lote passa a ser batch_tokens.
+    batch_size: int = 1000
+    max_retries: int = 6
+
+    @classmethod
+    def from_env(cls, **overrides) -> "EmbeddingLimits":
+        """Limites das variáveis INGEST_* e EMBEDDING_RPM/TPM, lidas no momento da chamada
+
+        overrides (ex.: max_concurrency=8) têm precedência sobre o ambiente.
+        """
+        values = {
+            "max_concurrency": int(os.getenv("INGEST_MAX_IN_FLIGHT", cls.max_concurrency)),
+            "requests_per_minute": int(os.getenv("EMBEDDING_RPM", "0")) or None,
+            "tokens_per_minute": int(os.getenv("EMBEDDING_TPM", "0")) or None,
+            "batch_tokens": int(os.getenv("INGEST_BATCH_TOKENS", cls.batch_tokens)),
+            "batch_size": int(os.getenv("INGEST_BATCH_SIZE", cls.batch_size)),
+        }
+        return cls(**(values | overrides))
+
+
+# ===== LOTES POR TOKENS =====
+
+def iter_token_batches(
+    documents: Iterable[tuple[Document, str]],
+    max_tokens: int,
+    max_items: int,
+    read_ahead: int = 256,
+) -> Iterator[tuple[list[tuple[Document, str]], int]]:
+    """Agrupa pares (documento, id) em lotes de até max_tokens tokens
+
+    Conta os tokens em blocos de read_ahead textos para aproveitar o
+    encode em lote do tiktoken. Devolve (lote, tokens_do_lote).
+    """
+    batch: list[tuple[Document, str]] = []
+    batch_tokens = 0
+    pending: list[tuple[Document, str]] = []
+
+    def flush_pending():
+        nonlocal batch, batch_tokens
+        # Tokenizador do OPENAI_MODEL, contando o bloco inteiro de uma vez
+        sizes = estimate_tokens([doc.page_content for doc, _ in pending])
+        for pair, size in zip(pending, sizes):
+            if batch and (batch_tokens + size > max_tokens or len(batch) == max_items):
+                yield batch, batch_tokens
+                batch, batch_tokens = [], 0
+            batch.append(pair)
+            batch_tokens += size
+        pending.clear()
+
+    for pair in documents:
+        pending.append(pair)
+        if len(pending) == read_ahead:
+            yield from flush_pending()
+    yield from flush_pending()
+    if batch:
+        yield batch, batch_tokens
+
+
+# ===== LIMITE DE TAXA =====
+
+class RateLimiter:
+    """Janela deslizante de 60s para requisições/minuto e tokens/minuto"""
+
+    def __init__(self, requests_per_minute: int | None, tokens_per_minute: int | None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._events: deque[tuple[float, int]] = deque()
+        self._tokens_in_window = 0
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _expire(self, now: float) -> None:
+        while self._events and self._events[0][0] <= now - 60:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        if now < self._paused_until:
+            return self._paused_until - now
+        over_requests = self.requests_per_minute and len(self._events) >= self.requests_per_minute
+        over_tokens = self.tokens_per_minute and self._tokens_in_window + tokens > self.tokens_per_minute
+        if (over_requests or over_tokens) and self._events:
+            return self._events[0][0] + 60 - now
+        return 0.0
+
+    async def acquire(self, tokens: int) -> None:
+        """Espera até haver orçamento para uma requisição com `tokens` tokens"""
+        if self.tokens_per_minute:
+            # Um lote maior que o orçamento inteiro nunca caberia na janela
+            tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Suspende novas requisições (usado ao receber 429)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Reconhece 429 do SDK da OpenAI ou de qualquer cliente HTTP"""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+def retry_after(error: Exception) -> float | None:
+    """Lê o cabeçalho Retry-After da resposta, se existir"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def embed_with_backoff(
+    embeddings: Embeddings,
+    texts: list[str],
+    tokens: int,
+    limiter: RateLimiter,
+    max_retries: int,
+) -> list[list[float]]:
+    """Embeda um lote respeitando o limitador e refazendo em caso de 429"""
+    for attempt in range(max_retries + 1):
+        await limiter.acquire(tokens)
+        try:
+            return await embeddings.aembed_documents(texts)
+        except Exception as error:
+            if not is_rate_limit_error(error) or attempt == max_retries:
+                raise
+            # Backoff exponencial com jitter, limitado a 60s
+            delay = retry_after(error) or min(60.0, 2 ** attempt) * (0.5 + random.random() / 2)
+            limiter.pause(delay)
+    raise RuntimeError("unreachable")
+
+
+# ===== MOTOR DE INGESTÃO =====
+
+async def aingest_documents(
+    documents: Iterable[tuple[Document, str]],
+    store: PGVector,
+    limits: EmbeddingLimits | None = None,
+    on_batch: Callable[[int, int], None] | None = None,
+    writer: BatchWriter | None = None,
+) -> int:
+    """Embeda pares (documento, id) em lotes concorrentes e grava no PGVector
+
+    No máximo limits.max_concurrency lotes ficam em voo; o próximo lote só é
+    lido do iterável quando um deles termina, o que limita a memória.
+    writer substitui a gravação padrão (store.add_embeddings numa thread).
+    Se um lote falha, os demais são cancelados e aguardados antes de o erro
+    chegar a quem chamou: nada é gravado depois disso.
+    """
+    limits = limits or EmbeddingLimits.from_env()
+    if limits.max_concurrency < 1 or limits.batch_size < 1:
+        raise ValueError("max_concurrency e batch_size devem ser >= 1")
+
+    async def orm_writer(texts, vectors, metadatas, ids):
+        write = asyncio.ensure_future(
+            asyncio.to_thread(store.add_embeddings, texts=texts, embeddings=vectors, metadatas=metadatas, ids=ids)
+        )
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            # A thread não pode ser interrompida: espera a gravação em curso terminar
+            await write
+            raise
+
+    writer = writer or orm_writer
+
+    limiter = RateLimiter(limits.requests_per_minute, limits.tokens_per_minute)
+    slots = asyncio.Semaphore(limits.max_concurrency)
+    batches = iter_token_batches(documents, limits.batch_tokens, limits.batch_size)
+    tasks: set[asyncio.Task] = set()
+    total = 0
+
+    async def run(number: int, batch: list[tuple[Document, str]], tokens: int) -> None:
+        try:
+            texts = [doc.page_content for doc, _ in batch]
+            vectors = await embed_with_backoff(store.embeddings, texts, tokens, limiter, limits.max_retries)
+            # Grava o lote assim que ele fica pronto, sem esperar os demais
+            await writer(texts, vectors, [doc.metadata for doc, _ in batch], [doc_id for _, doc_id in batch])
+        finally:
+            slots.release()
+        nonlocal total
+        total += len(batch)
+        if on_batch:
+            on_batch(number, len(batch))
+
+    number = 0
+    try:
+        while True:
+            await slots.acquire()
+            # Lê o próximo lote numa thread: parsing/splitting não trava o loop
+            item = await asyncio.to_thread(next, batches, None)
+            if item is None:
+                slots.release()
+                break
+            number += 1
+            tasks.add(asyncio.create_task(run(number, *item)))
+            # Propaga logo o erro de um lote que já falhou
+            for done in [t for t in tasks if t.done()]:
+                tasks.remove(done)
+                done.result()
+
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Um lote falhou (ou a ingestão foi cancelada): cancela os lotes em voo
+        # e espera por eles, para que nenhum grave depois do erro e nenhum
+        # deixe um "Task exception was never retrieved"
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return total
+
+
+def ingest_documents_concurrently(
+    documents: Iterable[tuple[Document, str]],
+    store: PGVector,
+    limits: EmbeddingLimits | None = None,
+    on_batch: Callable[[int, int], None] | None = None,
+    bulk: bool | None = None,
+) -> int:
+    """Versão síncrona de aingest_documents para scripts
+
+    bulk=True (ou INGEST_WRITER=copy) grava com COPY binário em vez do ORM.
+    """
+    limits = limits or EmbeddingLimits.from_env()
+    if bulk is None:
+        bulk = os.getenv("INGEST_WRITER", "orm").lower() == "copy"
+    # COPY só existe no PostgreSQL; outros stores (numpy_store.py) usam add_embeddings
+    bulk = bulk and isinstance(store, PGVector)
+
+    async def run() -> int:
+        if not bulk:
+            return await aingest_documents(documents, store, limits, on_batch)
+        async with BulkWriter(store.collection_name, pool_size=limits.max_concurrency) as bulk_writer:
+            return await aingest_documents(documents, store, limits, on_batch, writer=bulk_writer.write)
+
+    return run_sync(run())
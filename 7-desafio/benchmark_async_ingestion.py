@@ -0,0 +1,103 @@
+# ========================================
+# BENCHMARK - INGESTÃO CONCORRENTE COM SERVIDOR FALSO DE EMBEDDINGS
+# ========================================
+# Mede chunks/s do motor de async_ingestion.py para vários níveis de
+# concorrência, usando o servidor local de fake_embeddings_server.py
+# (latência e 429 configuráveis). Por padrão os vetores são descartados
+# depois de embedados; use --pgvector para gravar numa coleção própria do
+# benchmark (--collection), apagada no final: os chunks sintéticos nunca
+# entram na coleção do desafio (PGVECTOR_COLLECTION) nem no seu manifesto.
+#
+# Uso: python benchmark_async_ingestion.py [--chunks 5000] [--pgvector] [--collection benchmark_async_ingestion]
+# ========================================
+
+import argparse
+import os
+import time
+
+from langchain_core.documents import Document
+from langchain_openai import OpenAIEmbeddings
+
+from async_ingestion import EmbeddingLimits, ingest_documents_concurrently
+from fake_embeddings_server import FakeEmbeddingsServer, FakeServerConfig
+
+
+class NullStore:
+    """Imita a interface do PGVector usada na ingestão, sem gravar nada"""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None, **kwargs):
+        return list(ids or [])
+
+
+def synthetic_chunks(count: int) -> list[tuple[Document, str]]:
+    """Chunks sintéticos de ~500 caracteres, todos diferentes"""
+    base = "Prompt engineering é a prática de escrever instruções claras para modelos. "
+    return [
+        (Document(page_content=f"{i} " + base * 6, metadata={"source": "sintetico", "page": i // 10}), f"bench-{i}")
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=None)
+    parser.add_argument("--tpm", type=int, default=None)
+    parser.add_argument("--pgvector", action="store_true")
+    parser.add_argument("--collection", default="benchmark_async_ingestion", help="coleção usada e apagada com --pgvector")
+    args = parser.parse_args()
+
+    config = FakeServerConfig(latency=args.latency, rate_limit_probability=args.rate_limit_probability)
+    with FakeEmbeddingsServer(config=config) as server:
+        embeddings = OpenAIEmbeddings(
+            model="text-embedding-3-small",
+            base_url=server.base_url,
+            api_key="fake",
+            check_embedding_ctx_length=False,  # Envia texto puro ao servidor falso
+            max_retries=0,  # Deixa o motor tratar os 429
+        )
+        if args.pgvector:
+            from retrieval_context import get_context
+            os.environ["PGVECTOR_COLLECTION"] = args.collection
+            store = get_context().store
+            store.embedding_function = embeddings
+        else:
+            store = NullStore(embeddings)
+
+        chunks = synthetic_chunks(args.chunks)
+        print(f"{'concorrência':>12} {'tempo (s)':>10} {'chunks/s':>10} {'429s':>6} {'pico em voo':>12}")
+        baseline = None
+        for concurrency in args.concurrency:
+            server.stats.__init__()
+            limits = EmbeddingLimits.from_env(
+                max_concurrency=concurrency,
+                batch_size=args.batch_size,
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+            )
+            start = time.perf_counter()
+            total = ingest_documents_concurrently(chunks, store, limits)
+            elapsed = time.perf_counter() - start
+            rate = total / elapsed
+            baseline = baseline or rate
+            print(
+                f"{concurrency:>12} {elapsed:>10.2f} {rate:>10.0f} "
+                f"{server.stats.rate_limited:>6} {server.stats.max_in_flight:>12}"
+                f"   ({rate / baseline:.1f}x)"
+            )
+
+        if args.pgvector:
+            from retrieval_context import close_context
+            store.delete_collection()
+            close_context()
+
+
+if __name__ == "__main__":
+    main()
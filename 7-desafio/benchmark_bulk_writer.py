@@ -0,0 +1,93 @@
+# ========================================
+# BENCHMARK - ORM DO PGVECTOR vs COPY BINÁRIO (BULK WRITER)
+# ========================================
+# Grava os mesmos vetores aleatórios (embeddings já "cacheados", sem chamar
+# a API) de duas formas no banco do docker-compose.yaml:
+# - PGVector.add_embeddings (INSERT ... ON CONFLICT pelo ORM)
+# - BulkWriter.write (COPY binário para staging + upsert)
+# e compara linhas/segundo. Usa uma coleção própria, apagada no final.
+#
+# Uso: python benchmark_bulk_writer.py [--rows 20000] [--batch 1000]
+# ========================================
+
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_postgres import PGVector
+
+from bulk_writer import BulkWriter
+
+load_dotenv()
+
+COLLECTION = "benchmark_bulk_writer"
+
+
+def make_rows(count: int, dimensions: int, prefix: str):
+    """Textos, vetores, metadados e ids sintéticos"""
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((count, dimensions), dtype=np.float32)
+    texts = [f"chunk sintético {i} " * 20 for i in range(count)]
+    metadatas = [{"source": "benchmark", "page": i // 10} for i in range(count)]
+    ids = [f"{prefix}-{i}" for i in range(count)]
+    return texts, vectors.tolist(), metadatas, ids
+
+
+def batches(rows, size):
+    texts, vectors, metadatas, ids = rows
+    for start in range(0, len(ids), size):
+        end = start + size
+        yield texts[start:end], vectors[start:end], metadatas[start:end], ids[start:end]
+
+
+async def run_bulk(rows, batch_size: int, concurrency: int) -> None:
+    async with BulkWriter(COLLECTION, pool_size=concurrency) as writer:
+        slots = asyncio.Semaphore(concurrency)
+
+        async def write(batch):
+            async with slots:
+                await writer.write(*batch)
+
+        await asyncio.gather(*(write(batch) for batch in batches(rows, batch_size)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    store = PGVector(
+        embeddings=DeterministicFakeEmbedding(size=args.dimensions),
+        collection_name=COLLECTION,
+        connection=os.getenv("PGVECTOR_URL"),
+        use_jsonb=True,
+        pre_delete_collection=True,
+    )
+    try:
+        rows = make_rows(args.rows, args.dimensions, "orm")
+        start = time.perf_counter()
+        for texts, vectors, metadatas, ids in batches(rows, args.batch):
+            store.add_embeddings(texts=texts, embeddings=vectors, metadatas=metadatas, ids=ids)
+        orm_rate = args.rows / (time.perf_counter() - start)
+
+        rows = make_rows(args.rows, args.dimensions, "copy")
+        start = time.perf_counter()
+        asyncio.run(run_bulk(rows, args.batch, args.concurrency))
+        copy_rate = args.rows / (time.perf_counter() - start)
+
+        print(f"ORM (add_embeddings): {orm_rate:10.0f} linhas/s")
+        print(f"COPY binário:         {copy_rate:10.0f} linhas/s")
+        print(f"Ganho: {copy_rate / orm_rate:.1f}x")
+    finally:
+        store.delete_collection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# ========================================
+# BENCHMARK - DIMENSÃO REDUZIDA DOS EMBEDDINGS (NATIVA vs PCA)
+# ========================================
+# Mede o custo em recall de guardar vetores menores
+# (embedding_dimensions.py) contra os vetores completos:
+# - "native": o parâmetro dimensions dos modelos text-embedding-3-* devolve
+#   o vetor completo truncado e renormalizado, então ele é simulado
+#   truncando os vetores completos (sem novas chamadas à API)
+# - "pca": PCAProjection ajustada numa amostra dos documentos, como na
+#   ingestão, e aplicada a documentos e perguntas
+# Para cada configuração: bytes por vetor, recall@k contra o top-k exato
+# dos vetores completos e latência da busca exata em NumPy. Se houver
+# PGVECTOR_URL, grava cada configuração numa coleção, cria o índice HNSW e
+# mede recall, p50 e o tamanho dos vetores e do índice.
+#
+# Por padrão os vetores são sintéticos, agrupados e com a variância
+# concentrada nas primeiras dimensões, como nos modelos treinados para
+# truncamento. Com --pdf os documentos são os chunks do PDF do desafio,
+# embedados pela API (com cache), e as perguntas são trechos deles.
+#
+# Uso: python benchmark_embedding_dimensions.py [--size 50000] [--dims 256 512 1024] [--pdf]
+# ========================================
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_postgres import PGVector
+from sqlalchemy import create_engine, text
+
+from bulk_writer import BulkWriter
+from embedding_dimensions import PCAProjection
+from vector_index import collection_info, create_index, drop_index, index_status, knn_search
+
+load_dotenv()
+
+COLLECTION = "benchmark_embedding_dimensions"
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+# ===== VETORES =====
+
+def synthetic_vectors(size: int, queries: int, dimensions: int) -> tuple[np.ndarray, np.ndarray]:
+    """Grupos num espaço com desvio padrão decrescente por dimensão"""
+    rng = np.random.default_rng(0)
+    scale = (1.0 + np.arange(dimensions, dtype=np.float32)) ** -0.5
+    centers = rng.standard_normal((200, dimensions), dtype=np.float32) * scale
+
+    def sample(count: int) -> np.ndarray:
+        labels = rng.integers(0, len(centers), count)
+        return centers[labels] + rng.standard_normal((count, dimensions), dtype=np.float32) * scale * 0.5
+
+    return sample(size), sample(queries)
+
+
+def pdf_vectors(queries: int) -> tuple[np.ndarray, np.ndarray]:
+    """Chunks do PDF do desafio e trechos deles como perguntas, embedados pela API"""
+    from pathlib import Path
+
+    from langchain_openai import OpenAIEmbeddings
+
+    from embedding_cache import with_cache
+    from fast_splitter import splitter_from_env
+    from parallel_pdf import load_pdfs
+
+    pdf = Path(__file__).parent / "Prompt-Engineering-para-Desenvolvedores.pdf"
+    chunks = splitter_from_env(chunk_size=1000, chunk_overlap=150).split_documents(load_pdfs([pdf]))
+    texts = [chunk.page_content for chunk in chunks]
+    rng = np.random.default_rng(0)
+    questions = [texts[i][:200] for i in rng.choice(len(texts), min(queries, len(texts)), replace=False)]
+    embeddings = with_cache(OpenAIEmbeddings(model=os.getenv("OPENAI_MODEL", "text-embedding-3-small")))
+    return np.array(embeddings.embed_documents(texts), dtype=np.float32), np.array(embeddings.embed_documents(questions), dtype=np.float32)
+
+
+def reduce(vectors: np.ndarray, queries: np.ndarray, mode: str, dimensions: int, fit_sample: int):
+    """(documentos, perguntas) reduzidos, já normalizados"""
+    if mode == "native":
+        return normalize(vectors[:, :dimensions]), normalize(queries[:, :dimensions])
+    sample = vectors[np.random.default_rng(1).permutation(len(vectors))[:max(fit_sample, dimensions)]]
+    projection = PCAProjection.fit(sample, dimensions)
+    return normalize(projection.apply(vectors)), normalize(projection.apply(queries))
+
+
+# ===== NUMPY =====
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> tuple[list[set], list[float]]:
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        scores = vectors @ query
+        top = np.argpartition(-scores, k)[:k]
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(set(top.tolist()))
+    return results, latencies
+
+
+def recall(results: list[set], truth: list[set], k: int) -> float:
+    return statistics.mean(len(r & t) / k for r, t in zip(results, truth))
+
+
+# ===== PGVECTOR =====
+
+async def populate(vectors: np.ndarray, chunk: int = 5000) -> None:
+    async with BulkWriter(COLLECTION, pool_size=4) as writer:
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            ids = [f"v-{start + i}" for i in range(len(block))]
+            await writer.write([f"doc {i}" for i in ids], block.tolist(), None, ids)
+
+
+def benchmark_pgvector(engine, vectors: np.ndarray, queries: np.ndarray, truth: list[set], k: int, ef_search: int) -> str:
+    """Grava, indexa e consulta uma configuração; devolve a linha do relatório"""
+    store = PGVector(
+        embeddings=DeterministicFakeEmbedding(size=vectors.shape[1]),
+        collection_name=COLLECTION,
+        connection=engine,
+        use_jsonb=True,
+        pre_delete_collection=True,
+    )
+    try:
+        asyncio.run(populate(vectors))
+        start = time.perf_counter()
+        create_index(engine, COLLECTION, "hnsw")
+        built = time.perf_counter() - start
+        with engine.connect() as conn:
+            info = collection_info(conn, COLLECTION)
+            stored = conn.execute(
+                text("SELECT pg_size_pretty(sum(pg_column_size(embedding))) FROM langchain_pg_embedding WHERE collection_id = :id"),
+                {"id": info.uuid},
+            ).scalar()
+        results, latencies = [], []
+        with engine.connect() as conn:
+            for query in queries:
+                start = time.perf_counter()
+                rows = knn_search(conn, info, query.tolist(), k, ef_search=ef_search)
+                latencies.append((time.perf_counter() - start) * 1000)
+                results.append({int(doc.id[2:]) for doc, _ in rows})
+        return (
+            f"recall@{k}={recall(results, truth, k):6.3f}  p50={statistics.median(latencies):6.2f} ms  "
+            f"vetores {stored}  índice {index_status(engine, COLLECTION)['size']} em {built:.1f}s"
+        )
+    finally:
+        drop_index(engine, COLLECTION)
+        store.delete_collection()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--dimensions", type=int, default=1536, help="dimensões completas (vetores sintéticos)")
+    parser.add_argument("--dims", type=int, nargs="+", default=[256, 512, 1024])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--fit-sample", type=int, default=5000, help="documentos usados para ajustar a PCA")
+    parser.add_argument("--ef-search", type=int, default=100)
+    parser.add_argument("--pdf", action="store_true", help="usa os chunks do PDF do desafio e a API de embeddings")
+    parser.add_argument("--skip-pgvector", action="store_true")
+    args = parser.parse_args()
+
+    vectors, queries = pdf_vectors(args.queries) if args.pdf else synthetic_vectors(args.size, args.queries, args.dimensions)
+    full, full_queries = normalize(vectors), normalize(queries)
+    truth, latencies = exact_top_k(full, full_queries, args.k)
+    print(f"📦 {len(vectors):,} vetores de {vectors.shape[1]} dimensões, {len(queries)} perguntas, k={args.k}")
+
+    configs = [("completo", vectors.shape[1], full, full_queries)]
+    for dimensions in args.dims:
+        if dimensions >= vectors.shape[1]:
+            continue
+        for mode in ("native", "pca"):
+            if mode == "pca" and len(vectors) < dimensions:
+                print(f"⏭️  pca {dimensions} dims: só {len(vectors)} documentos para ajustar a projeção")
+                continue
+            configs.append((mode, dimensions, *reduce(vectors, queries, mode, dimensions, args.fit_sample)))
+
+    print("\n🧮 Busca exata em NumPy (recall contra o top-k dos vetores completos)")
+    for mode, dimensions, docs, questions in configs:
+        results, latencies = exact_top_k(docs, questions, args.k)
+        print(
+            f"  {mode:<9} {dimensions:5d} dims  {4 * dimensions:6d} bytes/vetor  "
+            f"recall@{args.k}={recall(results, truth, args.k):6.3f}  p50={statistics.median(latencies):6.2f} ms"
+        )
+
+    if args.skip_pgvector or not os.getenv("PGVECTOR_URL"):
+        return
+    engine = create_engine(os.getenv("PGVECTOR_URL"))
+    print(f"\n🐘 PostgreSQL, índice HNSW (ef_search={args.ef_search})")
+    for mode, dimensions, docs, questions in configs:
+        print(f"  {mode:<9} {dimensions:5d} dims  {benchmark_pgvector(engine, docs, questions, truth, args.k, args.ef_search)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# ========================================
+# BENCHMARK - TESTE DE CARGA COM OS MODELOS FALSOS (MODEL_PROVIDER=fake)
+# ========================================
+# Dispara --requests perguntas numa chain prompt | modelo de chat falso
+# (fake_models.py) em streaming, com cada nível de --concurrency, e mostra
+# TTFT e tempo total (p50/p95), vazão e os 429/500 injetados. Depois
+# embeda --texts textos com os embeddings falsos.
+# Por fim repete a carga com e sem concorrência e confere que as respostas,
+# as latências sorteadas e os erros são os mesmos (reprodutibilidade).
+# A latência simulada segue as variáveis FAKE_* (veja o README); os tempos
+# mostrados já estão reescalados para a latência completa. Com muita
+# concorrência e --time-scale pequeno, o custo de CPU de cada chunk do
+# stream também é ampliado pela escala: confirme com --time-scale 1.
+#
+# Uso: python benchmark_fake_provider.py [--requests 100] [--concurrency 1 8 32] [--rate-limit 0.05] [--time-scale 0.1]
+# ========================================
+
+import argparse
+import asyncio
+import statistics
+import time
+from dataclasses import replace
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from fake_models import FakeChatModel, FakeEmbeddings, FakeModelConfig
+
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Responda com base no contexto."),
+    ("human", "Contexto: {context}\n\nPergunta {number}: o que é prompt engineering?"),
+])
+CONTEXT = "Prompt engineering é a prática de escrever instruções para modelos de linguagem. " * 40
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def load(llm: FakeChatModel, requests: int, concurrency: int) -> tuple[list[float], list[float], list[str], int]:
+    """(TTFTs, tempos totais, respostas, falhas) de requests perguntas em streaming"""
+    chain = PROMPT | llm
+    semaphore = asyncio.Semaphore(concurrency)
+    answers: list[str] = [""] * requests
+
+    async def ask(number: int) -> tuple[float, float] | None:
+        async with semaphore:
+            start = time.perf_counter()
+            first = None
+            try:
+                async for chunk in chain.astream({"context": CONTEXT, "number": number}):
+                    if first is None and chunk.content:
+                        first = time.perf_counter() - start
+                    answers[number] += chunk.content
+            except Exception:
+                return None
+            return first, time.perf_counter() - start
+
+    results = await asyncio.gather(*(ask(number) for number in range(requests)))
+    done = [result for result in results if result is not None]
+    return [r[0] for r in done], [r[1] for r in done], answers, len(results) - len(done)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--texts", type=int, default=20_000, help="textos embedados (0 desliga)")
+    parser.add_argument("--rate-limit", type=float, default=None, help="chance de 429 por tentativa (padrão: FAKE_RATE_LIMIT_RATE)")
+    parser.add_argument("--time-scale", type=float, default=0.1, help="fração da latência simulada realmente dormida")
+    args = parser.parse_args()
+
+    config = FakeModelConfig(time_scale=args.time_scale)
+    if args.rate_limit is not None:
+        config = replace(config, rate_limit_rate=args.rate_limit)
+    print(
+        f"Latência {config.distribution} (spread {config.spread}): TTFT {config.ttft}s, "
+        f"{config.tokens_per_second:.0f} tokens/s, {config.output_tokens} tokens por resposta, "
+        f"429 em {config.rate_limit_rate:.0%} e 500 em {config.error_rate:.0%} das tentativas"
+    )
+
+    scale = args.time_scale
+    for concurrency in args.concurrency:
+        llm = FakeChatModel(model="gpt-3.5-turbo", stream_usage=True, config=config)
+        start = time.perf_counter()
+        ttfts, totals, _, failed = asyncio.run(load(llm, args.requests, concurrency))
+        elapsed = (time.perf_counter() - start) / scale
+        stats = llm.stats
+        print(
+            f"  concorrência {concurrency:<3d} TTFT p50 {statistics.median(ttfts) / scale:5.2f}s "
+            f"p95 {percentile(ttfts, 0.95) / scale:5.2f}s | total p50 {statistics.median(totals) / scale:5.2f}s "
+            f"p95 {percentile(totals, 0.95) / scale:5.2f}s | {args.requests / elapsed:6.2f} req/s  "
+            f"{stats.output_tokens / elapsed:7.0f} tokens/s | {stats.rate_limited} x 429, {stats.errors} x 500, {failed} falhas"
+        )
+
+    if args.texts:
+        embeddings = FakeEmbeddings(config=config)
+        texts = [f"{CONTEXT[:300]} {i}" for i in range(args.texts)]
+        start = time.perf_counter()
+        vectors = asyncio.run(embeddings.aembed_documents(texts))
+        elapsed = time.perf_counter() - start
+        print(
+            f"\n🔢 {len(vectors):,} embeddings de {len(vectors[0])} dimensões: "
+            f"{embeddings.stats.requests} requisições, {elapsed / scale:.1f}s simulados, "
+            f"{len(vectors) / elapsed:,.0f} vetores/s reais (geração dos vetores incluída)"
+        )
+
+    # Mesma carga, sem espera, com e sem concorrência: sorteios iguais
+    instant = replace(config, time_scale=0.0)
+    runs = []
+    for concurrency in (1, max(args.concurrency)):
+        llm = FakeChatModel(model="gpt-3.5-turbo", config=instant)
+        _, _, answers, failed = asyncio.run(load(llm, args.requests, concurrency))
+        runs.append((answers, failed, llm.stats.requests, llm.stats.rate_limited, llm.stats.errors))
+    print(f"\n🔁 Reprodutível com concorrência 1 e {max(args.concurrency)}: {'sim' if runs[0] == runs[1] else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# ========================================
+# BENCHMARK - SPLITTER POR OFFSETS vs RECURSIVECHARACTERTEXTSPLITTER
+# ========================================
+# 1. Equivalência (golden output): para cada configuração usada no repo
+#    (500/100 do desafio, 1000/150 da ingestão, 250/70 e 300/50 da
+#    sumarização) e para casos de borda, compara chunks e metadados
+#    (inclusive start_index) dos dois splitters. Qualquer diferença
+#    encerra o script com erro.
+# 2. Velocidade: caracteres/s de split_documents sobre o PDF do desafio
+#    repetido até --megabytes.
+#
+# Uso: python benchmark_fast_splitter.py [--megabytes 20]
+# ========================================
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from fast_splitter import FastRecursiveCharacterTextSplitter
+from parallel_pdf import load_pdfs
+
+PDF = Path(__file__).parent / "Prompt-Engineering-para-Desenvolvedores.pdf"
+
+CONFIGS = [
+    {"chunk_size": 500, "chunk_overlap": 100},
+    {"chunk_size": 1000, "chunk_overlap": 150},
+    {"chunk_size": 250, "chunk_overlap": 70},
+    {"chunk_size": 300, "chunk_overlap": 50},
+    {"chunk_size": 100, "chunk_overlap": 0},
+    {"chunk_size": 20, "chunk_overlap": 19},
+    {"chunk_size": 3, "chunk_overlap": 1},
+    {"chunk_size": 500, "chunk_overlap": 100, "add_start_index": True},
+    {"chunk_size": 300, "chunk_overlap": 50, "keep_separator": "end"},
+    {"chunk_size": 300, "chunk_overlap": 50, "strip_whitespace": False},
+    {"chunk_size": 200, "chunk_overlap": 30, "separators": [". ", "\n", ""]},
+]
+
+
+def edge_cases(rng: random.Random) -> list[str]:
+    """Textos que exercitam separadores repetidos, palavras longas e vazios"""
+    words = ["prompt", "engineering", "é", "a", "prática", "de", "instruções", "claras", "modelo", "LLM"]
+    separators = [" ", "  ", "\n", "\n\n", "\n\n\n", ". ", "\t", ""]
+    texts = ["", " ", "\n\n", "a", "x" * 2500, ("palavra" * 300 + " ") * 5, "\n\n".join(["linha"] * 200)]
+    for _ in range(100):
+        parts = [rng.choice(words) * rng.choice([1, 1, 1, 5, 40]) + rng.choice(separators) for _ in range(rng.randint(1, 150))]
+        texts.append("".join(parts))
+    return texts
+
+
+def check_equivalence(texts: list[str]) -> int:
+    """Compara os dois splitters em todas as configurações; devolve o nº de casos"""
+    cases = 0
+    for config in CONFIGS:
+        original = RecursiveCharacterTextSplitter(**config)
+        fast = FastRecursiveCharacterTextSplitter(**config)
+        # Metade com valores aninhados para cobrir o caminho com deepcopy
+        metadatas = [{"source": "golden", "i": i} | ({"tags": ["a", {"b": i}]} if i % 2 else {}) for i in range(len(texts))]
+        expected = original.create_documents(texts, metadatas)
+        got = fast.create_documents(texts, metadatas)
+        if [(d.page_content, d.metadata) for d in expected] != [(d.page_content, d.metadata) for d in got]:
+            for text in texts:
+                if original.split_text(text) != fast.split_text(text):
+                    print(f"❌ Diferença com {config} no texto {text[:80]!r}...")
+                    break
+            sys.exit(1)
+        cases += len(texts)
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=float, default=20)
+    args = parser.parse_args()
+
+    pages = load_pdfs([PDF])
+    texts = [page.page_content for page in pages] + ["\n\n".join(p.page_content for p in pages)]
+    texts += edge_cases(random.Random(0))
+    cases = check_equivalence(texts)
+    print(f"✅ Saída idêntica em {cases} casos ({len(CONFIGS)} configurações)")
+
+    # Corpus grande: as páginas do PDF repetidas até o tamanho pedido
+    page_chars = sum(len(p.page_content) for p in pages)
+    repeat = max(1, int(args.megabytes * 1_000_000 / page_chars))
+    corpus = [Document(page_content=p.page_content, metadata=p.metadata) for p in pages] * repeat
+    total_chars = page_chars * repeat
+    print(f"\n📄 {total_chars / 1_000_000:.1f} M caracteres em {len(corpus)} páginas")
+
+    for config in CONFIGS[:4]:
+        rates = []
+        for splitter in (RecursiveCharacterTextSplitter(**config), FastRecursiveCharacterTextSplitter(**config)):
+            start = time.perf_counter()
+            splitter.split_documents(corpus)
+            rates.append(total_chars / (time.perf_counter() - start))
+        print(
+            f"  {config['chunk_size']:>4}/{config['chunk_overlap']:<4} original {rates[0] / 1e6:6.2f} M chars/s | "
+            f"offsets {rates[1] / 1e6:6.2f} M chars/s | ganho {rates[1] / rates[0]:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
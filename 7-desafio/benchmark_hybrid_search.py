@@ -0,0 +1,181 @@
+# ========================================
+# BENCHMARK - BUSCA VETORIAL vs FULL-TEXT vs HÍBRIDA (RRF)
+# ========================================
+# Grava os chunks do PDF do desafio numa coleção própria e roda um
+# conjunto de consultas rotuladas (palavras-chave curtas e perguntas em
+# linguagem natural). Um resultado é relevante se contém o trecho
+# esperado. Para cada modo reporta hit@k, MRR@k, latência p50/p99
+# (incluindo o embedding da pergunta) e quantas chamadas de embedding
+# foram feitas:
+# - vetorial: embedding + kNN (search_in_db original)
+# - full-text: só ts_rank_cd, todos os termos obrigatórios
+# - híbrida: embedding + full-text + kNN fundidos com RRF, numa consulta
+# - híbrida + atalho: como a anterior, mas consultas curtas que casam
+#   forte no full-text não calculam embedding
+#
+# Sem --fake-embeddings usa a API da OpenAI (sem cache de embeddings,
+# para medir a latência real). Com --fake-embeddings a qualidade vetorial
+# não significa nada; use --fake-latency para simular a ida à API.
+# A coleção e o índice full-text são apagados no final.
+#
+# Uso: python benchmark_hybrid_search.py [--fake-embeddings --fake-latency 0.2] [--repeat 5]
+# ========================================
+
+import argparse
+import os
+import statistics
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_openai import OpenAIEmbeddings
+from langchain_postgres import PGVector
+from sqlalchemy import create_engine
+
+from fast_splitter import FastRecursiveCharacterTextSplitter
+from hybrid_search import HybridParams, drop_fts_index, ensure_fts_index, hybrid_search, hybrid_search_by_vector, lexical_search
+from ingestion import clean_metadata, iter_with_ids
+from parallel_pdf import load_pdfs
+from vector_index import cached_collection_info, similarity_search_by_vector_with_score
+
+load_dotenv()
+
+COLLECTION = "benchmark_hybrid_search"
+PDF = Path(__file__).parent / "Prompt-Engineering-para-Desenvolvedores.pdf"
+
+# (consulta, trecho que um chunk relevante contém)
+QUERIES = [
+    ("few-shot", "Few-Shot Prompting é uma técnica"),
+    ("ReAct", "Reasoning + Acting"),
+    ("Tree of Thought", "explore múltiplos caminhos"),
+    ("Self-Consistency", "votação majoritária"),
+    ("goroutine", "goroutine"),
+    ("Kafka RabbitMQ SQS", "Compare as tecnologias Kafka"),
+    ("rate limiter", "rate limiter"),
+    ("O que é engenharia de prompt?", "processo em que você orienta"),
+    ("Quem formalizou a técnica Chain of Thought?", "Wei et al"),
+    ("Qual paper deu origem ao Skeleton of Thought?", "Parallel Decoding"),
+    ("Quais são as limitações do few-shot prompting?", "Fragilidade à ordem"),
+    ("Quais as vantagens do zero-shot?", "Baixo custo de preparação"),
+    ("Como limitar as requisições por cliente de uma API?", "Token Bucket"),
+    ("Quais delimitadores a Anthropic usa para separar o raciocínio da resposta?", "<thought>"),
+    ("Quantas vezes a tarefa é executada na self-consistency?", "de 5 a 10"),
+    ("Qual a diferença entre ReAct e CoT puro?", "Interage com o ambiente externo"),
+]
+
+
+class CountingEmbeddings(Embeddings):
+    """Conta as chamadas de embed_query e, opcionalmente, simula a latência da API"""
+
+    def __init__(self, inner: Embeddings, latency: float = 0.0):
+        self.inner = inner
+        self.latency = latency
+        self.calls = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.inner.embed_query(text)
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def first_relevant(results, expected: str) -> int | None:
+    """Posição (1..k) do primeiro resultado que contém o trecho esperado"""
+    expected = normalize(expected)
+    for position, (doc, _) in enumerate(results, start=1):
+        if expected in normalize(doc.page_content):
+            return position
+    return None
+
+
+def populate(store: PGVector) -> int:
+    """Grava os chunks (500/100 caracteres) do PDF do desafio na coleção"""
+    splitter = FastRecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+    chunks = [clean_metadata(doc) for doc in splitter.split_documents(load_pdfs([PDF]))]
+    docs, ids = zip(*iter_with_ids(chunks))
+    store.add_documents(list(docs), ids=list(ids))
+    return len(chunks)
+
+
+def run_mode(label: str, search, embeddings: CountingEmbeddings, k: int, repeat: int) -> None:
+    positions, latencies = [], []
+    calls = embeddings.calls
+    for _ in range(repeat):
+        for query, expected in QUERIES:
+            start = time.perf_counter()
+            results = search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            positions.append(first_relevant(results, expected))
+    hits = statistics.mean(p is not None for p in positions)
+    mrr = statistics.mean(1 / p if p else 0 for p in positions)
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"  {label:<18} hit@{k}={hits:5.2f}  MRR@{k}={mrr:5.3f}  p50={statistics.median(ordered):7.2f} ms  "
+        f"p99={p99:7.2f} ms  embeddings={embeddings.calls - calls}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fake-embeddings", action="store_true")
+    parser.add_argument("--fake-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.fake_embeddings:
+        inner = DeterministicFakeEmbedding(size=1536)
+    else:
+        inner = OpenAIEmbeddings(model=os.getenv("OPENAI_MODEL", "text-embedding-3-small"))
+    embeddings = CountingEmbeddings(inner, args.fake_latency)
+    engine = create_engine(os.getenv("PGVECTOR_URL"))
+    store = PGVector(
+        embeddings=embeddings,
+        collection_name=COLLECTION,
+        connection=engine,
+        use_jsonb=True,
+        pre_delete_collection=True,
+    )
+    params = HybridParams.from_env()
+    try:
+        chunks = populate(store)
+        ensure_fts_index(engine, COLLECTION, params)
+        info = cached_collection_info(engine, COLLECTION)
+        print(f"📦 {chunks} chunks | {len(QUERIES)} consultas x {args.repeat} | dicionário {params.fts_config}")
+
+        def vector(query):
+            return similarity_search_by_vector_with_score(engine, COLLECTION, embeddings.embed_query(query), args.k)
+
+        def lexical(query):
+            with engine.connect() as conn:
+                return lexical_search(conn, info, query, args.k, params)
+
+        def hybrid(query):
+            return hybrid_search_by_vector(engine, COLLECTION, query, embeddings.embed_query(query), args.k, params)
+
+        def hybrid_fast(query):
+            return hybrid_search(engine, embeddings, COLLECTION, query, args.k, params)
+
+        for label, search in (
+            ("vetorial", vector),
+            ("full-text", lexical),
+            ("híbrida", hybrid),
+            ("híbrida + atalho", hybrid_fast),
+        ):
+            run_mode(label, search, embeddings, args.k, args.repeat)
+    finally:
+        drop_fts_index(engine, COLLECTION, params)
+        store.delete_collection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# ========================================
+# BENCHMARK - BUSCA kNN FILTRADA POR METADADOS CONFORME A COLEÇÃO CRESCE
+# ========================================
+# Grava uma fonte "alvo" de tamanho fixo e, a cada etapa, acrescenta
+# documentos de outras fontes (via bulk_writer.py). Em cada tamanho mede a
+# busca kNN filtrada por {"source": alvo} e por {"source": alvo, "page":
+# {"$lte": ...}}:
+# - sem os índices de metadados: o PostgreSQL varre a coleção inteira
+# - com ensure_metadata_indexes (o que a ingestão faz): só as linhas da
+#   fonte pedida são lidas, e a latência fica estável
+# Os resultados são conferidos contra a busca exata feita em NumPy sobre
+# os vetores da fonte alvo. Sem índice ANN (com HNSW o filtro é aplicado
+# depois do índice; veja PGVECTOR_ITERATIVE_SCAN). A coleção é apagada no
+# final.
+#
+# Uso: python benchmark_metadata_filter.py [--target 2000] [--sizes 0 20000 100000] [--dimensions 1536]
+# ========================================
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_postgres import PGVector
+from sqlalchemy import create_engine, text
+
+from bulk_writer import BulkWriter
+from metadata_filter import drop_metadata_indexes, ensure_metadata_indexes
+from vector_index import collection_info, knn_search
+
+load_dotenv()
+
+COLLECTION = "benchmark_metadata_filter"
+TARGET = "alvo.pdf"
+PAGES = 100
+
+
+async def write(vectors: np.ndarray, source: str, offset: int, chunk: int = 5000) -> None:
+    """Grava os vetores como chunks de source, com páginas 1..PAGES"""
+    async with BulkWriter(COLLECTION, pool_size=4) as writer:
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            ids = [f"{source}-{offset + start + i}" for i in range(len(block))]
+            metadatas = [{"source": source, "page": (start + i) % PAGES + 1} for i in range(len(block))]
+            await writer.write([f"doc {i}" for i in ids], block.tolist(), metadatas, ids)
+
+
+def exact_ids(target: np.ndarray, pages: np.ndarray, query: list[float], k: int, max_page: int | None) -> list[str]:
+    """Busca exata por distância de cosseno, em NumPy, só sobre a fonte alvo"""
+    mask = np.ones(len(target), dtype=bool) if max_page is None else pages <= max_page
+    candidates = np.flatnonzero(mask)
+    vectors = target[candidates]
+    query = np.asarray(query, dtype=np.float32)
+    similarity = (vectors @ query) / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    best = candidates[np.argsort(-similarity, kind="stable")[:k]]
+    return [f"{TARGET}-{i}" for i in best]
+
+
+def measure(engine, info, queries, k, metadata_filter):
+    """Executa as consultas filtradas e devolve (ids por consulta, latências em ms)"""
+    results, latencies = [], []
+    with engine.connect() as conn:
+        for query in queries:
+            start = time.perf_counter()
+            rows = knn_search(conn, info, query, k, metadata_filter=metadata_filter)
+            latencies.append((time.perf_counter() - start) * 1000)
+            results.append([doc.id for doc, _ in rows])
+    return results, latencies
+
+
+def report(label, results, latencies, truth, k):
+    recall = statistics.mean(len(set(r) & set(t)) / k for r, t in zip(results, truth))
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"  {label:<34} recall@{k}={recall:6.3f}  p50={statistics.median(ordered):7.2f} ms  p99={p99:7.2f} ms")
+    return recall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", type=int, default=2000, help="chunks da fonte filtrada")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 20_000, 100_000], help="chunks de outras fontes")
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = create_engine(os.getenv("PGVECTOR_URL"))
+    rng = np.random.default_rng(0)
+    target = rng.standard_normal((args.target, args.dimensions), dtype=np.float32)
+    pages = np.arange(args.target) % PAGES + 1
+    queries = rng.standard_normal((args.queries, args.dimensions), dtype=np.float32).tolist()
+    filters = {
+        "source": ({"source": TARGET}, None),
+        "source + page <= 10": ({"source": TARGET, "page": {"$lte": 10}}, 10),
+    }
+    truth = {
+        label: [exact_ids(target, pages, query, args.k, max_page) for query in queries]
+        for label, (_, max_page) in filters.items()
+    }
+
+    store = PGVector(
+        embeddings=DeterministicFakeEmbedding(size=args.dimensions),
+        collection_name=COLLECTION,
+        connection=engine,
+        use_jsonb=True,
+        pre_delete_collection=True,
+    )
+    try:
+        asyncio.run(write(target, TARGET, 0))
+        others = 0
+        for size in sorted(args.sizes):
+            # Acrescenta só a diferença: a fonte alvo não muda entre as etapas
+            if size > others:
+                extra = rng.standard_normal((size - others, args.dimensions), dtype=np.float32)
+                asyncio.run(write(extra, "outros.pdf", others))
+                others = size
+            with engine.connect() as conn:
+                info = collection_info(conn, COLLECTION)
+            print(f"\n📦 {args.target:,} chunks alvo + {others:,} de outras fontes ({args.dimensions} dimensões)")
+
+            for indexed in (False, True):
+                if indexed:
+                    ensure_metadata_indexes(engine, COLLECTION)
+                else:
+                    drop_metadata_indexes(engine, COLLECTION)
+                with engine.begin() as conn:
+                    conn.execute(text("ANALYZE langchain_pg_embedding"))
+                for label, (metadata_filter, _) in filters.items():
+                    results, latencies = measure(engine, info, queries, args.k, metadata_filter)
+                    recall = report(f"{label} ({'com' if indexed else 'sem'} índices)", results, latencies, truth[label], args.k)
+                    assert recall == 1.0, f"Busca filtrada ({label}) diferente da busca exata"
+    finally:
+        drop_metadata_indexes(engine, COLLECTION)
+        store.delete_collection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# ========================================
+# BENCHMARK - NUMPY VECTOR STORE (MEMMAP) vs BUSCA EXATA
+# ========================================
+# Grava vetores sintéticos agrupados no NumpyVectorStore (numpy_store.py)
+# em blocos e mede:
+# - tempo de gravação e tempo para ABRIR a coleção num novo objeto
+#   (só mapeia os arquivos, independente do tamanho)
+# - latência da primeira consulta (páginas ainda fora da memória) e
+#   p50/p99 das seguintes, com e sem filtro de metadados
+# - recall@k contra a busca exata calculada à parte, bloco a bloco
+# Com --pgvector também grava as primeiras --pgvector-rows linhas numa
+# coleção do PGVector e confere que a busca exata de lá devolve os mesmos
+# documentos (drop-in). Os arquivos e a coleção são apagados no final.
+#
+# Uso: python benchmark_numpy_store.py [--size 1000000] [--dimensions 384] [--pgvector]
+# ========================================
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from numpy_store import NumpyVectorStore
+
+load_dotenv()
+
+COLLECTION = "benchmark_numpy_store"
+BLOCK = 10_000
+
+
+def blocks(size: int, dimensions: int, centers: np.ndarray):
+    """Vetores ao redor de centros aleatórios, gerados em blocos (mesma semente sempre)"""
+    rng = np.random.default_rng(0)
+    for start in range(0, size, BLOCK):
+        count = min(BLOCK, size - start)
+        labels = rng.integers(0, len(centers), count)
+        yield start, centers[labels] + rng.standard_normal((count, dimensions), dtype=np.float32) * 0.3
+
+
+def metadatas(start: int, count: int) -> list[dict]:
+    return [{"source": f"doc-{(start + i) % 100}.pdf", "page": (start + i) % 50 + 1} for i in range(count)]
+
+
+def update_truth(truth: list[tuple[np.ndarray, np.ndarray]], queries: np.ndarray, start: int, vectors: np.ndarray, k: int, mask=None):
+    """Mantém o top-k exato (similaridade de cosseno) de cada consulta bloco a bloco"""
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarity = queries @ normalized.T
+    if mask is not None:
+        similarity[:, ~mask] = -np.inf
+    for q, (ids, scores) in enumerate(truth):
+        ids = np.concatenate([ids, np.arange(start, start + len(vectors))])
+        scores = np.concatenate([scores, similarity[q]])
+        best = np.argsort(-scores, kind="stable")[:k]
+        truth[q] = (ids[best], scores[best])
+
+
+def measure(store: NumpyVectorStore, queries: np.ndarray, k: int, metadata_filter=None):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows = store.similarity_search_with_score_by_vector(query, k, filter=metadata_filter)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({doc.id for doc, _ in rows})
+    return results, latencies
+
+
+def report(label, results, latencies, truth, k):
+    expected = [{f"v-{i}" for i, s in zip(ids, scores) if np.isfinite(s)} for ids, scores in truth]
+    recall = statistics.mean(len(r & t) / max(1, len(t)) for r, t in zip(results, expected))
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"  {label:<24} recall@{k}={recall:6.3f}  1ª={latencies[0]:8.2f} ms  "
+        f"p50={statistics.median(ordered[1:] or ordered):7.2f} ms  p99={p99:7.2f} ms"
+    )
+    return recall
+
+
+def compare_with_pgvector(path: str, dimensions: int, centers: np.ndarray, queries: np.ndarray, rows: int, k: int) -> None:
+    """Grava as primeiras linhas no PGVector e no NumpyVectorStore e compara a busca exata"""
+    from langchain_postgres import PGVector
+    from sqlalchemy import create_engine
+
+    from bulk_writer import BulkWriter
+    from vector_index import collection_info, knn_search
+
+    engine = create_engine(os.getenv("PGVECTOR_URL"))
+    pg = PGVector(
+        embeddings=DeterministicFakeEmbedding(size=dimensions),
+        collection_name=COLLECTION,
+        connection=engine,
+        use_jsonb=True,
+        pre_delete_collection=True,
+    )
+    local = NumpyVectorStore(DeterministicFakeEmbedding(size=dimensions), COLLECTION, os.path.join(path, "pg"))
+
+    async def write():
+        async with BulkWriter(COLLECTION) as writer:
+            for start, vectors in blocks(rows, dimensions, centers):
+                ids = [f"v-{start + i}" for i in range(len(vectors))]
+                await writer.write([f"doc {i}" for i in ids], vectors.tolist(), metadatas(start, len(vectors)), ids)
+                local.add_embeddings([f"doc {i}" for i in ids], vectors, metadatas(start, len(vectors)), ids)
+
+    try:
+        asyncio.run(write())
+        with engine.connect() as conn:
+            info = collection_info(conn, COLLECTION)
+        with engine.connect() as conn:
+            same = 0
+            for metadata_filter in (None, {"source": "doc-7.pdf"}):
+                for query in queries:
+                    expected = [doc.id for doc, _ in knn_search(conn, info, query.tolist(), k, exact=True, metadata_filter=metadata_filter)]
+                    found = [doc.id for doc, _ in local.similarity_search_with_score_by_vector(query, k, filter=metadata_filter)]
+                    same += set(expected) == set(found)
+        print(f"\n🐘 PGVector ({rows:,} linhas): mesmo top-{k} em {same}/{2 * len(queries)} consultas (com e sem filtro)")
+    finally:
+        pg.delete_collection()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pgvector", action="store_true", help="confere o resultado contra o PGVector (PGVECTOR_URL)")
+    parser.add_argument("--pgvector-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((100, args.dimensions), dtype=np.float32)
+    queries = centers[rng.integers(0, 100, args.queries)] + rng.standard_normal((args.queries, args.dimensions), dtype=np.float32) * 0.3
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    metadata_filter = {"source": "doc-7.pdf", "page": {"$lte": 25}}
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+    truth, filtered_truth = [empty] * args.queries, [empty] * args.queries
+
+    with tempfile.TemporaryDirectory() as path:
+        store = NumpyVectorStore(DeterministicFakeEmbedding(size=args.dimensions), COLLECTION, os.path.join(path, "store"))
+        written = 0.0
+        for offset, vectors in blocks(args.size, args.dimensions, centers):
+            ids = [f"v-{offset + i}" for i in range(len(vectors))]
+            meta = metadatas(offset, len(vectors))
+            start = time.perf_counter()
+            store.add_embeddings([f"doc {i}" for i in ids], vectors, meta, ids)
+            written += time.perf_counter() - start
+            update_truth(truth, queries, offset, vectors, args.k)
+            mask = np.array([m["source"] == "doc-7.pdf" and m["page"] <= 25 for m in meta])
+            update_truth(filtered_truth, queries, offset, vectors, args.k, mask)
+        size_mb = sum(entry.stat().st_size for entry in os.scandir(store.path)) / 1e6
+        print(f"📦 {args.size:,} vetores de {args.dimensions} dimensões | gravados em {written:.1f}s | {size_mb:,.0f} MB")
+
+        # Um objeto novo, como um processo que acabou de subir
+        del store
+        start = time.perf_counter()
+        store = NumpyVectorStore(DeterministicFakeEmbedding(size=args.dimensions), COLLECTION, os.path.join(path, "store"))
+        print(f"  aberto em {(time.perf_counter() - start) * 1000:.2f} ms ({len(store):,} vetores mapeados)")
+
+        results, latencies = measure(store, queries, args.k)
+        assert report("sem filtro", results, latencies, truth, args.k) == 1.0, "NumpyVectorStore deveria ser exato"
+        # A 1ª consulta filtrada avalia o filtro em todas as linhas; as seguintes reaproveitam a máscara
+        results, latencies = measure(store, queries, args.k, metadata_filter)
+        assert report("filtro source + page", results, latencies, filtered_truth, args.k) == 1.0
+
+        if args.pgvector:
+            compare_with_pgvector(path, args.dimensions, centers, queries, min(args.pgvector_rows, args.size), args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# ========================================
+# BENCHMARK - QUANTIZAÇÃO (FLOAT16 / INT8 / BINÁRIA) + RESCORING
+# ========================================
+# Compara o layout atual (vetores float32, índice sobre vector(N)) com o
+# 1º passo quantizado seguido de rescoring pelo vetor completo:
+# 1. simulação em NumPy (roda sempre): recall@k de cada quantização sem e
+#    com rescoring (k x fator candidatos), bytes por vetor e o custo do
+#    1º passo. int8 (escala por dimensão) entra só como referência: o
+#    pgvector não tem um tipo int8
+# 2. no PostgreSQL, se o pgvector for >= 0.7: cria o índice HNSW de cada
+#    modo (vector_index.create_index), mede recall@k contra a busca exata,
+#    latência p50/p99 e tamanho do índice e da tabela
+# Vetores sintéticos agrupados, como em benchmark_vector_index.py. Eles
+# são pessimistas para a binária: vizinhos do mesmo grupo diferem só no
+# ruído e compartilham quase todos os sinais, então o Hamming empata muito
+# (com embeddings reais o recall após rescoring é bem maior). A coleção é
+# apagada no final.
+#
+# Uso: python benchmark_quantization.py [--size 50000] [--dimensions 1536] [--factors 1 2 4 10]
+# ========================================
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_postgres import PGVector
+from sqlalchemy import create_engine, text
+
+from benchmark_vector_index import clustered_vectors
+from bulk_writer import BulkWriter
+from quantization import MIN_PGVECTOR, pgvector_version
+from vector_index import collection_info, create_index, drop_index, index_status, knn_search
+
+load_dotenv()
+
+COLLECTION = "benchmark_quantization"
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+# ===== 1. SIMULAÇÃO EM NUMPY =====
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def first_pass_scorers(vectors: np.ndarray) -> dict:
+    """Para cada quantização: (bytes por vetor, função consulta -> score do 1º passo, maior = melhor)"""
+    # Valores arredondados para float16, mas acumulados em float32 (como no pgvector)
+    half = normalize(vectors).astype(np.float16).astype(np.float32)
+    low, high = vectors.min(axis=0), vectors.max(axis=0)
+    scale = (high - low) / 255
+    scale[scale == 0] = 1.0
+    int8 = np.round((vectors - low) / scale).astype(np.uint8)
+    int8_norms = np.linalg.norm(int8 * scale + low, axis=1)
+    bits = np.packbits(vectors > 0, axis=1)
+    dimensions = vectors.shape[1]
+    return {
+        "float16": (2 * dimensions, lambda q: half @ q.astype(np.float16).astype(np.float32)),
+        "int8": (dimensions, lambda q: ((int8 @ (q * scale)) + low @ q) / int8_norms),
+        # Hamming: menos bits diferentes = mais parecido
+        "binary": (dimensions // 8, lambda q: -POPCOUNT[np.bitwise_xor(bits, np.packbits(q > 0))].sum(axis=1)),
+    }
+
+
+def simulate(vectors: np.ndarray, queries: np.ndarray, k: int, factors: list[int]) -> None:
+    exact = normalize(vectors)
+    truth = [set(np.argsort(-(exact @ q))[:k]) for q in queries]
+    print(f"\n🧮 Simulação NumPy: {len(vectors):,} vetores de {vectors.shape[1]} dimensões, {len(queries)} consultas")
+    print(f"  {'float32 (atual)':<16} {4 * vectors.shape[1]:6d} bytes/vetor  recall@{k}=1.000")
+    for name, (size, score) in first_pass_scorers(vectors).items():
+        recalls = {factor: [] for factor in factors}
+        costs = []
+        for q, expected in zip(queries, truth):
+            start = time.perf_counter()
+            first = score(q)
+            costs.append((time.perf_counter() - start) * 1000)
+            order = np.argsort(-first, kind="stable")
+            for factor in factors:
+                candidates = order[:k * factor]
+                # Rescoring: cosseno com o vetor completo só nos candidatos
+                rescored = candidates[np.argsort(-(exact[candidates] @ q), kind="stable")[:k]]
+                recalls[factor].append(len(set(rescored) & expected) / k)
+        summary = "  ".join(f"x{factor}={statistics.mean(values):5.3f}" for factor, values in recalls.items())
+        print(f"  {name:<16} {size:6d} bytes/vetor  recall@{k} por fator de rescoring: {summary}  1º passo {statistics.median(costs):6.2f} ms")
+
+
+# ===== 2. PGVECTOR =====
+
+async def populate(vectors: np.ndarray, chunk: int = 5000) -> None:
+    async with BulkWriter(COLLECTION, pool_size=4) as writer:
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            ids = [f"v-{start + i}" for i in range(len(block))]
+            await writer.write([f"doc {i}" for i in ids], block.tolist(), None, ids)
+
+
+def measure(engine, queries: np.ndarray, k: int, **params):
+    with engine.connect() as conn:
+        info = collection_info(conn, COLLECTION)
+    results, latencies = [], []
+    with engine.connect() as conn:
+        for query in queries:
+            start = time.perf_counter()
+            rows = knn_search(conn, info, query.tolist(), k, **params)
+            latencies.append((time.perf_counter() - start) * 1000)
+            results.append({doc.id for doc, _ in rows})
+    return results, latencies
+
+
+def report(label, results, latencies, truth, k, size=""):
+    recall = statistics.mean(len(r & t) / k for r, t in zip(results, truth))
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"  {label:<28} recall@{k}={recall:6.3f}  p50={statistics.median(ordered):7.2f} ms  p99={p99:7.2f} ms  {size}")
+
+
+def benchmark_pgvector(vectors: np.ndarray, queries: np.ndarray, k: int, factors: list[int], ef_search: int) -> None:
+    engine = create_engine(os.getenv("PGVECTOR_URL"))
+    with engine.connect() as conn:
+        version = pgvector_version(conn)
+    if version < MIN_PGVECTOR:
+        print(f"\n⏭️  pgvector {'.'.join(map(str, version))}: halfvec/binary_quantize exigem >= 0.7, pulando o PostgreSQL")
+        return
+    store = PGVector(
+        embeddings=DeterministicFakeEmbedding(size=vectors.shape[1]),
+        collection_name=COLLECTION,
+        connection=engine,
+        use_jsonb=True,
+        pre_delete_collection=True,
+    )
+    try:
+        asyncio.run(populate(vectors))
+        with engine.connect() as conn:
+            table = conn.execute(text("SELECT pg_size_pretty(pg_total_relation_size('langchain_pg_embedding'))")).scalar()
+        print(f"\n🐘 PostgreSQL (pgvector {'.'.join(map(str, version))}), tabela langchain_pg_embedding: {table}")
+        truth, latencies = measure(engine, queries, k, exact=True)
+        report("exata (sem índice)", truth, latencies, truth, k)
+
+        for quantization in (None, "halfvec", "binary"):
+            start = time.perf_counter()
+            create_index(engine, COLLECTION, "hnsw", quantization=quantization)
+            built = time.perf_counter() - start
+            size = f"índice {index_status(engine, COLLECTION)['size']} em {built:.1f}s"
+            label = quantization or "vector (atual)"
+            if quantization is None:
+                results, latencies = measure(engine, queries, k, ef_search=ef_search)
+                report(label, results, latencies, truth, k, size)
+                continue
+            for factor in factors:
+                os.environ["QUANTIZATION_RESCORE_FACTOR"] = str(factor)
+                results, latencies = measure(engine, queries, k, ef_search=ef_search)
+                report(f"{label} + rescoring x{factor}", results, latencies, truth, k, size)
+            os.environ.pop("QUANTIZATION_RESCORE_FACTOR")
+    finally:
+        drop_index(engine, COLLECTION)
+        store.delete_collection()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 2, 4, 10])
+    parser.add_argument("--ef-search", type=int, default=100)
+    parser.add_argument("--skip-pgvector", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((100, args.dimensions), dtype=np.float32)
+    vectors = clustered_vectors(np.random.default_rng(0), args.size, centers)
+    queries = normalize(clustered_vectors(rng, args.queries, centers))
+
+    simulate(vectors, queries, args.k, args.factors)
+    if not args.skip_pgvector:
+        benchmark_pgvector(vectors, queries, args.k, args.factors, args.ef_search)
+
+
+if __name__ == "__main__":
+    main()
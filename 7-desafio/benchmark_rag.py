@@ -0,0 +1,431 @@
+# ========================================
+# BENCHMARK DE PONTA A PONTA - RAG DO DESAFIO, ETAPA POR ETAPA
+# ========================================
+# Mede onde o tempo do desafio.py é gasto, sobre PDFs sintéticos de
+# tamanho escalável e o mesmo banco do desafio (o PostgreSQL do
+# docker-compose.yaml, ou VECTOR_STORE=numpy), numa coleção própria que
+# é recriada a cada execução:
+# - ingestão: para cada --pages, gera um PDF com esse número de páginas e
+#   roda o ingest_pdf do desafio (páginas -> chunks -> embeddings -> banco),
+#   medindo páginas/s, chunks/s e vetores/s
+# - consultas: --requests perguntas diferentes para cada nível de
+#   --concurrency, com o tempo de cada etapa: embedding da pergunta, busca
+#   (kNN + reranking, como no desafio), montagem do prompt, primeiro token
+#   do modelo (TTFT, contado desde o início da chamada ao modelo) e total
+# - --memory: repete tudo com o tracemalloc ligado e registra o pico de
+#   memória Python de cada etapa, as linhas que mais retiveram memória e o
+#   pico de RSS do processo (os tempos ficam mais lentos nesse modo)
+#
+# O resultado vai para um JSON (--output) e é comparado com o baseline
+# (--baseline): vazões, medianas (p50) e picos de memória piores que
+# --tolerance são marcados como regressão e o script termina com código 1;
+# o p95, instável com poucas perguntas, só gera aviso. --save-baseline grava o
+# resultado atual como o novo baseline. Por padrão os modelos são os
+# falsos (--provider fake, veja fake_models.py): sem custo e com a mesma
+# latência simulada em todas as execuções.
+#
+# Uso: python benchmark_rag.py [--pages 10 100 500] [--concurrency 1 4 16] [--requests 50] [--memory]
+#                              [--output resultado.json] [--baseline base.json] [--save-baseline]
+# ========================================
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_BASELINE = Path(__file__).parent / ".cache" / "benchmark_rag_baseline.json"
+# Gravadas no resultado: a comparação mostra o que mudou desde o baseline
+SETTINGS = (
+    "INGEST_WRITER", "INGEST_BATCH_SIZE", "CHUNK_UNIT", "EMBEDDING_DIMENSIONS", "QUANTIZATION",
+    "RERANK", "PGVECTOR_EF_SEARCH", "FAKE_TIME_SCALE", "FAKE_LLM_TTFT", "FAKE_LLM_TOKENS_PER_SECOND",
+)
+VOCABULARY = (
+    "prompt modelo instrução contexto exemplo few-shot zero-shot cadeia raciocínio resposta tarefa "
+    "formato saída usuário sistema token janela temperatura avaliação técnica engenharia documento "
+    "pergunta busca vetor embedding chunk recuperação geração agente ferramenta memória histórico "
+    "validação erro custo latência qualidade revisão estratégia função dados tabela código análise "
+    "classificação resumo tradução extração entidade sentimento persona restrição critério iteração"
+).split()
+
+
+# ===== PDF SINTÉTICO =====
+
+def _pdf_text(text: str) -> bytes:
+    """Texto de uma string PDF (WinAnsi), com parênteses e barras escapados"""
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return escaped.encode("cp1252", errors="replace")
+
+
+def write_synthetic_pdf(path: Path, pages: int, seed: int = 0, lines_per_page: int = 50) -> None:
+    """PDF de texto com `pages` páginas de frases aleatórias (~4000 caracteres por página)"""
+    rng = random.Random(seed)
+    vocabulary = VOCABULARY + [f"termo{i}" for i in range(2000)]
+    # Objetos: 1 catálogo, 2 árvore de páginas, 3 fonte; depois página + conteúdo de cada página
+    objects: dict[int, bytes] = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    kids = []
+    for index in range(pages):
+        page_id, content_id = 4 + 2 * index, 5 + 2 * index
+        lines = [" ".join(rng.choices(vocabulary, k=12)) + "." for _ in range(lines_per_page)]
+        stream = b"BT /F1 9 Tf 14 TL 40 810 Td " + b" ".join(b"(" + _pdf_text(line) + b") '" for line in lines) + b" ET"
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(b"%d 0 R" % page_id)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number in range(1, len(objects) + 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, objects[number])
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(output)
+
+
+def questions(count: int, offset: int, seed: int = 0) -> list[str]:
+    """Perguntas diferentes entre si (nenhum cache de embeddings ou respostas ajuda)"""
+    rng = random.Random(seed * 1_000_003 + offset)
+    return [
+        f"O que o documento diz sobre {rng.choice(VOCABULARY)} e {rng.choice(VOCABULARY)} ({offset + i})?"
+        for i in range(count)
+    ]
+
+
+# ===== MEDIÇÕES =====
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "p50": round(statistics.median(ordered), 2),
+        "p95": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def peak_rss_mb() -> float | None:
+    """Pico de RSS do processo (None no Windows, que não tem o módulo resource)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class MemoryProbe:
+    """Pico de memória Python (tracemalloc) e as linhas que mais retiveram memória na etapa"""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        # Sem as alocações do próprio tracemalloc
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+    def __enter__(self) -> "MemoryProbe":
+        if self.enabled:
+            self._start = self._snapshot()
+            tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if not self.enabled:
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        self.python_peak_mb = round(peak / 1024 / 1024, 1)
+        growth = self._snapshot().compare_to(self._start, "lineno")[:5]
+        self.top_growth = [
+            f"{'/'.join(Path(stat.traceback[0].filename).parts[-2:])}:{stat.traceback[0].lineno} "
+            f"{stat.size_diff / 1024 / 1024:+.1f} MB"
+            for stat in growth
+        ]
+
+    def report(self) -> dict:
+        if not self.enabled:
+            return {}
+        return {"python_peak_mb": self.python_peak_mb, "rss_peak_mb": peak_rss_mb(), "top_growth": self.top_growth}
+
+
+def reset_collection() -> None:
+    """Apaga a coleção do benchmark para a ingestão começar do zero
+
+    A coleção recriada ganha outro uuid: o collection_info em memória
+    (vector_index.py) precisa ser esquecido, senão as buscas filtrariam
+    pela coleção apagada e não trariam nada.
+    """
+    from numpy_store import vector_store_kind
+    from retrieval_context import get_context
+    from vector_index import invalidate_collection_info
+
+    store = get_context().store
+    store.delete_collection()
+    invalidate_collection_info(store.collection_name)
+    if vector_store_kind() == "pgvector":
+        store.create_collection()
+
+
+def vacuum_tables() -> None:
+    """VACUUM ANALYZE depois da ingestão, fora da medição
+
+    Cada execução apaga e regrava a coleção: sem isso as consultas da
+    execução seguinte passam por linhas mortas e estatísticas velhas e
+    ficam mais lentas, e o baseline acusaria uma regressão que não existe.
+    """
+    from sqlalchemy import text
+
+    from numpy_store import vector_store_kind
+    from retrieval_context import get_context
+
+    if vector_store_kind() != "pgvector":
+        return
+    with get_context().engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE langchain_pg_embedding"))
+
+
+def benchmark_ingestion(pages: int, directory: Path, memory: bool) -> dict:
+    from desafio import create_splitter
+    from ingestion import ingest_pdf
+    from retrieval_context import get_context
+
+    path = directory / f"sintetico-{pages}.pdf"
+    write_synthetic_pdf(path, pages)
+    reset_collection()
+    with MemoryProbe(memory) as probe:
+        start = time.perf_counter()
+        report = ingest_pdf(path, create_splitter(), get_context().store)
+        elapsed = time.perf_counter() - start
+    vacuum_tables()
+    chunks = report.added + report.unchanged
+    return {
+        "pages": pages,
+        "chunks": chunks,
+        "vectors": report.added,
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 2),
+        "chunks_per_second": round(chunks / elapsed, 2),
+        "vectors_per_second": round(report.added / elapsed, 2),
+        **probe.report(),
+    }
+
+
+def timed_query(question: str) -> dict[str, float]:
+    """Responde uma pergunta como o stream_model do desafio, cronometrando cada etapa (ms)"""
+    from desafio import build_prompt_context, search_by_vector
+    from retrieval_context import get_context
+
+    rag = get_context()
+    start = time.perf_counter()
+    vector = rag.embeddings.embed_query(question)
+    embedded = time.perf_counter()
+    # Busca vetorial (ou híbrida) + reranking, conforme SEARCH_MODE / RERANK
+    results = search_by_vector(question, vector)
+    searched = time.perf_counter()
+    assert results, f"A busca não trouxe nenhum chunk para {question!r}"
+    messages = rag.prompt.invoke({"context": build_prompt_context(results), "question": question})
+    built = time.perf_counter()
+    first = None
+    for chunk in rag.llm.stream(messages):
+        if first is None and chunk.content:
+            first = time.perf_counter()
+    end = time.perf_counter()
+    return {
+        "embed_ms": (embedded - start) * 1000,
+        "knn_ms": (searched - embedded) * 1000,
+        "prompt_ms": (built - searched) * 1000,
+        "llm_ttft_ms": ((first or end) - built) * 1000,
+        "total_ms": (end - start) * 1000,
+    }
+
+
+def benchmark_queries(concurrency: int, requests: int, offset: int, memory: bool) -> dict:
+    with MemoryProbe(memory) as probe:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            timings = list(executor.map(timed_query, questions(requests, offset)))
+        elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "queries_per_second": round(requests / elapsed, 2),
+        **{stage: percentiles([t[stage] for t in timings]) for stage in timings[0]},
+        **probe.report(),
+    }
+
+
+# ===== BASELINE =====
+
+def metrics(result: dict) -> dict[str, tuple[float, bool]]:
+    """Métricas comparáveis: nome -> (valor, maior é melhor)"""
+    flat: dict[str, tuple[float, bool]] = {}
+    for row in result.get("ingestion", []):
+        for name in ("pages_per_second", "chunks_per_second", "vectors_per_second"):
+            flat[f"ingestion[pages={row['pages']}].{name}"] = (row[name], True)
+        if "python_peak_mb" in row:
+            flat[f"ingestion[pages={row['pages']}].python_peak_mb"] = (row["python_peak_mb"], False)
+    for row in result.get("queries", []):
+        prefix = f"queries[concurrency={row['concurrency']}]"
+        flat[f"{prefix}.queries_per_second"] = (row["queries_per_second"], True)
+        for stage in ("embed_ms", "knn_ms", "prompt_ms", "llm_ttft_ms", "total_ms"):
+            for stat in ("p50", "p95"):
+                flat[f"{prefix}.{stage}.{stat}"] = (row[stage][stat], False)
+        if "python_peak_mb" in row:
+            flat[f"{prefix}.python_peak_mb"] = (row["python_peak_mb"], False)
+    return flat
+
+
+def compare(result: dict, baseline: dict, tolerance: float, min_ms: float) -> list[str]:
+    """Regressões do resultado em relação ao baseline (e imprime a comparação)"""
+    # Números de configurações diferentes não são comparáveis
+    different = [
+        f"{key} {baseline['environment'].get(key)} -> {result['environment'].get(key)}"
+        for key in ("provider", "vector_store", "search_mode", "memory_profile")
+        if result["environment"].get(key) != baseline["environment"].get(key)
+    ]
+    if different:
+        print(f"\n⚠️  Baseline com outra configuração ({', '.join(different)}): comparação ignorada")
+        return []
+    old_settings, new_settings = baseline["environment"].get("settings", {}), result["environment"]["settings"]
+    for key in SETTINGS:
+        if old_settings.get(key) != new_settings.get(key):
+            print(f"ℹ️  {key}: {old_settings.get(key)} -> {new_settings.get(key)}")
+    current, previous = metrics(result), metrics(baseline)
+    regressions = []
+    print(f"\n📏 Comparação com o baseline de {baseline['environment']['timestamp']} (tolerância {tolerance:.0%})")
+    for name in sorted(current.keys() & previous.keys()):
+        value, higher_is_better = current[name]
+        old = previous[name][0]
+        if not old:
+            continue
+        change = (value - old) / old
+        worse = -change if higher_is_better else change
+        # Etapas de poucos ms variam muito em termos relativos: só contam acima de min_ms
+        noise = name.endswith(("_ms.p50", "_ms.p95")) and max(value, old) < min_ms
+        flag = ""
+        if worse > tolerance and not noise:
+            # O p95 de poucas perguntas depende de uma ou duas amostras: só avisa
+            flag = "⚠️  p95 pior" if name.endswith(".p95") else "❌ REGRESSÃO"
+        elif worse < -tolerance:
+            flag = "✅"
+        print(f"  {name:<52} {old:>10.2f} -> {value:>10.2f} ({change:+.0%}) {flag}")
+        if flag.startswith("❌"):
+            regressions.append(name)
+    return regressions
+
+
+# ===== EXECUÇÃO =====
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=50, help="perguntas por nível de concorrência")
+    parser.add_argument("--provider", choices=("fake", "openai"), default="fake", help="MODEL_PROVIDER usado no benchmark")
+    parser.add_argument("--collection", default="benchmark_rag", help="coleção recriada pelo benchmark")
+    parser.add_argument("--memory", action="store_true", help="perfil de memória (tracemalloc) de cada etapa")
+    parser.add_argument("--output", type=Path, default=None, help="arquivo JSON do resultado")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="grava o resultado como o novo baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora relativa aceita antes de marcar regressão")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="latências abaixo disso não contam como regressão")
+    args = parser.parse_args()
+
+    # Lidos ao construir o contexto do RAG: precisam estar definidos antes
+    os.environ["MODEL_PROVIDER"] = args.provider
+    os.environ["PGVECTOR_COLLECTION"] = args.collection
+    # Perguntas e chunks são todos novos: os caches só distorceriam as medições
+    os.environ.setdefault("EMBEDDING_CACHE", "off")
+    os.environ.setdefault("ANSWER_CACHE", "off")
+
+    from hybrid_search import search_mode
+    from numpy_store import vector_store_kind
+    from retrieval_context import get_context
+
+    if args.memory:
+        tracemalloc.start()
+    get_context()
+    result = {
+        "environment": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "provider": args.provider,
+            "vector_store": vector_store_kind(),
+            "search_mode": search_mode(),
+            "memory_profile": args.memory,
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+            "settings": {key: os.getenv(key) for key in SETTINGS},
+        },
+        "ingestion": [],
+        "queries": [],
+    }
+
+    print(f"📚 Ingestão ({args.provider}, {vector_store_kind()}, coleção {args.collection})")
+    with tempfile.TemporaryDirectory() as directory:
+        for pages in sorted(args.pages):
+            row = benchmark_ingestion(pages, Path(directory), args.memory)
+            result["ingestion"].append(row)
+            print(
+                f"  {pages:5,} páginas  {row['chunks']:7,} chunks  {row['seconds']:7.1f}s | "
+                f"{row['pages_per_second']:7.1f} páginas/s  {row['chunks_per_second']:8.1f} chunks/s  "
+                f"{row['vectors_per_second']:8.1f} vetores/s" + (f" | pico Python {row['python_peak_mb']} MB" if args.memory else "")
+            )
+
+    print(f"\n🔍 Consultas sobre {max(args.pages):,} páginas, {args.requests} perguntas por nível (ms, p50/p95)")
+    timed_query(questions(1, -1)[0])  # Conexões, tokenizador e índices carregados fora da medição
+    for index, concurrency in enumerate(args.concurrency):
+        row = benchmark_queries(concurrency, args.requests, index * args.requests, args.memory)
+        result["queries"].append(row)
+        stages = "  ".join(
+            f"{stage.removesuffix('_ms')} {row[stage]['p50']:.0f}/{row[stage]['p95']:.0f}"
+            for stage in ("embed_ms", "knn_ms", "prompt_ms", "llm_ttft_ms", "total_ms")
+        )
+        print(f"  concorrência {concurrency:<3d} {row['queries_per_second']:6.2f} perguntas/s | {stages}"
+              + (f" | pico Python {row['python_peak_mb']} MB" if args.memory else ""))
+
+    if args.memory:
+        result["memory"] = {"rss_peak_mb": peak_rss_mb()}
+        print(f"\n🧠 Pico de RSS do processo: {result['memory']['rss_peak_mb']} MB")
+        for row in result["ingestion"][-1:] + result["queries"][-1:]:
+            label = f"ingestão de {row['pages']} páginas" if "pages" in row else f"consultas com concorrência {row['concurrency']}"
+            print(f"  Memória retida ao fim da etapa ({label}):")
+            for line in row["top_growth"]:
+                print(f"    {line}")
+
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n💾 Resultado em {args.output}")
+
+    regressions = []
+    if args.baseline.exists() and not args.save_baseline:
+        regressions = compare(result, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance, args.min_ms)
+        print(f"\n{len(regressions)} regressões" if regressions else "\nSem regressões")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n📌 Baseline gravado em {args.baseline}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# ========================================
+# BENCHMARK - TOP-3 FIXO vs RERANKING (MMR) COM ORÇAMENTO DE TOKENS
+# ========================================
+# Usa a mesma coleção e as mesmas consultas rotuladas de
+# benchmark_hybrid_search.py e compara o contexto que iria ao modelo:
+# - top-k fixo (o search_in_db original, k=3)
+# - rerank.py: 50 candidatos com vetores, limiar + MMR em NumPy e
+#   contexto cheio até cada orçamento de tokens (--budgets)
+# Reporta a fração de perguntas cujo trecho esperado está no contexto,
+# tokens de contexto por pergunta, acertos por 1000 tokens de contexto e
+# o custo do reranking em si (sem a consulta ao banco).
+#
+# Uso: python benchmark_rerank.py [--fake-embeddings] [--budgets 400 800 1200] [--mode hybrid|vector]
+# ========================================
+
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_openai import OpenAIEmbeddings
+from langchain_postgres import PGVector
+from sqlalchemy import create_engine
+
+from benchmark_hybrid_search import COLLECTION, QUERIES, first_relevant, populate
+from hybrid_search import drop_fts_index, hybrid_search_by_vector
+from rerank import RerankParams, mmr, pack_to_budget, rerank
+from tokenizer import estimate_tokens
+from vector_index import similarity_search_by_vector_with_score
+
+load_dotenv()
+
+
+def context_tokens(results) -> int:
+    return sum(estimate_tokens([doc.page_content for doc, _ in results], os.getenv("OPENAI_MODEL_CHAT", "gpt-3.5-turbo")))
+
+
+def report(label: str, contexts: list, rerank_ms: list[float] | None = None) -> None:
+    hits = [first_relevant(results, expected) is not None for results, (_, expected) in zip(contexts, QUERIES)]
+    tokens = [context_tokens(results) for results in contexts]
+    per_1k = sum(hits) / sum(tokens) * 1000 if sum(tokens) else 0.0
+    cost = f" | rerank p50 {statistics.median(rerank_ms) * 1000:6.1f} µs" if rerank_ms else ""
+    print(
+        f"  {label:<24} no contexto {statistics.mean(hits):5.2f} | {statistics.mean(tokens):7.1f} tokens/pergunta "
+        f"| {statistics.mean(len(r) for r in contexts):4.1f} docs | {per_1k:5.2f} acertos/1k tokens{cost}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fake-embeddings", action="store_true")
+    parser.add_argument("--mode", choices=["hybrid", "vector"], default="hybrid")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[400, 800, 1200])
+    args = parser.parse_args()
+
+    if args.fake_embeddings:
+        embeddings = DeterministicFakeEmbedding(size=1536)
+    else:
+        embeddings = OpenAIEmbeddings(model=os.getenv("OPENAI_MODEL", "text-embedding-3-small"))
+    engine = create_engine(os.getenv("PGVECTOR_URL"))
+    store = PGVector(
+        embeddings=embeddings,
+        collection_name=COLLECTION,
+        connection=engine,
+        use_jsonb=True,
+        pre_delete_collection=True,
+    )
+    params = RerankParams.from_env()
+    try:
+        print(f"📦 {populate(store)} chunks | {len(QUERIES)} consultas | busca {args.mode} | fetch_k {params.fetch_k}")
+        vectors = embeddings.embed_documents([query for query, _ in QUERIES])
+
+        def search(query, vector, k, with_embeddings=False):
+            if args.mode == "hybrid":
+                return hybrid_search_by_vector(engine, COLLECTION, query, vector, k, with_embeddings=with_embeddings)
+            return similarity_search_by_vector_with_score(engine, COLLECTION, vector, k, with_embeddings=with_embeddings)
+
+        report(f"top-{args.k} fixo", [search(q, v, args.k) for (q, _), v in zip(QUERIES, vectors)])
+
+        candidates = [search(q, v, params.fetch_k, with_embeddings=True) for (q, _), v in zip(QUERIES, vectors)]
+        # Com lambda=1 o MMR tem de reproduzir a ordenação por similaridade
+        sample = np.stack([vector for _, _, vector in candidates[0]])
+        order, similarity = mmr(vectors[0], sample, len(sample), 1.0)
+        assert order == list(np.argsort(-similarity, kind="stable")), "MMR com lambda=1 deveria ordenar por relevância"
+
+        for budget in args.budgets:
+            contexts, costs = [], []
+            for vector, rows in zip(vectors, candidates):
+                start = time.perf_counter()
+                reranked = rerank(vector, rows, params, params.score_weight if args.mode == "hybrid" else 0.0)
+                costs.append((time.perf_counter() - start) * 1000)
+                contexts.append(pack_to_budget(reranked, budget))
+            report(f"MMR + orçamento {budget}", contexts, costs)
+    finally:
+        drop_fts_index(engine, COLLECTION)
+        store.delete_collection()
+
+
+if __name__ == "__main__":
+    main()
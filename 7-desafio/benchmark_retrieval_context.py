@@ -0,0 +1,113 @@
+# ========================================
+# BENCHMARK - CONTEXTO POR PERGUNTA vs CONTEXTO COMPARTILHADO
+# ========================================
+# Compara a latência por pergunta de duas formas de responder:
+# - "antes": recria OpenAIEmbeddings, PGVector (engine + pool),
+#   ChatOpenAI e prompt a cada pergunta (comportamento original)
+# - "depois": usa o contexto único de retrieval_context.get_context()
+# Os caches de embeddings e de respostas ficam desligados nos dois lados
+# (EMBEDDING_CACHE=off, ANSWER_CACHE=off), para medir só o contexto.
+#
+# Uso: python benchmark_retrieval_context.py [repeticoes]
+# Requer o banco do docker-compose.yaml populado e OPENAI_API_KEY.
+# ========================================
+
+import os
+import sys
+import statistics
+import time
+
+from dotenv import load_dotenv
+from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_postgres import PGVector
+
+from retrieval_context import PROMPT, get_context, warm_up
+
+load_dotenv()
+
+PERGUNTAS = [
+    "O que é o Prompt Engineering?",
+    "Quais são as técnicas de prompt engineering?",
+    "Como fazer few-shot prompting?",
+]
+
+
+def build_context_string(results) -> str:
+    """Monta o contexto do prompt igual ao desafio.py"""
+    return "\n\n".join(
+        f"Documento {i+1}:\n{doc.page_content}"
+        for i, (doc, score) in enumerate(results)
+    )
+
+
+def answer_rebuilding(query: str) -> str:
+    """Responde recriando todos os objetos (como o desafio.py original)"""
+    embeddings = OpenAIEmbeddings(model=os.getenv("OPENAI_MODEL", "text-embedding-3-small"))
+    store = PGVector(
+        embeddings=embeddings,
+        collection_name=os.getenv("PGVECTOR_COLLECTION"),
+        connection=os.getenv("PGVECTOR_URL"),
+        use_jsonb=True,
+    )
+    results = store.similarity_search_with_score(query, k=3)
+    llm = ChatOpenAI(model=os.getenv("OPENAI_MODEL_CHAT", "gpt-3.5-turbo"), temperature=0.7)
+    chain = PROMPT | llm
+    response = chain.invoke({"context": build_context_string(results), "question": query})
+    # Libera o pool criado nesta pergunta, como aconteceria ao sair do escopo
+    store._engine.dispose()
+    return response.content
+
+
+def answer_shared(query: str) -> str:
+    """Responde usando o contexto compartilhado do processo"""
+    context = get_context()
+    results = context.store.similarity_search_with_score(query, k=3)
+    response = context.chain.invoke({"context": build_context_string(results), "question": query})
+    return response.content
+
+
+def measure(answer, repetitions: int) -> list[float]:
+    """Executa todas as perguntas N vezes e devolve as latências em segundos"""
+    latencies = []
+    for _ in range(repetitions):
+        for pergunta in PERGUNTAS:
+            start = time.perf_counter()
+            answer(pergunta)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+    """Exibe média, p50 e p95 das latências"""
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{name:<8} n={len(ordered):<4} "
+        f"média={statistics.mean(ordered)*1000:8.1f} ms  "
+        f"p50={statistics.median(ordered)*1000:8.1f} ms  "
+        f"p95={p95*1000:8.1f} ms"
+    )
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    # Lidos ao construir o contexto: o "antes" não tem cache, e acertos nas
+    # perguntas repetidas inflariam o ganho do "depois"
+    os.environ.setdefault("EMBEDDING_CACHE", "off")
+    os.environ.setdefault("ANSWER_CACHE", "off")
+
+    print("⏱️  Medindo 'antes' (objetos recriados por pergunta)...")
+    before = measure(answer_rebuilding, repetitions)
+
+    print("⏱️  Medindo 'depois' (contexto compartilhado)...")
+    warm_up()
+    after = measure(answer_shared, repetitions)
+
+    print("-" * 70)
+    report("antes", before)
+    report("depois", after)
+    print(f"Ganho na média: {statistics.mean(before) / statistics.mean(after):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# ========================================
+# BENCHMARK - MAP-REDUCE HIERÁRQUICO vs REDUCE ÚNICO
+# ========================================
+# Sumariza textos sintéticos de tamanhos crescentes com o
+# MapReduceSummarizer (summarization.py) usando um modelo falso com
+# latência fixa por chamada (sem rede nem custo), e mostra para cada
+# tamanho:
+# - tokens do prompt do reduce único de 7-pipeline-de-sumarizacao.py
+#   (todos os resumos juntos) e se ele caberia na janela de contexto
+# - chamadas ao modelo, níveis de collapse e tempo total do motor com
+#   cada max_concurrency
+# Com paralelismo suficiente o tempo cresce com a profundidade da árvore
+# (log n), não com o número de chunks.
+#
+# Ressumarização incremental (summary_cache.py): sumariza um documento de
+# --pages páginas dividido como em 7-pipeline-de-sumarizacao.py
+# (chunk_size=300, chunk_overlap=50), edita um parágrafo no meio e
+# sumariza de novo com o mesmo cache, contando as chamadas ao modelo.
+#
+# Uso: python benchmark_summarization.py [--chunks 100 1000 5000] [--latency 0.05] [--concurrency 1 16 64] [--pages 500]
+# ========================================
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import tempfile
+import time
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from summarization import SEPARATOR, MapReduceSummarizer, SummaryLimits
+from summary_cache import SummaryCache
+
+WORDS = "city dawn traffic light glass steel coffee street subway rhythm morning sparrow neon crowd".split()
+
+
+def fake_llm(latency: float, summary_words: int, calls: list) -> RunnableLambda:
+    """Modelo falso: espera latency segundos e devolve as primeiras palavras do texto + hash"""
+
+    async def invoke(prompt) -> str:
+        calls.append(1)
+        await asyncio.sleep(latency)
+        # A 1ª linha é a instrução do prompt; o resto é o texto a resumir
+        body = prompt.to_string().split("\n", 1)[-1]
+        # O hash faz o resumo mudar com qualquer parte do texto, como num modelo real
+        return " ".join(body.split()[:summary_words - 1] + [hashlib.sha256(body.encode()).hexdigest()[:8]])
+
+    return RunnableLambda(invoke)
+
+
+def documents(count: int, words: int = 60) -> list[Document]:
+    return [
+        Document(page_content=" ".join(WORDS[(i + j) % len(WORDS)] for j in range(words)))
+        for i in range(count)
+    ]
+
+
+def book(pages: int, paragraphs_per_page: int = 4, seed: int = 0) -> list[str]:
+    """Parágrafos de palavras aleatórias (~100 palavras cada)"""
+    rng = random.Random(seed)
+    vocabulary = WORDS + [f"term{i}" for i in range(500)]
+    return [" ".join(rng.choices(vocabulary, k=100)) for _ in range(pages * paragraphs_per_page)]
+
+
+async def run(
+    docs: list[Document],
+    latency: float,
+    summary_words: int,
+    limits: SummaryLimits,
+    cache: SummaryCache | None = None,
+) -> tuple[float, int, int]:
+    calls: list = []
+    summarizer = MapReduceSummarizer(fake_llm(latency, summary_words, calls), limits=limits, cache=cache)
+    levels = 0
+    start = time.perf_counter()
+    async for event in summarizer.astream(docs):
+        levels = max(levels, event.level if event.stage == "collapse" else 0)
+    return time.perf_counter() - start, len(calls), levels
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--latency", type=float, default=0.05, help="segundos por chamada ao modelo falso")
+    parser.add_argument("--summary-words", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--reduce-tokens", type=int, default=3000)
+    parser.add_argument("--context-window", type=int, default=16_000)
+    parser.add_argument("--pages", type=int, default=500, help="páginas do teste incremental (0 desliga)")
+    args = parser.parse_args()
+
+    for count in args.chunks:
+        docs = documents(count)
+        summarizer = MapReduceSummarizer(fake_llm(0, args.summary_words, []))
+        # Os resumos do map são os mesmos em qualquer execução (modelo determinístico)
+        map_summaries = [" ".join(doc.page_content.split()[:args.summary_words - 1] + ["0" * 8]) for doc in docs]
+        single = sum(summarizer.count_tokens([SEPARATOR.join(map_summaries)]))
+        fits = "cabe" if single <= args.context_window else "ESTOURA"
+        print(f"\n📚 {count:,} chunks | reduce único: {single:,} tokens ({fits} em {args.context_window:,})")
+        for concurrency in args.concurrency:
+            # Sequencial com muitos chunks só confirma o óbvio: pula acima de 1000
+            if concurrency == 1 and count > 1000:
+                continue
+            limits = SummaryLimits(max_concurrency=concurrency, reduce_tokens=args.reduce_tokens)
+            elapsed, calls, levels = asyncio.run(run(docs, args.latency, args.summary_words, limits))
+            print(f"  max_concurrency={concurrency:<3d} {calls:6,} chamadas  {levels} níveis de collapse  {elapsed:7.2f}s")
+
+    if args.pages:
+        benchmark_incremental(args)
+
+
+def benchmark_incremental(args) -> None:
+    splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=50)
+    paragraphs = book(args.pages)
+    limits = SummaryLimits(max_concurrency=max(args.concurrency), reduce_tokens=args.reduce_tokens)
+    with tempfile.TemporaryDirectory() as path:
+        cache = SummaryCache(os.path.join(path, "summaries.sqlite"))
+        print(f"\n📖 {args.pages} páginas, {len(paragraphs):,} parágrafos, cache de resumos em SQLite")
+        for label, text in (
+            ("1ª execução (cache vazio)", paragraphs),
+            ("sem alterações", paragraphs),
+            ("1 parágrafo editado", paragraphs[:len(paragraphs) // 2] + [book(1, 1, seed=1)[0]] + paragraphs[len(paragraphs) // 2 + 1:]),
+        ):
+            docs = splitter.create_documents(["\n\n".join(text)])
+            elapsed, calls, levels = asyncio.run(run(docs, args.latency, args.summary_words, limits, cache))
+            print(f"  {label:<26} {len(docs):6,} chunks  {calls:6,} chamadas  {levels} níveis de collapse  {elapsed:7.2f}s")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# ========================================
+# BENCHMARK - ROTEADOR DE SUMARIZAÇÃO vs ESTRATÉGIA FIXA
+# ========================================
+# Sumariza documentos sintéticos de 1 a 500 páginas, divididos com
+# create_documents como em 6-sumarizacao-com-map-reduce.py, com cada
+# estratégia fixa (stuff, refine, map_reduce) e com a escolha automática
+# do AdaptiveSummarizer (summarization.py). O modelo falso cobra latência
+# por chamada, por token de entrada e por token gerado, então aparecem
+# os dois desperdícios que o roteador evita:
+# - map_reduce em textos curtos: muitas chamadas e rodadas a mais
+# - stuff em textos longos: estoura a janela de contexto
+# Mostra tempo total, chamadas e tokens de entrada/saída de cada
+# combinação, além da estimativa que o roteador registrou. A linha
+# "por chunk" é o map-reduce sem agrupar os chunks em seções
+# (MapReduceSummarizer, como o load_summarize_chain do script 6).
+#
+# Uso: python benchmark_summary_router.py [--pages 1 5 20 100 500] [--time-scale 0.1]
+# ========================================
+
+import argparse
+import asyncio
+import hashlib
+import time
+
+from langchain_core.runnables import RunnableLambda
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from benchmark_summarization import book
+from summarization import STRATEGIES, AdaptiveSummarizer, MapReduceSummarizer, SummaryLimits, estimate_plan
+from tokenizer import estimate_tokens
+
+
+class FakeModel:
+    """Modelo falso com latência de uma API: fixa + por token de entrada + por token gerado"""
+
+    def __init__(self, time_scale: float, summary_words: int = 120, context_window: int = 128_000):
+        self.time_scale = time_scale
+        self.summary_words = summary_words
+        self.context_window = context_window
+        self.calls = self.input_tokens = self.output_tokens = 0
+
+    async def _invoke(self, prompt) -> str:
+        text = prompt.to_string()
+        tokens = estimate_tokens([text])[0]
+        if tokens > self.context_window:
+            raise ValueError(f"Prompt with {tokens} tokens exceeds the {self.context_window}-token context window")
+        body = text.split("\n", 1)[-1]
+        summary = " ".join(body.split()[:self.summary_words - 1] + [hashlib.sha256(body.encode()).hexdigest()[:8]])
+        output = estimate_tokens([summary])[0]
+        self.calls += 1
+        self.input_tokens += tokens
+        self.output_tokens += output
+        # ~0.4 s por chamada, 0.05 ms por token lido e 10 ms por token gerado
+        await asyncio.sleep(self.time_scale * (0.4 + tokens * 0.00005 + output * 0.01))
+        return summary
+
+    def runnable(self) -> RunnableLambda:
+        return RunnableLambda(self._invoke)
+
+
+def run(documents, strategy: str | None, args) -> str:
+    model = FakeModel(args.time_scale, context_window=args.context_window)
+    limits = SummaryLimits(max_concurrency=args.concurrency)
+    if strategy == "por chunk":
+        summarizer = MapReduceSummarizer(model.runnable(), limits=limits)
+        plan = estimate_plan("map_reduce", summarizer.count_tokens([d.page_content for d in documents]), limits)
+    else:
+        summarizer = AdaptiveSummarizer(model.runnable(), limits=limits, strategy=strategy)
+        plan = summarizer.plan(documents)
+    start = time.perf_counter()
+    try:
+        summarizer.summarize(documents)
+    except ValueError:
+        return f"  {strategy or 'auto':<11} ESTOURA a janela de {args.context_window:,} tokens ({plan.input_tokens:,} tokens de entrada)"
+    elapsed = (time.perf_counter() - start) / args.time_scale
+    label = strategy or f"auto={plan.strategy}"
+    return (
+        f"  {label:<20} {elapsed:7.1f}s  {model.calls:5,} chamadas  {model.input_tokens:9,} tokens lidos  "
+        f"{model.output_tokens:7,} gerados  (estimado: {plan.calls} chamadas, {plan.rounds} em sequência)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20, 100, 500])
+    parser.add_argument("--time-scale", type=float, default=0.1, help="fração da latência simulada realmente dormida")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--context-window", type=int, default=128_000)
+    args = parser.parse_args()
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+    # Tokenizador e inicialização do LangChain/asyncio fora da medição
+    # (o tempo medido é dividido por --time-scale, então qualquer custo fixo seria ampliado)
+    run(splitter.create_documents(["warm-up"]), None, args)
+    print("Tempos já reescalados para a latência simulada completa")
+    for pages in args.pages:
+        documents = splitter.create_documents(["\n\n".join(book(pages))])
+        print(f"\n📄 {pages} páginas, {len(documents):,} documentos")
+        for strategy in (None, *STRATEGIES, "por chunk"):
+            print(run(documents, strategy, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# ========================================
+# BENCHMARK - CHUNKS EM CARACTERES vs CHUNKS EM TOKENS
+# ========================================
+# Divide o PDF do desafio (repetido --copies vezes) com o splitter em
+# caracteres (500/100) e com o splitter em tokens do OPENAI_MODEL
+# (--tokens/--overlap) e compara:
+# - a dispersão do tamanho dos chunks em tokens
+# - quantas requisições de embedding os lotes por tokens de
+#   async_ingestion.py precisam para o mesmo corpus
+# Precisa do tokenizador em cache (python tokenizer.py).
+#
+# Uso: python benchmark_token_chunking.py [--copies 50] [--tokens 128]
+# ========================================
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from async_ingestion import EmbeddingLimits, iter_token_batches
+from fast_splitter import FastRecursiveCharacterTextSplitter, TokenRecursiveCharacterTextSplitter
+from parallel_pdf import load_pdfs
+from tokenizer import count_tokens
+
+PDF = Path(__file__).parent / "Prompt-Engineering-para-Desenvolvedores.pdf"
+
+
+def report(label: str, chunks, elapsed: float, limits: EmbeddingLimits) -> None:
+    sizes = count_tokens([chunk.page_content for chunk in chunks])
+    pairs = [(chunk, str(i)) for i, chunk in enumerate(chunks)]
+    requests = sum(1 for _ in iter_token_batches(pairs, limits.batch_tokens, limits.batch_size))
+    print(
+        f"  {label:<22} {len(chunks):6d} chunks em {elapsed:5.2f}s | tokens/chunk "
+        f"min {min(sizes):4d} p50 {statistics.median(sizes):6.1f} max {max(sizes):4d} "
+        f"(desvio {statistics.pstdev(sizes):5.1f}) | {sum(sizes):8d} tokens | {requests:4d} requisições"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--copies", type=int, default=50)
+    parser.add_argument("--chars", type=int, default=500)
+    parser.add_argument("--chars-overlap", type=int, default=100)
+    parser.add_argument("--tokens", type=int, default=128)
+    parser.add_argument("--overlap", type=int, default=25)
+    defaults = EmbeddingLimits.from_env()
+    parser.add_argument("--batch-tokens", type=int, default=defaults.batch_tokens)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    args = parser.parse_args()
+
+    pages = load_pdfs([PDF]) * args.copies
+    limits = EmbeddingLimits.from_env(batch_tokens=args.batch_tokens, batch_size=args.batch_size)
+    print(f"📄 {len(pages)} páginas | lotes de até {limits.batch_tokens} tokens / {limits.batch_size} textos")
+
+    for label, splitter in (
+        (f"caracteres {args.chars}/{args.chars_overlap}", FastRecursiveCharacterTextSplitter(chunk_size=args.chars, chunk_overlap=args.chars_overlap)),
+        (f"tokens {args.tokens}/{args.overlap}", TokenRecursiveCharacterTextSplitter(chunk_size=args.tokens, chunk_overlap=args.overlap)),
+    ):
+        start = time.perf_counter()
+        chunks = splitter.split_documents(pages)
+        report(label, chunks, time.perf_counter() - start, limits)
+
+
+if __name__ == "__main__":
+    main()
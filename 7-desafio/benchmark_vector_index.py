@@ -0,0 +1,121 @@
+# ========================================
+# BENCHMARK - RECALL@K E LATÊNCIA DOS ÍNDICES HNSW / IVFFLAT
+# ========================================
+# Para cada tamanho de coleção, grava vetores sintéticos agrupados
+# (via bulk_writer.py), mede a busca exata (sem índice) e depois cria
+# cada tipo de índice de vector_index.py, variando ef_search / probes.
+# Reporta recall@k em relação à busca exata e latência p50/p99.
+# Usa uma coleção própria, apagada no final.
+#
+# Uso: python benchmark_vector_index.py --sizes 10000 100000 1000000 --dimensions 1536
+# ========================================
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_postgres import PGVector
+from sqlalchemy import create_engine
+
+from bulk_writer import BulkWriter
+from vector_index import collection_info, create_index, drop_index, knn_search
+
+load_dotenv()
+
+COLLECTION = "benchmark_vector_index"
+
+
+def clustered_vectors(rng, count: int, centers: np.ndarray) -> np.ndarray:
+    """Vetores ao redor de centros aleatórios (mais realista que ruído puro)"""
+    labels = rng.integers(0, len(centers), count)
+    noise = rng.standard_normal((count, centers.shape[1]), dtype=np.float32) * 0.3
+    return centers[labels] + noise
+
+
+async def populate(size: int, dimensions: int, centers: np.ndarray, chunk: int = 5000) -> None:
+    """Grava a coleção em blocos para não materializar todos os vetores"""
+    rng = np.random.default_rng(0)
+    async with BulkWriter(COLLECTION, pool_size=4) as writer:
+        for start in range(0, size, chunk):
+            count = min(chunk, size - start)
+            vectors = clustered_vectors(rng, count, centers)
+            ids = [f"v-{start + i}" for i in range(count)]
+            await writer.write([f"doc {i}" for i in ids], vectors.tolist(), None, ids)
+
+
+def measure(engine, info, queries, k, **params):
+    """Executa todas as consultas e devolve (ids por consulta, latências em ms)"""
+    results, latencies = [], []
+    with engine.connect() as conn:
+        for query in queries:
+            start = time.perf_counter()
+            rows = knn_search(conn, info, query, k, **params)
+            latencies.append((time.perf_counter() - start) * 1000)
+            results.append({doc.id for doc, _ in rows})
+    return results, latencies
+
+
+def report(label, results, latencies, truth, k):
+    recall = statistics.mean(len(r & t) / k for r, t in zip(results, truth))
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"  {label:<28} recall@{k}={recall:6.3f}  p50={statistics.median(ordered):7.2f} ms  p99={p99:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[40, 100, 200])
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 10, 30])
+    args = parser.parse_args()
+
+    engine = create_engine(os.getenv("PGVECTOR_URL"))
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((100, args.dimensions), dtype=np.float32)
+    queries = clustered_vectors(rng, args.queries, centers).tolist()
+
+    for size in args.sizes:
+        store = PGVector(
+            embeddings=DeterministicFakeEmbedding(size=args.dimensions),
+            collection_name=COLLECTION,
+            connection=engine,
+            use_jsonb=True,
+            pre_delete_collection=True,
+        )
+        try:
+            print(f"\n📦 {size:,} vetores de {args.dimensions} dimensões")
+            asyncio.run(populate(size, args.dimensions, centers))
+            with engine.connect() as conn:
+                info = collection_info(conn, COLLECTION)
+
+            truth, latencies = measure(engine, info, queries, args.k, exact=True)
+            report("exata (sem índice)", truth, latencies, truth, args.k)
+
+            start = time.perf_counter()
+            create_index(engine, COLLECTION, "hnsw")
+            print(f"  HNSW construído em {time.perf_counter() - start:.1f}s")
+            for ef in args.ef_search:
+                results, latencies = measure(engine, info, queries, args.k, ef_search=ef)
+                report(f"hnsw ef_search={ef}", results, latencies, truth, args.k)
+
+            start = time.perf_counter()
+            create_index(engine, COLLECTION, "ivfflat")
+            print(f"  IVFFlat construído em {time.perf_counter() - start:.1f}s")
+            for probes in args.probes:
+                results, latencies = measure(engine, info, queries, args.k, probes=probes)
+                report(f"ivfflat probes={probes}", results, latencies, truth, args.k)
+        finally:
+            drop_index(engine, COLLECTION)
+            store.delete_collection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# ========================================
+# ESCRITA EM MASSA NO PGVECTOR VIA COPY BINÁRIO (ASYNCPG)
+# ========================================
+# PGVector.add_embeddings grava com INSERT ... ON CONFLICT pelo ORM, linha a
+# linha nos parâmetros. Quando os embeddings já vêm do cache, esse passa a
+# ser o gargalo. BulkWriter usa asyncpg.copy_records_to_table (COPY em
+# formato binário) para uma tabela temporária de staging e, na mesma
+# transação, faz o upsert para langchain_pg_embedding com um único
+# INSERT ... SELECT ... ON CONFLICT.
+# ========================================
+
+import json
+import os
+import uuid
+from typing import Sequence
+
+import asyncpg
+from pgvector.asyncpg import register_vector
+
+STAGING_TABLE = "langchain_pg_embedding_staging"
+COLUMNS = ("id", "collection_id", "embedding", "document", "cmetadata")
+
+
+def asyncpg_dsn(url: str) -> str:
+    """Converte a URL do SQLAlchemy (postgresql+psycopg://) para o asyncpg"""
+    scheme, rest = url.split("://", 1)
+    return f"{scheme.split('+')[0]}://{rest}"
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Codec binário do tipo vector e a tabela de staging da sessão"""
+    await register_vector(conn)
+    # ON COMMIT DELETE ROWS: a tabela é criada uma vez por conexão e
+    # esvaziada automaticamente ao fim de cada transação
+    await conn.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+        "(LIKE langchain_pg_embedding INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    )
+
+
+class BulkWriter:
+    """Grava lotes de embeddings de uma coleção com COPY + upsert"""
+
+    def __init__(self, collection_name: str, url: str | None = None, pool_size: int = 4):
+        self.collection_name = collection_name
+        self.url = url or os.getenv("PGVECTOR_URL")
+        self.pool_size = pool_size
+        self.pool: asyncpg.Pool | None = None
+        self.collection_id: uuid.UUID | None = None
+
+    async def open(self) -> "BulkWriter":
+        """Abre o pool e resolve o uuid da coleção (criada pelo PGVector)"""
+        self.pool = await asyncpg.create_pool(
+            asyncpg_dsn(self.url),
+            min_size=1,
+            max_size=self.pool_size,
+            init=_init_connection,
+        )
+        self.collection_id = await self.pool.fetchval(
+            "SELECT uuid FROM langchain_pg_collection WHERE name = $1", self.collection_name
+        )
+        if self.collection_id is None:
+            raise ValueError(f"Collection {self.collection_name!r} not found")
+        return self
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def __aenter__(self) -> "BulkWriter":
+        return await self.open()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def write(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Sequence[dict] | None,
+        ids: Sequence[str],
+    ) -> int:
+        """Copia um lote para o staging e faz o upsert na tabela final"""
+        if self.pool is None:
+            await self.open()
+        metadatas = metadatas or [{} for _ in texts]
+        records = [
+            (doc_id, self.collection_id, list(vector), text, json.dumps(metadata or {}))
+            for doc_id, vector, text, metadata in zip(ids, embeddings, texts, metadatas)
+        ]
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.copy_records_to_table(STAGING_TABLE, records=records, columns=COLUMNS)
+                await conn.execute(
+                    f"""INSERT INTO langchain_pg_embedding ({", ".join(COLUMNS)})
+                    SELECT {", ".join(COLUMNS)} FROM {STAGING_TABLE}
+                    ON CONFLICT (id) DO UPDATE SET
+                        collection_id = EXCLUDED.collection_id,
+                        embedding = EXCLUDED.embedding,
+                        document = EXCLUDED.document,
+                        cmetadata = EXCLUDED.cmetadata"""
+                )
+        return len(records)
@@ -0,0 +1,87 @@
+# ========================================
+# METADADOS DA COLEÇÃO NO PGVECTOR
+# ========================================
+# A tabela langchain_pg_collection tem uma coluna cmetadata (JSON) por
+# coleção. Ela guarda informações compartilhadas entre os processos de
+# ingestão e de consulta, como a versão da coleção, trocada a cada
+# ingestão que altera os documentos (usada para invalidar caches), e o
+# modo de quantização do índice ANN (quantization.py). Também confere se
+# um índice parcial ainda pertence à coleção atual (partial_index_state).
+# ========================================
+
+import json
+import uuid
+
+from langchain_postgres import PGVector
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+
+def bump_collection_version(store: PGVector) -> str:
+    """Grava uma nova versão nos metadados da coleção após alterá-la"""
+    version = uuid.uuid4().hex
+    # NULLIF: o PGVector grava cmetadata como JSON null quando não há metadados
+    with store.session_maker() as session:
+        session.execute(
+            text(
+                "UPDATE langchain_pg_collection SET cmetadata = "
+                "(COALESCE(NULLIF(cmetadata::jsonb, 'null'::jsonb), '{}'::jsonb) || jsonb_build_object('version', CAST(:version AS text)))::json "
+                "WHERE name = :name"
+            ),
+            {"version": version, "name": store.collection_name},
+        )
+        session.commit()
+    return version
+
+
+def update_collection_metadata(conn: Connection, collection: str, values: dict) -> None:
+    """Mescla values nos metadados da coleção (valores None removem a chave)"""
+    removed = [key for key, value in values.items() if value is None]
+    kept = {key: value for key, value in values.items() if value is not None}
+    conn.execute(
+        text(
+            "UPDATE langchain_pg_collection SET cmetadata = "
+            "((COALESCE(NULLIF(cmetadata::jsonb, 'null'::jsonb), '{}'::jsonb) - CAST(:removed AS text[])) "
+            "|| CAST(:values AS jsonb))::json WHERE name = :name"
+        ),
+        {"removed": removed, "values": json.dumps(kept), "name": collection},
+    )
+
+
+def collection_version(engine: Engine, collection: str) -> str | None:
+    """Versão atual da coleção (muda a cada ingestão que a altera)"""
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT cmetadata::jsonb ->> 'version' FROM langchain_pg_collection WHERE name = :name"),
+            {"name": collection},
+        ).scalar()
+
+
+# ===== ÍNDICES PARCIAIS POR COLEÇÃO =====
+# Os índices full-text, de metadados e ANN são parciais: WHERE collection_id
+# = '<uuid>'. Uma coleção apagada e criada de novo ganha outro uuid, e o
+# índice antigo (mesmo nome) deixa de servir para ela.
+
+def collection_uuid(conn: Connection, collection: str) -> uuid.UUID | None:
+    """uuid atual da coleção, ou None se ela não existe"""
+    return conn.execute(
+        text("SELECT uuid FROM langchain_pg_collection WHERE name = :name"), {"name": collection}
+    ).scalar()
+
+
+def partial_index_state(conn: Connection, name: str, collection_id: uuid.UUID) -> str | None:
+    """None se o índice não existe, "valid" se é válido e da coleção atual, "stale" caso contrário
+
+    "stale": CREATE INDEX CONCURRENTLY interrompido (indisvalid falso) ou
+    predicado com o uuid de uma coleção que já foi apagada.
+    """
+    row = conn.execute(
+        text(
+            "SELECT indisvalid, pg_get_expr(indpred, indrelid) AS predicate "
+            "FROM pg_index WHERE indexrelid = to_regclass(:name)"
+        ),
+        {"name": name},
+    ).first()
+    if row is None:
+        return None
+    return "valid" if row.indisvalid and str(collection_id) in (row.predicate or "") else "stale"
@@ -1,13 +1,28 @@
+import argparse
+import asyncio
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import AsyncIterator, Iterator
 from dotenv import load_dotenv
 
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_postgres import PGVector
-from langchain_core.prompts import ChatPromptTemplate
+
+from collection_metadata import bump_collection_version
+from embedding_dimensions import ensure_projection, record_embedding_spec
+from fast_splitter import splitter_from_env
+from hybrid_search import ensure_fts_index, hybrid_search_by_vector, lexical_fast_path, search_mode
+from ingestion import clean_metadata, ingest_pdf, iter_with_ids
+from metadata_filter import ensure_metadata_indexes
+from numpy_store import vector_store_kind
+from parallel_pdf import load_pdfs
+from quantization import quantization_from_env
+from rerank import rerank_enabled, retrieve, retrieve_from_store
+from retrieval_context import get_context, run_sync
+from vector_index import ensure_quantized_index, similarity_search_by_vector_with_score
 
 load_dotenv()
 
@@ -18,51 +33,88 @@ def main():
     # Processa o PDF e salva na base de dados
     #process_pdf_to_database("Prompt-Engineering-para-Desenvolvedores.pdf")
 
+    # Modo lote: python desafio.py --perguntas arquivo.txt [--concorrencia 8]
+    # Filtro de metadados: python desafio.py --filtro '{"page": {"$gte": 5}}'
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--perguntas", help="arquivo com uma pergunta por linha (modo lote)")
+    parser.add_argument("--concorrencia", type=int, default=int(os.getenv("DESAFIO_MAX_CONCURRENCY", "8")))
+    parser.add_argument("--filtro", type=json.loads, help="filtro JSON nos metadados (formato do PGVector)")
+    args = parser.parse_args()
+
     perguntas = [
         "O que é o Prompt Engineering?",
         "Quais são as técnicas de prompt engineering?",
         "Como fazer few-shot prompting?"
     ]
 
+    # Cria engine, clientes HTTP e chain uma única vez para todas as perguntas
+    get_context()
+
+    if args.perguntas:
+        perguntas = read_questions(args.perguntas)
+        start = time.perf_counter()
+        respostas = answer_batch(perguntas, args.concorrencia, args.filtro)
+        for pergunta, resposta in zip(perguntas, respostas):
+            print(f"\n📝 Pergunta: {pergunta}\n")
+            print(f"🤖 Resposta:\n{resposta}\n")
+            print("-"*50)
+        print(f"⏱️  {len(perguntas)} perguntas em {time.perf_counter() - start:.1f}s")
+        perguntas = []
+
     for pergunta in perguntas:
         print(f"\n📝 Pergunta: {pergunta}\n")
-        resposta = call_model(pergunta)
-        print(f"🤖 Resposta:\n{resposta}\n")
+        # Streaming: cada token é exibido assim que o modelo o produz
+        print("🤖 Resposta:")
+        metrics = AnswerMetrics()
+        for token in stream_model(pergunta, metrics, args.filtro):
+            print(token, end="", flush=True)
+        print(f"\n\n{metrics.summary()}\n")
         print("-"*50)
+
+    # Taxa de acerto do cache de respostas e latência economizada
+    if get_context().answer_cache:
+        print(f"📊 Cache de respostas: {get_context().answer_cache.stats.summary()}")
     
     print("Desafio finalizado!")
 
 def process_pdf_to_database(pdf_name: str):
-    """Processa um PDF e salva na base de dados"""
+    """Processa um PDF e salva na base de dados em streaming"""
     print(f"📚 Processando o PDF: {pdf_name}")
-    
-    # Lê pdf de prompt engineering
-    doc = read_pdf(pdf_name)
-    print(f"✅ PDF carregado: {len(doc)} páginas")
 
-    # Cria chunks
-    chunks = create_chunks(doc)
-    print(f"✅ Chunks criados: {len(chunks)} chunks")
+    # Páginas, chunks e embeddings fluem em micro-lotes: a memória não cresce
+    # com o tamanho do PDF e o primeiro embedding sai logo na primeira página
+    def on_batch(number: int, size: int):
+        print(f"✅ Lote {number} salvo: {size} documentos")
 
-    # Enriquece documents
-    enriched = enrich_chunks(chunks)
-    print(f"✅ Documentos enriquecidos: {len(enriched)} documentos")
-
-    # Salva na base de dados
-    save_to_db(enriched)
+    # Só chunks novos ou alterados são embedados; os que sumiram são apagados
+    report = ingest_pdf(
+        Path(__file__).parent / pdf_name,
+        create_splitter(),
+        get_context().store,
+        on_batch=on_batch,
+    )
+    print(f"Documentos salvos na base de dados: {report.added}")
+    print(f"Documentos inalterados: {report.unchanged} | removidos: {report.deleted}")
 
 # funcao para ler pdf
 def read_pdf(pdf_name: str) -> str:
     """Lê um arquivo pdf com langchain"""
     current_dir = Path(__file__).parent
-    doc = PyPDFLoader(str(current_dir / pdf_name)).load()
+    # Páginas extraídas em paralelo, na mesma ordem do PyPDFLoader
+    doc = load_pdfs([current_dir / pdf_name])
     #print(f"doc:\n{doc}")
     return doc
 
+# funcao para criar o splitter usado na ingestao
+def create_splitter() -> RecursiveCharacterTextSplitter:
+    """Cria o splitter de chunks do desafio"""
+    # 500/100 caracteres ou, com CHUNK_UNIT=tokens, 128/25 tokens do OPENAI_MODEL
+    return splitter_from_env(chunk_size=500, chunk_overlap=100, token_size=128, token_overlap=25)
+
 # funcao para criar os chunks
 def create_chunks(text: str) -> list[str]:
     """Cria chunks para um texto"""
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100, add_start_index=False)
+    splitter = create_splitter()
     chunks = splitter.split_documents(text)
     #for chunk in chunks:
     #  print(f"chunk:\n{chunk.page_content}")
@@ -73,13 +125,7 @@ def create_chunks(text: str) -> list[str]:
 # funcao para enriquecer os chunks
 def enrich_chunks(chunks: list[str]) -> list[str]:
     """Enriquece os chunks com o modelo de embeddings"""
-    enriched = [
-      Document(
-        page_content=d.page_content,
-        metadata={k: v for k, v in d.metadata.items() if v not in ("", None)}
-      )
-      for d in chunks
-    ]
+    enriched = [clean_metadata(d) for d in chunks]
     #for enriched in enriched:
     #  print(f"enriched:\n{enriched.page_content}")
     #  print(f"metadata:\n{enriched.metadata}")
@@ -89,68 +135,272 @@ def enrich_chunks(chunks: list[str]) -> list[str]:
 # funcao para salvar na base de dados
 def save_to_db(enriched: list[str]):
     """Salva embeddings na base de dados"""
-    embeddings = OpenAIEmbeddings(model=os.getenv("OPENAI_MODEL","text-embedding-3-small"))
-    store = PGVector(
-      embeddings=embeddings,  # Modelo para criar embeddings
-      collection_name=os.getenv("PGVECTOR_COLLECTION"),  # Nome da coleção
-      connection=os.getenv("PGVECTOR_URL"),  # URL de conexão com PostgreSQL
-      use_jsonb=True,  # Usa JSONB para metadados (mais eficiente)
-    )
-    ids = [f"doc-{i}" for i in range(len(enriched))]
-    store.add_documents(documents=enriched, ids=ids)
+    if not enriched:
+        print("Nenhum chunk para salvar na base de dados")
+        return
+    store = get_context().store
+    # IDs determinísticos: reenviar o mesmo chunk sobrescreve em vez de duplicar
+    docs, ids = zip(*iter_with_ids(enriched))
+    # EMBEDDING_REDUCTION=pca: a projeção é ajustada numa amostra de todos os chunks
+    ensure_projection(store.embeddings, [doc.page_content for doc in docs])
+    store.add_documents(documents=list(docs), ids=list(ids))
+    # Consultas futuras conferem as dimensões/projeção com as da ingestão
+    record_embedding_spec(store, store.embeddings)
+    # O store em processo (VECTOR_STORE=numpy) troca de versão a cada gravação
+    if vector_store_kind() == "pgvector":
+        bump_collection_version(store)
+        ensure_metadata_indexes(get_context().engine, store.collection_name)
+        if search_mode() == "hybrid":
+            ensure_fts_index(get_context().engine, store.collection_name)
+        if quantization_from_env():
+            ensure_quantized_index(get_context().engine, store.collection_name, quantization_from_env())
     print(f"Documentos salvos na base de dados: {len(enriched)}")
 
-# funcao para chamar modelo com pergunta do usuário
-def call_model(query: str) -> str:
-    """Chama um modelo com uma pergunta do usuário"""
-    # Busca documentos relevantes na base de dados
-    results = search_in_db(query)
+# metricas de latencia de uma resposta
+@dataclass
+class AnswerMetrics:
+    """Tempos de uma resposta: busca, primeiro token e total"""
+    retrieval: float = 0.0
+    ttft: float | None = None  # Tempo até o primeiro token (desde a pergunta)
+    total: float = 0.0
+    tokens: int = 0
+    cached: bool = False
+
+    @property
+    def tokens_per_second(self) -> float:
+        generation = self.total - (self.ttft or self.total)
+        return self.tokens / generation if generation > 0 else 0.0
+
+    def summary(self) -> str:
+        if self.cached:
+            return f"⏱️  busca {self.retrieval*1000:.0f} ms | resposta do cache | total {self.total*1000:.0f} ms"
+        return (
+            f"⏱️  busca {self.retrieval*1000:.0f} ms | TTFT {(self.ttft or 0)*1000:.0f} ms | "
+            f"total {self.total*1000:.0f} ms | {self.tokens} tokens ({self.tokens_per_second:.1f} tokens/s)"
+        )
+
+# funcao para preparar a resposta: busca, contexto e cache
+def prepare_answer(query: str, metadata_filter: dict | None = None) -> tuple[list[float] | None, str, str | None]:
+    """Busca o contexto da pergunta e consulta o cache de respostas"""
+    rag = get_context()
+    cache = rag.answer_cache
+
+    # Busca híbrida: palavras-chave que casam forte no full-text dispensam o embedding
+    query_vector = None
+    results = None
+    if search_mode() == "hybrid":
+        results = lexical_fast_path(rag.engine, os.getenv("PGVECTOR_COLLECTION"), query, k=3, metadata_filter=metadata_filter)
+    if results is None:
+        # Embedding da pergunta calculado uma vez: serve à busca e ao cache semântico
+        query_vector = rag.embeddings.embed_query(query)
+
+        # Busca documentos relevantes na base de dados
+        results = search_in_db(query, query_vector, metadata_filter)
+    else:
+        print(f"\n🔍 Encontrados {len(results)} documentos relevantes (full-text) para: '{query}'\n")
     
     # Constrói o contexto com os documentos encontrados
-    context = "\n\n".join([
+    context = build_prompt_context(results)
+
+    # Com filtro, só a camada exata vale: a mesma pergunta sobre outra fonte tem outra resposta
+    if metadata_filter:
+        query_vector = None
+
+    # Cache de respostas: primeiro a camada exata, depois a semântica
+    cached = None
+    if cache:
+        cached = cache.get_exact(query, context) or cache.get_semantic(query_vector)
+        if cached is None:
+            cache.record_miss()
+    return query_vector, context, cached
+
+# funcao para montar o contexto do prompt
+def build_prompt_context(results: list) -> str:
+    """Junta os documentos encontrados no texto enviado ao modelo"""
+    return "\n\n".join([
         f"Documento {i+1}:\n{doc.page_content}" 
         for i, (doc, score) in enumerate(results)
     ])
-    
-    # Cria o prompt com o contexto e a pergunta
-    prompt_template = ChatPromptTemplate.from_messages([
-        ("system", "Você é um assistente especializado em Prompt Engineering. Use o contexto fornecido para responder a pergunta do usuário. Se a resposta não estiver no contexto, diga que não encontrou a informação nos documentos."),
-        ("user", """Contexto dos documentos:
-{context}
-
-Pergunta: {question}
 
-Responda com base no contexto fornecido.""")
-    ])
-    
-    # Inicializa o modelo
-    llm = ChatOpenAI(
-        model=os.getenv("OPENAI_MODEL_CHAT", "gpt-3.5-turbo"),
-        temperature=0.7
-    )
-    
-    # Cria a chain
-    chain = prompt_template | llm
+# funcao para chamar modelo com pergunta do usuário
+def call_model(query: str, metadata_filter: dict | None = None) -> str:
+    """Chama um modelo com uma pergunta do usuário"""
+    rag = get_context()
+    query_vector, context, cached = prepare_answer(query, metadata_filter)
+    if cached is not None:
+        return cached
     
-    # Executa a chain
-    response = chain.invoke({
+    # Executa a chain (prompt, modelo e chain já compilados no contexto compartilhado)
+    start = time.perf_counter()
+    response = rag.chain.invoke({
         "context": context,
         "question": query
     })
+    if rag.answer_cache:
+        rag.answer_cache.put(query, context, query_vector, response.content, time.perf_counter() - start)
     
     return response.content
 
+# funcao para chamar modelo com streaming de tokens
+def stream_model(
+    query: str,
+    metrics: AnswerMetrics | None = None,
+    metadata_filter: dict | None = None,
+) -> Iterator[str]:
+    """Gera os tokens da resposta conforme o modelo os produz
+
+    Se metrics for passado, é preenchido com busca, TTFT, total e tokens/s.
+    """
+    metrics = metrics if metrics is not None else AnswerMetrics()
+    rag = get_context()
+    start = time.perf_counter()
+    query_vector, context, cached = prepare_answer(query, metadata_filter)
+    metrics.retrieval = time.perf_counter() - start
+
+    if cached is not None:
+        metrics.cached = True
+        metrics.ttft = metrics.total = time.perf_counter() - start
+        yield cached
+        return
+
+    parts = []
+    for chunk in rag.chain.stream({"context": context, "question": query}):
+        if chunk.content:
+            if metrics.ttft is None:
+                metrics.ttft = time.perf_counter() - start
+            parts.append(chunk.content)
+            yield chunk.content
+        # Com stream_usage=True o último chunk traz a contagem real de tokens
+        if chunk.usage_metadata:
+            metrics.tokens = chunk.usage_metadata.get("output_tokens", 0)
+    metrics.total = time.perf_counter() - start
+    metrics.tokens = metrics.tokens or len(parts)
+
+    if rag.answer_cache:
+        rag.answer_cache.put(query, context, query_vector, "".join(parts), metrics.total - metrics.retrieval)
+
+# funcao assincrona para chamar modelo com streaming de tokens
+async def astream_model(
+    query: str,
+    metrics: AnswerMetrics | None = None,
+    metadata_filter: dict | None = None,
+) -> AsyncIterator[str]:
+    """Versão assíncrona de stream_model (para servidores)"""
+    metrics = metrics if metrics is not None else AnswerMetrics()
+    rag = get_context()
+    start = time.perf_counter()
+    # A busca é síncrona: roda numa thread para não travar o loop
+    query_vector, context, cached = await asyncio.to_thread(prepare_answer, query, metadata_filter)
+    metrics.retrieval = time.perf_counter() - start
+
+    if cached is not None:
+        metrics.cached = True
+        metrics.ttft = metrics.total = time.perf_counter() - start
+        yield cached
+        return
+
+    parts = []
+    async for chunk in rag.chain.astream({"context": context, "question": query}):
+        if chunk.content:
+            if metrics.ttft is None:
+                metrics.ttft = time.perf_counter() - start
+            parts.append(chunk.content)
+            yield chunk.content
+        if chunk.usage_metadata:
+            metrics.tokens = chunk.usage_metadata.get("output_tokens", 0)
+    metrics.total = time.perf_counter() - start
+    metrics.tokens = metrics.tokens or len(parts)
+
+    if rag.answer_cache:
+        rag.answer_cache.put(query, context, query_vector, "".join(parts), metrics.total - metrics.retrieval)
+
+# funcao para ler um arquivo de perguntas
+def read_questions(path: str) -> list[str]:
+    """Lê uma pergunta por linha, ignorando linhas vazias"""
+    with open(path, encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip()]
+
+# funcao para responder varias perguntas de uma vez
+def answer_batch(questions: list[str], max_concurrency: int = 8, metadata_filter: dict | None = None) -> list[str]:
+    """Responde uma lista de perguntas, na mesma ordem da entrada
+
+    Os embeddings saem numa única chamada, as buscas dividem o pool de
+    conexões da engine e as respostas são geradas com chain.abatch com no
+    máximo max_concurrency chamadas ao modelo em voo.
+    """
+    rag = get_context()
+    cache = rag.answer_cache
+    collection = os.getenv("PGVECTOR_COLLECTION")
+    hybrid = search_mode() == "hybrid"
+
+    # Buscas em paralelo, limitadas ao tamanho do pool de conexões
+    workers = max(1, min(max_concurrency, rag.engine.pool.size() if rag.engine else max_concurrency))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Atalho léxico (modo híbrido): essas perguntas não precisam de embedding
+        results = list(executor.map(
+            lambda question: lexical_fast_path(rag.engine, collection, question, k=3, metadata_filter=metadata_filter)
+            if hybrid else None,
+            questions,
+        ))
+        missing = [i for i, r in enumerate(results) if r is None]
+
+        # Uma chamada de embeddings para todas as demais perguntas
+        query_vectors: list[list[float] | None] = [None] * len(questions)
+        if missing:
+            for i, vector in zip(missing, rag.embeddings.embed_documents([questions[i] for i in missing])):
+                query_vectors[i] = vector
+        searches = executor.map(lambda i: search_by_vector(questions[i], query_vectors[i], metadata_filter), missing)
+        for i, r in zip(missing, searches):
+            results[i] = r
+        contexts = [build_prompt_context(r) for r in results]
+    # Com filtro, só a camada exata do cache vale (mesma regra de prepare_answer)
+    cache_vectors = [None] * len(questions) if metadata_filter else query_vectors
+
+    # Cache de respostas: só as perguntas sem resposta guardada vão ao modelo
+    answers: list[str | None] = [None] * len(questions)
+    if cache:
+        for i, (question, context, vector) in enumerate(zip(questions, contexts, cache_vectors)):
+            answers[i] = cache.get_exact(question, context) or cache.get_semantic(vector)
+            if answers[i] is None:
+                cache.record_miss()
+    pending = [i for i, answer in enumerate(answers) if answer is None]
+
+    # abatch devolve as respostas na ordem das entradas
+    start = time.perf_counter()
+    responses = run_sync(rag.chain.abatch(
+        [{"context": contexts[i], "question": questions[i]} for i in pending],
+        config={"max_concurrency": max_concurrency},
+    ))
+    # Latência média por resposta: aproximação do que cada acerto economiza
+    latency = (time.perf_counter() - start) * min(max_concurrency, len(pending)) / max(1, len(pending))
+    for i, response in zip(pending, responses):
+        answers[i] = response.content
+        if cache:
+            cache.put(questions[i], contexts[i], cache_vectors[i], response.content, latency)
+    return answers
+
 # funcao para buscar na base de dados
-def search_in_db(query: str) -> list[float]:
-    """Busca por um texto na base de dados"""
-    embeddings = OpenAIEmbeddings(model=os.getenv("OPENAI_MODEL","text-embedding-3-small"))
-    store = PGVector(
-      embeddings=embeddings,  # Modelo para criar embeddings
-      collection_name=os.getenv("PGVECTOR_COLLECTION"),  # Nome da coleção
-      connection=os.getenv("PGVECTOR_URL"),  # URL de conexão com PostgreSQL
-      use_jsonb=True,  # Usa JSONB para metadados (mais eficiente)
-    )
-    results = store.similarity_search_with_score(query, k=3)
+def search_in_db(
+    query: str,
+    query_vector: list[float] | None = None,
+    metadata_filter: dict | None = None,
+) -> list[float]:
+    """Busca por um texto na base de dados
+
+    metadata_filter restringe a busca pelos metadados dos chunks, no formato
+    do PGVector (ex.: {"source": "arquivo.pdf", "page": {"$lte": 10}}).
+    """
+    context = get_context()
+    results = None
+    if query_vector is None and search_mode() == "hybrid":
+        # Sem vetor: tenta o atalho léxico antes de calcular o embedding
+        results = lexical_fast_path(
+            context.engine, os.getenv("PGVECTOR_COLLECTION"), query, k=3, metadata_filter=metadata_filter
+        )
+    if results is None:
+        if query_vector is None:
+            query_vector = context.embeddings.embed_query(query)
+        results = search_by_vector(query, query_vector, metadata_filter)
 
     print(f"\n🔍 Encontrados {len(results)} documentos relevantes para: '{query}'\n")
     
@@ -171,4 +421,27 @@ def search_in_db(query: str) -> list[float]:
 
     return results
 
-main()
\ No newline at end of file
+# funcao para buscar a partir do embedding ja calculado
+def search_by_vector(query: str, query_vector: list[float], metadata_filter: dict | None = None) -> list:
+    """Busca híbrida (full-text + vetorial, RRF) ou só vetorial, conforme SEARCH_MODE"""
+    engine = get_context().engine
+    collection = os.getenv("PGVECTOR_COLLECTION")
+    if engine is None:
+        # VECTOR_STORE=numpy: busca exata na matriz em memória, com o mesmo filtro e reranking
+        store = get_context().store
+        if rerank_enabled():
+            return retrieve_from_store(store, query_vector, metadata_filter=metadata_filter)
+        return store.similarity_search_with_score_by_vector(query_vector, k=3, filter=metadata_filter)
+    # O filtro de metadados vira SQL e usa os índices criados na ingestão (metadata_filter.py)
+    if rerank_enabled():
+        # 50 candidatos com os vetores gravados, MMR em NumPy e contexto até o orçamento de tokens
+        return retrieve(
+            engine, collection, query, query_vector, hybrid=search_mode() == "hybrid", metadata_filter=metadata_filter
+        )
+    if search_mode() == "hybrid":
+        return hybrid_search_by_vector(engine, collection, query, query_vector, k=3, metadata_filter=metadata_filter)
+    # Busca com a mesma expressão do índice ANN (vector_index.py), se existir
+    return similarity_search_by_vector_with_score(engine, collection, query_vector, k=3, metadata_filter=metadata_filter)
+
+if __name__ == "__main__":
+    main()
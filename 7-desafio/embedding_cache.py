@@ -0,0 +1,217 @@
+# ========================================
+# CACHE PERSISTENTE DE EMBEDDINGS EM DISCO (SQLITE)
+# ========================================
+# CachedEmbeddings embrulha qualquer Embeddings (ex.: OpenAIEmbeddings) e
+# guarda cada vetor num arquivo SQLite, como BLOB float32 compacto, com a
+# chave (nome do modelo, hash do texto). embed_documents e embed_query
+# passam pelo cache: chunks repetidos e perguntas frequentes não vão à rede.
+# O tamanho é limitado por max_entries com remoção LRU (menos usados): o
+# total de linhas é mantido em memória e a remoção só roda ao passar do
+# limite, liberando 10% do espaço de uma vez.
+# ========================================
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / ".cache" / "embeddings.sqlite"
+# Limite de parâmetros por consulta IN (...) do SQLite
+_SQLITE_BATCH = 500
+# Fração do limite liberada por remoção LRU (evita remover a cada gravação)
+_EVICTION_FRACTION = 0.1
+
+
+@dataclass
+class CacheStats:
+    """Contadores de acertos e falhas do cache"""
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def model_key(embeddings: Embeddings) -> str:
+    """Identifica o modelo (e dimensões, se houver) para compor a chave"""
+    name = getattr(embeddings, "model", None) or type(embeddings).__name__
+    dimensions = getattr(embeddings, "dimensions", None)
+    return f"{name}:{dimensions}" if dimensions else name
+
+
+def text_hash(text: str) -> str:
+    """Hash SHA-256 do texto a ser embedado"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def evict_lru(conn: sqlite3.Connection, table: str, max_entries: int) -> int:
+    """Recontagem e remoção LRU em lote de uma tabela com last_used; retorna o novo total
+
+    Só é chamada quando a contagem em memória passa do limite: a recontagem
+    também inclui as linhas gravadas por outros processos no mesmo arquivo.
+    """
+    (count,) = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+    if count > max_entries:
+        target = max_entries - int(max_entries * _EVICTION_FRACTION)
+        conn.execute(
+            f"DELETE FROM {table} WHERE rowid IN "
+            f"(SELECT rowid FROM {table} ORDER BY last_used LIMIT ?)",
+            (count - target,),
+        )
+        count = target
+    return count
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings com cache persistente LRU em SQLite"""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        path: Path | str = DEFAULT_CACHE_PATH,
+        max_entries: int = 1_000_000,
+    ):
+        self.embeddings = embeddings
+        self.model = model_key(embeddings)
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # check_same_thread=False: a ingestão chama o cache de várias threads
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, key)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        # Contado uma vez na abertura; depois acompanhado a cada gravação
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    # ===== LEITURA E ESCRITA NO SQLITE =====
+
+    def _lookup(self, keys: list[str]) -> dict[str, list[float]]:
+        """Busca os vetores já cacheados e marca-os como usados agora"""
+        found: dict[str, list[float]] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), _SQLITE_BATCH):
+                batch = keys[start:start + _SQLITE_BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({marks})",
+                    [self.model, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+                self._conn.execute(
+                    f"UPDATE embeddings SET last_used = ? WHERE model = ? AND key IN ({marks})",
+                    [now, self.model, *batch],
+                )
+            self._conn.commit()
+        return found
+
+    def _store(self, items: dict[str, list[float]]) -> None:
+        """Grava novos vetores e aplica a remoção LRU se passar do limite"""
+        now = time.time()
+        rows = [
+            (self.model, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            # OR IGNORE: só linhas novas entram na contagem (o vetor de um texto não muda)
+            changes = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._count += self._conn.total_changes - changes
+            if self._count > self.max_entries:
+                self._count = evict_lru(self._conn, "embeddings", self.max_entries)
+            self._conn.commit()
+
+    # ===== INTERFACE EMBEDDINGS =====
+
+    def _partition(self, texts: list[str]) -> tuple[list[str], dict[str, list[float]], dict[str, str]]:
+        """Separa os textos em acertos do cache e textos ainda não embedados"""
+        keys = [text_hash(t) for t in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        return keys, found, self._missing(keys, texts, found)
+
+    def _missing(self, keys: list[str], texts: list[str], found: dict[str, list[float]]) -> dict[str, str]:
+        """Conta acertos e faltas e devolve os textos ausentes (um por chave)"""
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in found:
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+                missing.setdefault(key, text)
+        return missing
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embeda só os textos ausentes do cache (e cada texto repetido uma vez)"""
+        keys, found, missing = self._partition(texts)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._store(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Versão assíncrona: só os textos ausentes vão para a API
+
+        As leituras e gravações no SQLite rodam numa thread, para não travar
+        o loop de eventos (e os outros lotes da ingestão concorrente).
+        """
+        keys = [text_hash(t) for t in texts]
+        found = await asyncio.to_thread(self._lookup, list(dict.fromkeys(keys)))
+        missing = self._missing(keys, texts, found)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            await asyncio.to_thread(self._store, computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embeda uma pergunta consultando o cache antes da rede"""
+        key = text_hash(text)
+        found = self._lookup([key])
+        if key in found:
+            self.stats.hits += 1
+            return found[key]
+        self.stats.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._store({key: vector})
+        return vector
+
+    def close(self) -> None:
+        """Fecha a conexão com o arquivo do cache"""
+        with self._lock:
+            self._conn.close()
+
+
+def with_cache(embeddings: Embeddings) -> Embeddings:
+    """Embrulha no cache, a menos que EMBEDDING_CACHE=off"""
+    if os.getenv("EMBEDDING_CACHE", "on").lower() in ("off", "0", "false"):
+        return embeddings
+    return CachedEmbeddings(
+        embeddings,
+        path=os.getenv("EMBEDDING_CACHE_PATH", str(DEFAULT_CACHE_PATH)),
+        max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "1000000")),
+    )
@@ -0,0 +1,277 @@
+# ========================================
+# EMBEDDINGS COM DIMENSÃO REDUZIDA (NATIVA OU PCA)
+# ========================================
+# Vetores menores ocupam menos disco, deixam o índice HNSW menor e o kNN
+# mais rápido, ao custo de algum recall (meça com
+# benchmark_embedding_dimensions.py). EMBEDDING_DIMENSIONS=N liga o modo:
+# - EMBEDDING_REDUCTION=native (padrão): o próprio modelo devolve N
+#   dimensões (parâmetro dimensions dos modelos text-embedding-3-*)
+# - EMBEDDING_REDUCTION=pca: o modelo devolve o vetor completo (que é o
+#   que vai para o cache de embeddings) e uma projeção PCA ajustada
+#   localmente reduz para N em NumPy. A projeção é ajustada por fit() numa
+#   amostra explícita de até EMBEDDING_PCA_FIT_SAMPLE chunks (a ingestão
+#   usa os primeiros chunks da fonte, antes de embedar qualquer lote),
+#   exige pelo menos EMBEDDING_PCA_MIN_FIT_SAMPLE textos e é salva em
+#   EMBEDDING_PCA_DIR/<coleção>-<N>.npz
+#
+# Ingestão e consulta precisam usar a MESMA configuração: vetores de
+# tamanhos ou projeções diferentes na mesma coleção dão resultados sem
+# sentido (ou erro do pgvector). Por isso a configuração (modelo,
+# redução, dimensões e impressão digital da projeção) fica gravada nos
+# metadados da coleção na ingestão, e qualquer divergência é um erro.
+# ========================================
+
+import hashlib
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from sqlalchemy import text
+
+from collection_metadata import update_collection_metadata
+from embedding_cache import with_cache
+from numpy_store import NumpyVectorStore
+from providers import create_embedding_model
+
+REDUCTIONS = ("native", "pca")
+DEFAULT_PCA_DIR = Path(__file__).parent / ".cache" / "pca"
+
+
+@dataclass(frozen=True)
+class EmbeddingSpec:
+    """Configuração de embeddings gravada nos metadados da coleção"""
+    model: str
+    reduction: str | None = None  # None = dimensões completas do modelo
+    dimensions: int | None = None
+    projection: str | None = None  # impressão digital da projeção PCA
+
+
+def reduction_from_env() -> tuple[int | None, str | None]:
+    """(dimensões, redução) de EMBEDDING_DIMENSIONS / EMBEDDING_REDUCTION"""
+    dimensions = int(os.getenv("EMBEDDING_DIMENSIONS") or 0) or None
+    if dimensions is None:
+        return None, None
+    reduction = os.getenv("EMBEDDING_REDUCTION", "native").lower()
+    if reduction not in REDUCTIONS:
+        raise ValueError(f"EMBEDDING_REDUCTION must be one of {REDUCTIONS}")
+    return dimensions, reduction
+
+
+# ===== PROJEÇÃO PCA =====
+
+class PCAProjection:
+    """Média e componentes principais: x -> (x - média) @ componentes"""
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray):
+        self.mean = mean.astype(np.float32)
+        self.components = components.astype(np.float32)  # (dimensões originais, N)
+        self.fingerprint = hashlib.sha256(self.mean.tobytes() + self.components.tobytes()).hexdigest()[:16]
+
+    @property
+    def dimensions(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, vectors, dimensions: int) -> "PCAProjection":
+        """Ajusta as N direções de maior variância de uma amostra de vetores"""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if len(matrix) < dimensions:
+            raise ValueError(
+                f"PCA needs at least {dimensions} vectors to fit {dimensions} dimensions (got {len(matrix)}); "
+                "lower EMBEDDING_DIMENSIONS or use EMBEDDING_REDUCTION=native"
+            )
+        mean = matrix.mean(axis=0)
+        # SVD da amostra centralizada: as linhas de vt são as direções principais
+        _, _, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+        return cls(mean, vt[:dimensions].T)
+
+    def apply(self, vectors) -> np.ndarray:
+        return (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp.npz")
+        np.savez(temporary, mean=self.mean, components=self.components)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "PCAProjection | None":
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return cls(data["mean"], data["components"])
+
+
+class PCAEmbeddings(Embeddings):
+    """Embeddings completos (com cache) projetados para N dimensões
+
+    Sem projeção salva, embedar é um erro: ela é ajustada por fit() numa
+    amostra explícita (a ingestão chama ensure_projection antes do 1º lote).
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        dimensions: int,
+        path: Path | str,
+        fit_sample: int | None = None,
+        min_fit_sample: int | None = None,
+    ):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.dimensions = dimensions
+        self.path = Path(path)
+        # Textos usados no ajuste (no máximo) e mínimo aceito (padrão: 2x as dimensões)
+        self.fit_sample = fit_sample or int(os.getenv("EMBEDDING_PCA_FIT_SAMPLE", "2000"))
+        self.min_fit_sample = min_fit_sample or int(os.getenv("EMBEDDING_PCA_MIN_FIT_SAMPLE", "0")) or 2 * dimensions
+        self._lock = threading.Lock()
+        self.projection = PCAProjection.load(self.path)
+        if self.projection is not None and self.projection.dimensions != dimensions:
+            raise ValueError(f"PCA projection at {self.path} has {self.projection.dimensions} dimensions, expected {dimensions}")
+
+    def fit(self, texts: Sequence[str]) -> PCAProjection:
+        """Ajusta e salva a projeção com até fit_sample textos, espaçados ao longo de texts
+
+        Os vetores completos da amostra passam pelo cache de embeddings:
+        embedá-los de novo na ingestão não chama a API outra vez.
+        """
+        texts = list(texts)
+        if len(texts) > self.fit_sample:
+            step = len(texts) / self.fit_sample
+            texts = [texts[int(i * step)] for i in range(self.fit_sample)]
+        if len(texts) < self.min_fit_sample:
+            raise ValueError(
+                f"PCA projection needs a sample of at least {self.min_fit_sample} texts (got {len(texts)}); "
+                "ingest a larger source first, lower EMBEDDING_PCA_MIN_FIT_SAMPLE or use EMBEDDING_REDUCTION=native"
+            )
+        with self._lock:
+            projection = PCAProjection.fit(self.embeddings.embed_documents(texts), self.dimensions)
+            projection.save(self.path)
+            self.projection = projection
+        return projection
+
+    def _project(self, vectors: list[list[float]]) -> list[list[float]]:
+        if self.projection is None:
+            raise RuntimeError(
+                f"No PCA projection at {self.path}: ingest the collection with EMBEDDING_REDUCTION=pca "
+                "(or call fit() on a sample) first"
+            )
+        return self.projection.apply(vectors).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._project(self.embeddings.embed_documents(texts))
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._project(await self.embeddings.aembed_documents(texts))
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._project([self.embeddings.embed_query(text)])[0]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return self._project([await self.embeddings.aembed_query(text)])[0]
+
+
+def ensure_projection(embeddings: Embeddings, texts: Sequence[str]) -> None:
+    """Ajusta a projeção PCA com uma amostra de texts, se ainda não houver uma (ingestão)"""
+    if isinstance(embeddings, PCAEmbeddings) and embeddings.projection is None:
+        embeddings.fit(texts)
+
+
+# ===== CONSTRUÇÃO A PARTIR DO AMBIENTE =====
+
+def pca_path(collection: str, dimensions: int) -> Path:
+    return Path(os.getenv("EMBEDDING_PCA_DIR", str(DEFAULT_PCA_DIR))) / f"{collection}-{dimensions}.npz"
+
+
+def create_embeddings(collection: str, **client_kwargs: Any) -> Embeddings:
+    """Embeddings do MODEL_PROVIDER com cache, reduzidos conforme EMBEDDING_DIMENSIONS / EMBEDDING_REDUCTION
+
+    client_kwargs (http_client, http_async_client) vão para o OpenAIEmbeddings.
+    """
+    dimensions, reduction = reduction_from_env()
+    model = os.getenv("OPENAI_MODEL", "text-embedding-3-small")
+    if reduction == "native":
+        return with_cache(create_embedding_model(model, dimensions=dimensions, **client_kwargs))
+    embeddings = with_cache(create_embedding_model(model, **client_kwargs))
+    if reduction == "pca":
+        return PCAEmbeddings(embeddings, dimensions, pca_path(collection, dimensions))
+    return embeddings
+
+
+def embedding_spec(embeddings: Embeddings) -> EmbeddingSpec:
+    """Configuração efetiva de um objeto de embeddings"""
+    if isinstance(embeddings, PCAEmbeddings):
+        projection = embeddings.projection.fingerprint if embeddings.projection else None
+        return EmbeddingSpec(embeddings.model, "pca", embeddings.dimensions, projection)
+    # O CachedEmbeddings guarda o modelo embrulhado em .embeddings
+    inner = getattr(embeddings, "embeddings", embeddings)
+    model = getattr(inner, "model", None) or type(inner).__name__
+    dimensions = getattr(inner, "dimensions", None)
+    return EmbeddingSpec(model, "native" if dimensions else None, dimensions)
+
+
+# ===== METADADOS DA COLEÇÃO =====
+
+def _stored_vectors_dimensions(store: VectorStore) -> int | None:
+    """Dimensão dos vetores já gravados (coleções ingeridas antes deste módulo)"""
+    if isinstance(store, NumpyVectorStore):
+        return store.dimensions if len(store) else None
+    with store.session_maker() as session:
+        return session.execute(
+            text(
+                "SELECT vector_dims(e.embedding) FROM langchain_pg_embedding e "
+                "JOIN langchain_pg_collection c ON c.uuid = e.collection_id WHERE c.name = :name LIMIT 1"
+            ),
+            {"name": store.collection_name},
+        ).scalar()
+
+
+def collection_spec(store: VectorStore) -> EmbeddingSpec | None:
+    """Configuração gravada na coleção (None se nunca foi gravada)"""
+    if isinstance(store, NumpyVectorStore):
+        stored = store.metadata.get("embedding")
+    else:
+        with store.session_maker() as session:
+            stored = session.execute(
+                text("SELECT cmetadata::jsonb -> 'embedding' FROM langchain_pg_collection WHERE name = :name"),
+                {"name": store.collection_name},
+            ).scalar()
+    return EmbeddingSpec(**stored) if stored else None
+
+
+def check_embedding_spec(store: VectorStore, embeddings: Embeddings) -> None:
+    """Erro se a configuração atual não é a mesma com que a coleção foi ingerida"""
+    current = embedding_spec(embeddings)
+    stored = collection_spec(store)
+    if stored is None:
+        # Coleção antiga sem a configuração gravada: só dá para conferir a dimensão
+        dimensions = _stored_vectors_dimensions(store)
+        if dimensions is not None and current.dimensions not in (None, dimensions):
+            raise RuntimeError(
+                f"Collection {store.collection_name!r} stores {dimensions}-dimensional vectors, "
+                f"but EMBEDDING_DIMENSIONS={current.dimensions}"
+            )
+        return
+    same = (stored.model, stored.reduction, stored.dimensions) == (current.model, current.reduction, current.dimensions)
+    # Projeção ainda não ajustada na ingestão: o ajuste criaria outra, diferente da gravada
+    if not same or (stored.projection and stored.projection != current.projection):
+        raise RuntimeError(
+            f"Embedding configuration mismatch for collection {store.collection_name!r}: "
+            f"ingested with {asdict(stored)}, current is {asdict(current)}"
+        )
+
+
+def record_embedding_spec(store: VectorStore, embeddings: Embeddings) -> None:
+    """Grava a configuração atual nos metadados da coleção (após gravar vetores)"""
+    spec = asdict(embedding_spec(embeddings))
+    if isinstance(store, NumpyVectorStore):
+        store.update_metadata({"embedding": spec})
+        return
+    with store.session_maker() as session:
+        update_collection_metadata(session.connection(), store.collection_name, {"embedding": spec})
+        session.commit()
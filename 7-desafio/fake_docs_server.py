@@ -0,0 +1,129 @@
+# ========================================
+# SERVIDOR LOCAL DE PÁGINAS DE DOCUMENTAÇÃO (FIXTURE DO CRAWLER)
+# ========================================
+# Servidor aiohttp que gera N páginas HTML sintéticas em /docs/{n}, com
+# ETag e Last-Modified, respondendo 304 a GETs condicionais de páginas
+# inalteradas. Latência configurável e contagem de requisições simultâneas
+# por host (cabeçalho Host), para verificar os limites do web_crawler.py.
+# Atende em 127.0.0.1 e também como "localhost" (dois hosts distintos).
+#
+# Uso direto: python fake_docs_server.py [porta] [páginas]
+# ========================================
+
+import asyncio
+import hashlib
+import sys
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from email.utils import formatdate
+
+from aiohttp import web
+
+PARAGRAPH = (
+    "Prompt engineering é a prática de escrever instruções claras e específicas para modelos de linguagem. "
+    "Exemplos (few-shot), papéis e formatos de saída bem definidos reduzem ambiguidades. "
+)
+
+
+@dataclass
+class FakeDocsStats:
+    """Contadores das requisições recebidas"""
+    requests: int = 0
+    not_modified: int = 0
+    in_flight: Counter = field(default_factory=Counter)
+    max_in_flight: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class FakeDocsServer:
+    """Servidor em thread própria; use como context manager"""
+    pages: int = 1000
+    latency: float = 0.05
+    paragraphs: int = 20
+    host: str = "127.0.0.1"
+    port: int = 0
+    stats: FakeDocsStats = field(default_factory=FakeDocsStats)
+    versions: dict[int, int] = field(default_factory=dict)  # Página -> versão (editada com touch)
+
+    def urls(self, hosts: tuple[str, ...] = ("127.0.0.1", "localhost")) -> list[str]:
+        """URLs de todas as páginas, alternando entre os hosts"""
+        return [f"http://{hosts[n % len(hosts)]}:{self.port}/docs/{n}" for n in range(self.pages)]
+
+    def touch(self, page: int) -> None:
+        """Simula a edição de uma página (muda ETag e conteúdo)"""
+        self.versions[page] = self.versions.get(page, 0) + 1
+
+    def render(self, page: int) -> tuple[str, str, str]:
+        """HTML, ETag e Last-Modified da versão atual da página"""
+        version = self.versions.get(page, 0)
+        etag = '"' + hashlib.sha1(f"{page}:{version}".encode()).hexdigest()[:16] + '"'
+        last_modified = formatdate(1_700_000_000 + version * 3600, usegmt=True)
+        body = "\n".join(f"<p>Página {page}, versão {version}, parágrafo {i}. {PARAGRAPH}</p>" for i in range(self.paragraphs))
+        html = (
+            f'<html lang="pt-BR"><head><title>Documentação {page}</title>'
+            f'<meta name="description" content="Página {page} da documentação interna"></head>'
+            f"<body><h1>Documentação {page}</h1>{body}</body></html>"
+        )
+        return html, etag, last_modified
+
+    async def handle_page(self, request: web.Request) -> web.Response:
+        page = int(request.match_info["page"])
+        if page >= self.pages:
+            raise web.HTTPNotFound()
+        host = request.host
+        self.stats.requests += 1
+        self.stats.in_flight[host] += 1
+        self.stats.max_in_flight[host] = max(self.stats.max_in_flight[host], self.stats.in_flight[host])
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.stats.in_flight[host] -= 1
+
+        html, etag, last_modified = self.render(page)
+        headers = {"ETag": etag, "Last-Modified": last_modified}
+        if request.headers.get("If-None-Match") == etag:
+            self.stats.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=html, content_type="text/html", headers=headers)
+
+    def _serve(self, started: threading.Event) -> None:
+        self._loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_get("/docs/{page}", self.handle_page)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        started.set()
+        self._loop.run_forever()
+
+    def start(self) -> "FakeDocsServer":
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(started,), daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self) -> "FakeDocsServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8788
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    with FakeDocsServer(pages=pages, port=port) as server:
+        print(f"Servidor de documentação em http://{server.host}:{server.port}/docs/0 .. {pages - 1} (Ctrl+C para sair)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
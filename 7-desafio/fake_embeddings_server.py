@@ -0,0 +1,140 @@
+# ========================================
+# SERVIDOR FALSO DE EMBEDDINGS (COMPATÍVEL COM A API DA OPENAI)
+# ========================================
+# Servidor aiohttp local que responde POST /v1/embeddings como a OpenAI,
+# com vetores determinísticos (hash do texto), latência configurável e
+# erros 429 injetados. Serve para medir a ingestão sem rede e sem custo:
+#   OpenAIEmbeddings(base_url=server.base_url, api_key="fake", ...)
+#
+# Uso direto: python fake_embeddings_server.py [porta]
+# ========================================
+
+import asyncio
+import base64
+import hashlib
+import random
+import sys
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+from aiohttp import web
+
+
+@dataclass
+class FakeServerConfig:
+    """Comportamento simulado do servidor"""
+    dimensions: int = 1536
+    latency: float = 0.05  # Segundos fixos por requisição
+    latency_per_1k_tokens: float = 0.01  # Segundos adicionais a cada 1000 tokens
+    rate_limit_probability: float = 0.0  # Chance de responder 429
+    retry_after: float = 0.5  # Valor do cabeçalho Retry-After no 429
+
+
+@dataclass
+class FakeServerStats:
+    """Contadores das requisições recebidas"""
+    requests: int = 0
+    inputs: int = 0
+    rate_limited: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+
+def fake_vector(text: str, dimensions: int) -> np.ndarray:
+    """Vetor unitário determinístico derivado do hash do texto"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@dataclass
+class FakeEmbeddingsServer:
+    """Servidor em thread própria; use como context manager"""
+    config: FakeServerConfig = field(default_factory=FakeServerConfig)
+    host: str = "127.0.0.1"
+    port: int = 0
+    stats: FakeServerStats = field(default_factory=FakeServerStats)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def handle_embeddings(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        inputs = payload["input"]
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        texts = [t if isinstance(t, str) else " ".join(map(str, t)) for t in inputs]
+        tokens = sum(max(1, len(t) // 4) for t in texts)
+
+        self.stats.requests += 1
+        if random.random() < self.config.rate_limit_probability:
+            self.stats.rate_limited += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429,
+                headers={"retry-after": str(self.config.retry_after)},
+            )
+
+        self.stats.in_flight += 1
+        self.stats.max_in_flight = max(self.stats.max_in_flight, self.stats.in_flight)
+        try:
+            await asyncio.sleep(self.config.latency + self.config.latency_per_1k_tokens * tokens / 1000)
+        finally:
+            self.stats.in_flight -= 1
+        self.stats.inputs += len(texts)
+
+        dimensions = payload.get("dimensions") or self.config.dimensions
+        as_base64 = payload.get("encoding_format") == "base64"
+        data = []
+        for index, text in enumerate(texts):
+            vector = fake_vector(text, dimensions)
+            embedding = base64.b64encode(vector.tobytes()).decode() if as_base64 else vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        return web.json_response({
+            "object": "list",
+            "data": data,
+            "model": payload.get("model", "fake"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def _serve(self, started: threading.Event) -> None:
+        self._loop = asyncio.new_event_loop()
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1/embeddings", self.handle_embeddings)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        started.set()
+        self._loop.run_forever()
+
+    def start(self) -> "FakeEmbeddingsServer":
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(started,), daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self) -> "FakeEmbeddingsServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8787
+    with FakeEmbeddingsServer(port=port) as server:
+        print(f"Servidor falso de embeddings em {server.base_url} (Ctrl+C para sair)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
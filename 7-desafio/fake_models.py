@@ -0,0 +1,469 @@
+# ========================================
+# MODELOS FALSOS (CHAT E EMBEDDINGS) - TESTES DE CARGA SEM REDE
+# ========================================
+# FakeChatModel e FakeEmbeddings substituem ChatOpenAI e OpenAIEmbeddings
+# quando MODEL_PROVIDER=fake (providers.py). Nenhuma requisição é feita:
+# cada chamada espera o tempo que a API levaria e devolve um resultado
+# determinístico, então as chains, os agentes, a memória e o RAG do
+# desafio podem ser medidos no notebook, sem custo:
+# - latência sorteada de uma distribuição (fixed, uniform, exponential ou
+#   lognormal) em torno da mediana configurada
+# - chat: tempo até o primeiro token (+ leitura do prompt) e depois
+#   tokens/s de geração, com streaming token a token e a contagem de
+#   tokens no último chunk (usage_metadata), como o ChatOpenAI
+# - erros 429 e 500 injetados com a probabilidade configurada; como o
+#   cliente da OpenAI, o modelo tenta de novo até max_retries vezes
+#   (esperando o Retry-After) antes de levantar o erro do pacote openai
+# - embeddings: vetor unitário derivado do hash do texto, com as
+#   dimensões do modelo (ou as pedidas em dimensions)
+# - agentes: num prompt no formato ReAct (create_react_agent, prompt
+#   "hwchase17/react" do hub) a resposta é um passo válido: uma Action com
+#   uma das ferramentas listadas e, depois da Observation, a Final Answer.
+#   As sequências de parada (stop) cortam a resposta, como na API
+#
+# Os sorteios vêm do hash de (FAKE_SEED, entrada, tentativa), não da ordem
+# das chamadas nem de um histórico: a mesma carga dá as mesmas latências,
+# erros e respostas com qualquer concorrência, e um teste de carga longo
+# não acumula estado (a mesma entrada repetida repete os mesmos sorteios).
+# ========================================
+
+import asyncio
+import hashlib
+import math
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator
+
+import httpx
+import openai
+from dotenv import load_dotenv
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, get_buffer_string
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, Field, PrivateAttr, field_validator
+
+from fake_embeddings_server import fake_vector
+from tokenizer import estimate_tokens
+
+load_dotenv()
+
+DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+# Prefixo dos nomes de modelo: os caches (embeddings, resumos) não misturam
+# resultados falsos com os reais, e a coleção registra que foi ingerida com eles
+FAKE_PREFIX = "fake-"
+FAKE_BASE_URL = "http://fake-provider.local/v1"
+# Prompt no formato ReAct e a lista de ferramentas em "should be one of [...]"
+REACT_MARKERS = ("Action Input:", "Final Answer:")
+REACT_TOOLS = re.compile(r"should be one of \[([^\]]*)\]")
+
+
+@dataclass
+class FakeModelConfig:
+    """Comportamento simulado dos modelos falsos"""
+    distribution: str = os.getenv("FAKE_LATENCY_DISTRIBUTION", "lognormal")
+    # Dispersão: sigma da lognormal ou ± fração da mediana na uniforme
+    spread: float = float(os.getenv("FAKE_LATENCY_SPREAD", "0.5"))
+    # Chat: segundos até o primeiro token (mediana), mais o tempo de leitura do prompt
+    ttft: float = float(os.getenv("FAKE_LLM_TTFT", "0.4"))
+    prefill_per_1k_tokens: float = float(os.getenv("FAKE_LLM_PREFILL_PER_1K_TOKENS", "0.02"))
+    tokens_per_second: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "80"))
+    output_tokens: int = int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "150"))
+    context_window: int = int(os.getenv("FAKE_LLM_CONTEXT_WINDOW", "128000"))
+    # Embeddings: segundos por requisição (mediana) + por 1000 tokens
+    embedding_latency: float = float(os.getenv("FAKE_EMBEDDING_LATENCY", "0.05"))
+    embedding_latency_per_1k_tokens: float = float(os.getenv("FAKE_EMBEDDING_LATENCY_PER_1K_TOKENS", "0.01"))
+    # Erros injetados: chance de cada tentativa receber 429 ou 500
+    rate_limit_rate: float = float(os.getenv("FAKE_RATE_LIMIT_RATE", "0"))
+    error_rate: float = float(os.getenv("FAKE_ERROR_RATE", "0"))
+    retry_after: float = float(os.getenv("FAKE_RETRY_AFTER", "0.5"))
+    max_retries: int = int(os.getenv("FAKE_MAX_RETRIES", "2"))
+    seed: int = int(os.getenv("FAKE_SEED", "0"))
+    # Fração da latência simulada realmente dormida (0 = sem espera, só as contagens)
+    time_scale: float = float(os.getenv("FAKE_TIME_SCALE", "1"))
+
+    def __post_init__(self):
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"FAKE_LATENCY_DISTRIBUTION must be one of {DISTRIBUTIONS}")
+
+    def sample(self, median: float, rng: random.Random) -> float:
+        """Uma latência da distribuição configurada, com a mediana pedida"""
+        if median <= 0 or self.distribution == "fixed":
+            return max(median, 0.0)
+        if self.distribution == "uniform":
+            return median * rng.uniform(max(0.0, 1 - self.spread), 1 + self.spread)
+        if self.distribution == "exponential":
+            # Mediana da exponencial = ln 2 / taxa
+            return rng.expovariate(math.log(2) / median)
+        return median * math.exp(rng.gauss(0.0, self.spread))
+
+
+@dataclass
+class FakeModelStats:
+    """Contadores das chamadas a um modelo falso"""
+    requests: int = 0  # tentativas, incluindo as que receberam erro
+    calls: int = 0  # chamadas concluídas
+    failed: int = 0  # chamadas que esgotaram as tentativas
+    rate_limited: int = 0
+    errors: int = 0
+    inputs: int = 0  # textos embedados
+    input_tokens: int = 0
+    output_tokens: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+
+def _api_error(status: int, retry_after: float) -> openai.APIStatusError:
+    """Erro igual ao que o cliente da OpenAI levantaria com essa resposta"""
+    request = httpx.Request("POST", FAKE_BASE_URL)
+    if status == 429:
+        response = httpx.Response(429, headers={"retry-after": str(retry_after)}, request=request)
+        return openai.RateLimitError("Rate limit reached (injected by the fake provider)", response=response, body=None)
+    if status == 400:
+        response = httpx.Response(400, request=request)
+        return openai.BadRequestError("Prompt exceeds the model context window", response=response, body=None)
+    response = httpx.Response(500, request=request)
+    return openai.InternalServerError("Internal server error (injected by the fake provider)", response=response, body=None)
+
+
+@dataclass
+class _Endpoint:
+    """Sorteios, erros injetados e contadores de um modelo falso"""
+    config: FakeModelConfig
+    max_retries: int
+    stats: FakeModelStats = field(default_factory=FakeModelStats)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def rng(self, key: str, attempt: int = 0) -> random.Random:
+        """Gerador de uma tentativa com essa entrada (independe da ordem e do histórico)"""
+        digest = hashlib.sha256(f"{self.config.seed}\x00{key}".encode("utf-8")).digest()
+        return random.Random(digest + attempt.to_bytes(8, "little"))
+
+    def attempts(self, key: str, latency: float) -> tuple[float, random.Random, Exception | None]:
+        """(espera das tentativas que falharam, gerador da que deu certo, erro se nenhuma deu)"""
+        wait = 0.0
+        error = None
+        for attempt in range(self.max_retries + 1):
+            rng = self.rng(key, attempt)
+            roll = rng.random()
+            with self._lock:
+                self.stats.requests += 1
+            if roll < self.config.rate_limit_rate:
+                with self._lock:
+                    self.stats.rate_limited += 1
+                # O 429 volta rápido; o cliente espera o Retry-After
+                wait += self.config.sample(0.02, rng) + self.config.retry_after
+                error = _api_error(429, self.config.retry_after)
+            elif roll < self.config.rate_limit_rate + self.config.error_rate:
+                with self._lock:
+                    self.stats.errors += 1
+                # O 500 chega depois do processamento; backoff exponencial como no cliente
+                wait += self.config.sample(latency, rng) + min(0.5 * 2 ** attempt, 8.0)
+                error = _api_error(500, 0.0)
+            else:
+                return wait, rng, None
+        with self._lock:
+            self.stats.failed += 1
+        return wait, rng, error
+
+    @contextmanager
+    def in_flight(self) -> Iterator[None]:
+        """Marca uma chamada em andamento (para a concorrência máxima observada)"""
+        with self._lock:
+            self.stats.in_flight += 1
+            self.stats.max_in_flight = max(self.stats.max_in_flight, self.stats.in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stats.in_flight -= 1
+
+    def completed(self, inputs: int = 0, input_tokens: int = 0, output_tokens: int = 0) -> None:
+        with self._lock:
+            self.stats.calls += 1
+            self.stats.inputs += inputs
+            self.stats.input_tokens += input_tokens
+            self.stats.output_tokens += output_tokens
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0 and self.config.time_scale > 0:
+            time.sleep(seconds * self.config.time_scale)
+
+    async def asleep(self, seconds: float) -> None:
+        if seconds > 0 and self.config.time_scale > 0:
+            await asyncio.sleep(seconds * self.config.time_scale)
+
+    def remaining(self, start: float, offset: float) -> float:
+        """Segundos simulados até start + offset: o atraso de cada espera não se acumula no stream"""
+        if self.config.time_scale <= 0:
+            return 0.0
+        return offset - (time.perf_counter() - start) / self.config.time_scale
+
+
+def _fake_name(model: str) -> str:
+    return model if model.startswith(FAKE_PREFIX) else FAKE_PREFIX + model
+
+
+def _react_step(prompt: str, answer: str, rng: random.Random) -> str | None:
+    """Próximo passo de um agente ReAct, ou None se o prompt não é desse formato
+
+    Sem Observation depois da pergunta: Action com uma das ferramentas e a
+    pergunta como entrada. Com Observation (a ferramenta já rodou): Final Answer.
+    """
+    if not all(marker in prompt for marker in REACT_MARKERS):
+        return None
+    # A última "Question:" é a do usuário (a primeira está nas instruções do formato)
+    question, _, scratchpad = prompt.rpartition("Question:")[2].partition("\n")
+    listed = REACT_TOOLS.findall(prompt)
+    tools = [name.strip() for name in listed[-1].split(",") if name.strip()] if listed else []
+    if tools and "Observation:" not in scratchpad:
+        return f" I should use a tool.\nAction: {rng.choice(tools)}\nAction Input: {question.strip()}"
+    return f" I now know the final answer\nFinal Answer: {answer}"
+
+
+# ===== CHAT =====
+
+class FakeChatModel(BaseChatModel):
+    """Modelo de chat falso com a interface e o comportamento de tempo do ChatOpenAI
+
+    A resposta são palavras da última mensagem sorteadas a partir do hash
+    do prompt: o mesmo prompt sempre gera a mesma resposta. Prompts ReAct
+    recebem um passo válido do agente (veja _react_step).
+    """
+
+    model_config = ConfigDict(populate_by_name=True, arbitrary_types_allowed=True, protected_namespaces=())
+
+    model_name: str = Field(default="gpt-3.5-turbo", alias="model")
+    temperature: float | None = None
+    max_tokens: int | None = None
+    max_retries: int | None = None
+    # Como no ChatOpenAI: a contagem de tokens só vem no stream se pedida
+    stream_usage: bool = False
+    config: FakeModelConfig = Field(default_factory=FakeModelConfig)
+    _endpoint: _Endpoint = PrivateAttr()
+
+    @field_validator("model_name")
+    @classmethod
+    def _prefix(cls, value: str) -> str:
+        return _fake_name(value)
+
+    def model_post_init(self, context: Any) -> None:
+        retries = self.config.max_retries if self.max_retries is None else self.max_retries
+        self._endpoint = _Endpoint(self.config, retries)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model_name": self.model_name, "temperature": self.temperature, "max_tokens": self.max_tokens}
+
+    @property
+    def stats(self) -> FakeModelStats:
+        return self._endpoint.stats
+
+    def get_num_tokens(self, text: str) -> int:
+        # Como o ChatOpenAI, conta com o tiktoken (o padrão do LangChain exige transformers)
+        return estimate_tokens([text])[0]
+
+    def _reply(self, messages: list[BaseMessage], stop: list[str] | None = None) -> tuple[str, list[str], int, int]:
+        """(prompt, pedaços da resposta, tokens de entrada, tokens de saída)"""
+        prompt = get_buffer_string(messages)
+        input_tokens = estimate_tokens([prompt])[0]
+        if input_tokens > self.config.context_window:
+            raise _api_error(400, 0.0)
+        vocabulary = re.findall(r"\w+", messages[-1].text() if messages else "") or ["ok"]
+        rng = random.Random(hashlib.sha256(f"{self.config.seed}\x00{prompt}".encode("utf-8")).digest())
+        length = self.config.output_tokens if self.max_tokens is None else min(self.max_tokens, self.config.output_tokens)
+        words = " ".join(rng.choice(vocabulary) for _ in range(max(1, length)))
+        reply = _react_step(prompt, words, rng) or words
+        # Como na API: a resposta termina antes da primeira sequência de parada
+        for sequence in stop or ():
+            reply = reply.split(sequence, 1)[0]
+        pieces = re.findall(r"\s*\S+", reply) or [reply]
+        return prompt, pieces, input_tokens, estimate_tokens([reply])[0]
+
+    def _first_token(self, rng: random.Random, input_tokens: int) -> float:
+        return self.config.sample(self.config.ttft, rng) + self.config.prefill_per_1k_tokens * input_tokens / 1000
+
+    def _usage(self, input_tokens: int, output_tokens: int) -> UsageMetadata:
+        return UsageMetadata(input_tokens=input_tokens, output_tokens=output_tokens, total_tokens=input_tokens + output_tokens)
+
+    def _result(self, pieces: list[str], input_tokens: int, output_tokens: int) -> ChatResult:
+        message = AIMessage(
+            content="".join(pieces),
+            usage_metadata=self._usage(input_tokens, output_tokens),
+            response_metadata={"model_name": self.model_name, "finish_reason": "stop"},
+        )
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"model_name": self.model_name, "token_usage": dict(message.usage_metadata)},
+        )
+
+    def _last_chunk(self, input_tokens: int, output_tokens: int) -> ChatGenerationChunk:
+        return ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            usage_metadata=self._usage(input_tokens, output_tokens) if self.stream_usage else None,
+            response_metadata={"model_name": self.model_name, "finish_reason": "stop"},
+        ))
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt, pieces, input_tokens, output_tokens = self._reply(messages, stop)
+        with self._endpoint.in_flight():
+            wait, rng, error = self._endpoint.attempts(prompt, self.config.ttft)
+            self._endpoint.sleep(wait)
+            if error is not None:
+                raise error
+            self._endpoint.sleep(self._first_token(rng, input_tokens) + len(pieces) / self.config.tokens_per_second)
+        self._endpoint.completed(input_tokens=input_tokens, output_tokens=output_tokens)
+        return self._result(pieces, input_tokens, output_tokens)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt, pieces, input_tokens, output_tokens = self._reply(messages, stop)
+        with self._endpoint.in_flight():
+            wait, rng, error = self._endpoint.attempts(prompt, self.config.ttft)
+            await self._endpoint.asleep(wait)
+            if error is not None:
+                raise error
+            await self._endpoint.asleep(self._first_token(rng, input_tokens) + len(pieces) / self.config.tokens_per_second)
+        self._endpoint.completed(input_tokens=input_tokens, output_tokens=output_tokens)
+        return self._result(pieces, input_tokens, output_tokens)
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        prompt, pieces, input_tokens, output_tokens = self._reply(messages, stop)
+        with self._endpoint.in_flight():
+            wait, rng, error = self._endpoint.attempts(prompt, self.config.ttft)
+            self._endpoint.sleep(wait)
+            if error is not None:
+                raise error
+            start = time.perf_counter()
+            first = self._first_token(rng, input_tokens)
+            for index, piece in enumerate(pieces):
+                self._endpoint.sleep(self._endpoint.remaining(start, first + index / self.config.tokens_per_second))
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+                if run_manager:
+                    run_manager.on_llm_new_token(piece, chunk=chunk)
+                yield chunk
+        self._endpoint.completed(input_tokens=input_tokens, output_tokens=output_tokens)
+        yield self._last_chunk(input_tokens, output_tokens)
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        prompt, pieces, input_tokens, output_tokens = self._reply(messages, stop)
+        with self._endpoint.in_flight():
+            wait, rng, error = self._endpoint.attempts(prompt, self.config.ttft)
+            await self._endpoint.asleep(wait)
+            if error is not None:
+                raise error
+            start = time.perf_counter()
+            first = self._first_token(rng, input_tokens)
+            for index, piece in enumerate(pieces):
+                await self._endpoint.asleep(self._endpoint.remaining(start, first + index / self.config.tokens_per_second))
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+                if run_manager:
+                    await run_manager.on_llm_new_token(piece, chunk=chunk)
+                yield chunk
+        self._endpoint.completed(input_tokens=input_tokens, output_tokens=output_tokens)
+        yield self._last_chunk(input_tokens, output_tokens)
+
+
+# ===== EMBEDDINGS =====
+
+class FakeEmbeddings(Embeddings):
+    """Embeddings falsos com a interface e o comportamento de tempo do OpenAIEmbeddings"""
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        dimensions: int | None = None,
+        chunk_size: int = 1000,
+        max_retries: int | None = None,
+        config: FakeModelConfig | None = None,
+    ):
+        self.config = config or FakeModelConfig()
+        self.model = _fake_name(model)
+        # None = dimensões completas do modelo (mesmo atributo do OpenAIEmbeddings)
+        self.dimensions = dimensions
+        self.size = dimensions or MODEL_DIMENSIONS.get(model.removeprefix(FAKE_PREFIX), 1536)
+        self.chunk_size = chunk_size
+        self._endpoint = _Endpoint(self.config, self.config.max_retries if max_retries is None else max_retries)
+
+    @property
+    def stats(self) -> FakeModelStats:
+        return self._endpoint.stats
+
+    def _batches(self, texts: list[str]) -> Iterator[tuple[list[str], float, int, Exception | None]]:
+        """Uma requisição por lote de chunk_size textos, como o OpenAIEmbeddings"""
+        for start in range(0, len(texts), self.chunk_size):
+            batch = texts[start:start + self.chunk_size]
+            tokens = sum(estimate_tokens(batch))
+            latency = self.config.embedding_latency + self.config.embedding_latency_per_1k_tokens * tokens / 1000
+            wait, rng, error = self._endpoint.attempts("\x00".join(batch), latency)
+            yield batch, wait + (0.0 if error else self.config.sample(latency, rng)), tokens, error
+
+    def _vectors(self, batch: list[str]) -> list[list[float]]:
+        return [fake_vector(text, self.size).tolist() for text in batch]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors: list[list[float]] = []
+        for batch, wait, tokens, error in self._batches(texts):
+            with self._endpoint.in_flight():
+                self._endpoint.sleep(wait)
+                if error is not None:
+                    raise error
+            self._endpoint.completed(inputs=len(batch), input_tokens=tokens)
+            vectors.extend(self._vectors(batch))
+        return vectors
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors: list[list[float]] = []
+        for batch, wait, tokens, error in self._batches(texts):
+            with self._endpoint.in_flight():
+                await self._endpoint.asleep(wait)
+                if error is not None:
+                    raise error
+            self._endpoint.completed(inputs=len(batch), input_tokens=tokens)
+            vectors.extend(self._vectors(batch))
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
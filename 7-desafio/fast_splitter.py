@@ -0,0 +1,194 @@
+# ========================================
+# SPLITTER RECURSIVO POR OFFSETS - MESMA SAÍDA, MENOS CÓPIAS DE STRING
+# ========================================
+# RecursiveCharacterTextSplitter divide o texto com re.split (uma string
+# nova por pedaço), junta os pedaços de volta com "".join a cada chunk e
+# repete isso em cada nível da recursão. Com keep_separator (o padrão),
+# os pedaços de um mesmo nível são trechos CONTÍGUOS do texto original,
+# então aqui o texto é percorrido com str.find e cada pedaço vira só um
+# par (início, fim). O chunk final é um único fatiamento text[início:fim]
+# e a sobreposição é calculada pelos offsets, sem reconcatenar nada.
+#
+# A saída é idêntica à do RecursiveCharacterTextSplitter (conferida em
+# benchmark_fast_splitter.py). Configurações fora do caminho rápido
+# (separadores regex, keep_separator=False ou length_function diferente
+# de len) usam a implementação original.
+#
+# TokenRecursiveCharacterTextSplitter usa o mesmo algoritmo com
+# chunk_size/chunk_overlap em tokens do OPENAI_MODEL (tokenizer.py),
+# contando os pedaços de cada nível em lote. Com CHUNK_UNIT=tokens,
+# splitter_from_env escolhe esse modo.
+# ========================================
+
+import copy
+import logging
+import os
+from typing import Any
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from tokenizer import count_tokens, get_encoding
+
+logger = logging.getLogger(__name__)
+
+Span = tuple[int, int]
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+class FastRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
+    """Substituto direto do RecursiveCharacterTextSplitter"""
+
+    def _fast_path(self) -> bool:
+        return bool(self._keep_separator) and not self._is_separator_regex and self._length_function is len
+
+    def split_text(self, text: str) -> list[str]:
+        if not self._fast_path():
+            return super().split_text(text)
+        chunks: list[str] = []
+        self._split_span(text, 0, len(text), self._separators, chunks)
+        return chunks
+
+    def create_documents(self, texts: list[str], metadatas: list[dict[Any, Any]] | None = None) -> list[Document]:
+        """Igual ao TextSplitter.create_documents, sem deepcopy para metadados planos
+
+        Metadados só com valores escalares (o caso dos loaders de PDF) são
+        copiados com dict(), que dá o mesmo resultado que o deepcopy.
+        """
+        _metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        for text, metadata in zip(texts, _metadatas):
+            flat = all(isinstance(value, _SCALARS) for value in metadata.values())
+            index = 0
+            previous_chunk_len = 0
+            for chunk in self.split_text(text):
+                chunk_metadata = dict(metadata) if flat else copy.deepcopy(metadata)
+                if self._add_start_index:
+                    offset = index + previous_chunk_len - self._chunk_overlap
+                    index = text.find(chunk, max(0, offset))
+                    chunk_metadata["start_index"] = index
+                    previous_chunk_len = len(chunk)
+                documents.append(Document(page_content=chunk, metadata=chunk_metadata))
+        return documents
+
+    # ===== DIVISÃO POR OFFSETS =====
+
+    def _split_span(self, text: str, start: int, end: int, separators: list[str], chunks: list[str]) -> None:
+        """Mesmo algoritmo de RecursiveCharacterTextSplitter._split_text sobre text[start:end]"""
+        separator = separators[-1]
+        new_separators: list[str] = []
+        for i, candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator = candidate
+                new_separators = separators[i + 1:]
+                break
+
+        pieces = self._pieces(text, start, end, separator)
+        good: list[Span] = []
+        good_lengths: list[int] = []
+        for (piece_start, piece_end), length in zip(pieces, self._lengths(text, pieces)):
+            if length < self._chunk_size:
+                good.append((piece_start, piece_end))
+                good_lengths.append(length)
+                continue
+            if good:
+                self._merge_spans(text, good, good_lengths, chunks)
+                good, good_lengths = [], []
+            if not new_separators:
+                chunks.append(text[piece_start:piece_end])
+            else:
+                self._split_span(text, piece_start, piece_end, new_separators, chunks)
+        if good:
+            self._merge_spans(text, good, good_lengths, chunks)
+
+    def _lengths(self, text: str, pieces: list[Span]) -> list[int]:
+        """Tamanho de cada pedaço na unidade de chunk_size (aqui, caracteres)"""
+        return [end - start for start, end in pieces]
+
+    def _pieces(self, text: str, start: int, end: int, separator: str) -> list[Span]:
+        """Offsets dos pedaços que re.split daria, com o separador no início ou no fim"""
+        if separator == "":
+            return [(i, i + 1) for i in range(start, end)]
+        at_end = self._keep_separator == "end"
+        length = len(separator)
+        pieces: list[Span] = []
+        previous = start
+        position = text.find(separator, start, end)
+        while position != -1:
+            cut = position + length if at_end else position
+            if cut > previous:
+                pieces.append((previous, cut))
+            previous = cut
+            position = text.find(separator, position + length, end)
+        if end > previous:
+            pieces.append((previous, end))
+        return pieces
+
+    def _merge_spans(self, text: str, spans: list[Span], lengths: list[int], chunks: list[str]) -> None:
+        """TextSplitter._merge_splits para pedaços contíguos (separador vazio)
+
+        A janela atual é spans[first:j]; como os pedaços são contíguos, o
+        tamanho dela é a soma dos tamanhos e o chunk é um único fatiamento.
+        """
+        first = 0
+        total = 0
+        for j, length in enumerate(lengths):
+            if total + length > self._chunk_size:
+                if total > self._chunk_size:
+                    logger.warning(
+                        f"Created a chunk of size {total}, which is longer than the specified {self._chunk_size}"
+                    )
+                if j > first:
+                    self._emit(text, spans[first][0], spans[j - 1][1], chunks)
+                    # Sobreposição: descarta pedaços do início até caber no overlap
+                    while total > self._chunk_overlap or (total + length > self._chunk_size and total > 0):
+                        total -= lengths[first]
+                        first += 1
+            total += length
+        self._emit(text, spans[first][0], spans[-1][1], chunks)
+
+    def _emit(self, text: str, start: int, end: int, chunks: list[str]) -> None:
+        chunk = text[start:end]
+        if self._strip_whitespace:
+            chunk = chunk.strip()
+        if chunk:
+            chunks.append(chunk)
+
+
+class TokenRecursiveCharacterTextSplitter(FastRecursiveCharacterTextSplitter):
+    """chunk_size e chunk_overlap medidos em tokens do modelo de embeddings
+
+    Mesma saída de RecursiveCharacterTextSplitter.from_tiktoken_encoder, mas
+    os pedaços de cada nível da recursão são contados uma vez, em lote
+    (count_tokens), em vez de um encode por pedaço a cada comparação.
+    """
+
+    def __init__(self, model: str | None = None, **kwargs: Any):
+        self._model = model
+        self._encoding = get_encoding(model)
+        # Usado só fora do caminho rápido (separadores regex, keep_separator=False)
+        kwargs["length_function"] = lambda text: len(self._encoding.encode_ordinary(text))
+        super().__init__(**kwargs)
+
+    def _fast_path(self) -> bool:
+        return bool(self._keep_separator) and not self._is_separator_regex
+
+    def _lengths(self, text: str, pieces: list[Span]) -> list[int]:
+        return count_tokens([text[start:end] for start, end in pieces], self._model)
+
+
+def splitter_from_env(chunk_size: int, chunk_overlap: int, token_size: int, token_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Splitter em caracteres ou, com CHUNK_UNIT=tokens, em tokens do OPENAI_MODEL
+
+    CHUNK_SIZE_TOKENS / CHUNK_OVERLAP_TOKENS sobrescrevem token_size / token_overlap.
+    """
+    if os.getenv("CHUNK_UNIT", "chars").lower() == "tokens":
+        return TokenRecursiveCharacterTextSplitter(
+            chunk_size=int(os.getenv("CHUNK_SIZE_TOKENS", str(token_size))),
+            chunk_overlap=int(os.getenv("CHUNK_OVERLAP_TOKENS", str(token_overlap))),
+        )
+    return FastRecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
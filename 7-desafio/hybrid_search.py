@@ -0,0 +1,365 @@
+# ========================================
+# BUSCA HÍBRIDA (FULL-TEXT + VETORIAL) COM RECIPROCAL RANK FUSION
+# ========================================
+# A busca só por embeddings erra termos exatos ("few-shot", "ReAct") e
+# obriga toda pergunta a passar pela API de embeddings. Este módulo:
+# - cria um índice GIN PARCIAL (um por coleção) sobre a expressão
+#   to_tsvector('<config>', document), sem alterar a tabela do PGVector;
+#   a criação é feita na ingestão (ingestion.py / desafio.py) com CREATE
+#   INDEX CONCURRENTLY, sem bloquear gravações, e nunca ao responder uma
+#   pergunta (coleções antigas: python hybrid_search.py create)
+# - executa numa ÚNICA consulta SQL o ranking full-text (ts_rank_cd) e o
+#   kNN do pgvector (mesma expressão do índice ANN de vector_index.py) e
+#   funde os dois com Reciprocal Rank Fusion: score = Σ 1 / (rrf_k + posição)
+# - tem um atalho léxico: consultas curtas cujos termos aparecem TODOS em
+#   pelo menos k chunks são respondidas só pelo full-text, sem embedding
+#
+# Os scores devolvidos são "maior é melhor" (RRF ou ts_rank_cd), ao
+# contrário da distância de cosseno da busca vetorial; por isso o desafio
+# só usa a busca híbrida com SEARCH_MODE=hybrid (o padrão é vector).
+#
+# Uso: python hybrid_search.py create | drop | status [--collection nome]
+#      python hybrid_search.py search "few-shot"
+# ========================================
+
+import argparse
+import os
+import re
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from collection_metadata import collection_uuid, partial_index_state
+from metadata_filter import where_filter
+from numpy_store import vector_store_kind
+from vector_index import (
+    VECTOR_BYTES,
+    CollectionInfo,
+    ann_params_from_env,
+    cached_collection_info,
+    decode_vector,
+    nearest_where,
+    vector_expression,
+    vector_literal,
+)
+
+load_dotenv()
+
+
+@dataclass
+class HybridParams:
+    """Parâmetros da busca híbrida (variáveis HYBRID_* e FTS_CONFIG)"""
+    fts_config: str = "portuguese"  # Dicionário do PostgreSQL (stemming e stopwords)
+    candidates: int = 50  # Tamanho de cada ranking antes da fusão
+    rrf_k: int = 60
+    lexical_max_terms: int = 3  # 0 desliga o atalho léxico
+
+    def __post_init__(self):
+        # O nome do dicionário entra no SQL (precisa ser literal para casar com o índice)
+        if not re.fullmatch(r"\w+", self.fts_config):
+            raise ValueError(f"Invalid text search config {self.fts_config!r}")
+
+    @classmethod
+    def from_env(cls) -> "HybridParams":
+        """Parâmetros de FTS_CONFIG e HYBRID_*, lidos no momento da chamada"""
+        return cls(
+            fts_config=os.getenv("FTS_CONFIG", cls.fts_config),
+            candidates=int(os.getenv("HYBRID_CANDIDATES", cls.candidates)),
+            rrf_k=int(os.getenv("HYBRID_RRF_K", cls.rrf_k)),
+            lexical_max_terms=int(os.getenv("HYBRID_LEXICAL_MAX_TERMS", cls.lexical_max_terms)),
+        )
+
+
+@dataclass
+class HybridStats:
+    """Quantas buscas usaram o atalho léxico (sem embedding)"""
+    lexical: int = 0
+    hybrid: int = 0
+
+    def summary(self) -> str:
+        total = (self.lexical + self.hybrid) or 1
+        return f"atalho léxico {self.lexical / total:.0%} | híbrida {self.hybrid / total:.0%}"
+
+
+stats = HybridStats()
+
+
+def fts_index_name(collection: str, config: str) -> str:
+    """Nome do índice full-text da coleção (um por coleção e dicionário)"""
+    return "ix_embedding_fts_" + re.sub(r"\W", "_", collection.lower()) + "_" + config
+
+
+def tsvector_expression(config: str) -> str:
+    """Expressão indexada; consultas precisam usar exatamente a mesma"""
+    return f"to_tsvector('{config}'::regconfig, document)"
+
+
+# ===== GERENCIAMENTO DO ÍNDICE FULL-TEXT =====
+
+def ensure_fts_index(engine: Engine, collection: str, params: HybridParams | None = None) -> str | None:
+    """Cria o índice GIN parcial da coleção, se ainda não existir (ingestão)
+
+    CONCURRENTLY não bloqueia as gravações na tabela, mas não roda dentro
+    de uma transação. Um índice inválido (CREATE interrompido) ou de uma
+    coleção apagada com o mesmo nome é removido e criado de novo.
+    """
+    params = params or HybridParams.from_env()
+    name = fts_index_name(collection, params.fts_config)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        collection_id = collection_uuid(conn, collection)
+        if collection_id is None:
+            return None
+        state = partial_index_state(conn, name, collection_id)
+        if state == "valid":
+            return name
+        if state == "stale":
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON langchain_pg_embedding "
+            f"USING gin ({tsvector_expression(params.fts_config)}) WHERE collection_id = '{collection_id}'"
+        ))
+    return name
+
+
+def drop_fts_index(engine: Engine, collection: str, params: HybridParams | None = None) -> None:
+    """Remove o índice full-text da coleção"""
+    params = params or HybridParams.from_env()
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {fts_index_name(collection, params.fts_config)}"))
+
+
+# ===== CONSULTAS =====
+
+def _documents(rows, with_embeddings: bool = False) -> list[tuple]:
+    return [
+        (Document(id=row.id, page_content=row.document, metadata=row.cmetadata or {}), float(row.score))
+        + ((decode_vector(row.vector_bytes),) if with_embeddings else ())
+        for row in rows
+    ]
+
+
+def lexical_search(
+    conn: Connection,
+    info: CollectionInfo,
+    query: str,
+    k: int = 3,
+    params: HybridParams | None = None,
+    metadata_filter: dict | None = None,
+) -> list[tuple[Document, float]]:
+    """Só full-text: chunks com TODOS os termos, ordenados por ts_rank_cd"""
+    params = params or HybridParams.from_env()
+    tsv = tsvector_expression(params.fts_config)
+    tsquery = f"websearch_to_tsquery('{params.fts_config}'::regconfig, :query)"
+    values = {"query": query, "collection_id": info.uuid, "k": k}
+    condition = where_filter(metadata_filter, values)
+    rows = conn.execute(
+        text(
+            f"SELECT id, document, cmetadata, ts_rank_cd({tsv}, {tsquery}) AS score "
+            f"FROM langchain_pg_embedding WHERE collection_id = :collection_id AND {tsv} @@ {tsquery}{condition} "
+            f"ORDER BY score DESC, id LIMIT :k"
+        ),
+        values,
+    ).all()
+    return _documents(rows)
+
+
+def hybrid_query(
+    conn: Connection,
+    info: CollectionInfo,
+    query: str,
+    query_vector: list[float],
+    k: int = 3,
+    params: HybridParams | None = None,
+    ef_search: int | None = None,
+    probes: int | None = None,
+    with_embeddings: bool = False,
+    metadata_filter: dict | None = None,
+    iterative_scan: str | None = None,
+) -> list[tuple]:
+    """Full-text + kNN + fusão RRF numa única consulta
+
+    No ranking full-text os termos da pergunta são combinados com OU (uma
+    pergunta em linguagem natural raramente tem todas as palavras num
+    chunk). Como em knn_search, conn não pode estar com transação aberta;
+    with_embeddings=True devolve (Document, score, vetor float32) e
+    metadata_filter vale para os dois rankings.
+    """
+    params = params or HybridParams.from_env()
+    values = {
+        "query": query,
+        "query_vector": vector_literal(query_vector),
+        "collection_id": info.uuid,
+        "candidates": params.candidates,
+        "rrf_k": params.rrf_k,
+        "k": k,
+    }
+    condition = where_filter(metadata_filter, values)
+    # Coleção quantizada: o kNN reordena pelo vetor completo os candidatos do índice quantizado
+    nearest, ef_search = nearest_where(info, condition, values, "query_vector", params.candidates, ef_search)
+    tsv = tsvector_expression(params.fts_config)
+    # Lexemas da pergunta unidos com |; NULL (nenhum resultado) se só houver stopwords
+    any_terms = (
+        "(SELECT string_agg(quote_literal(lexeme), ' | ')::tsquery "
+        f"FROM unnest(tsvector_to_array(to_tsvector('{params.fts_config}'::regconfig, :query))) AS lexeme)"
+    )
+    expression = vector_expression(info.dimensions)
+    sql = f"""
+        WITH lexical AS (
+            SELECT id, row_number() OVER (ORDER BY rank DESC, id) AS position
+            FROM (
+                SELECT id, ts_rank_cd({tsv}, {any_terms}) AS rank
+                FROM langchain_pg_embedding
+                WHERE collection_id = :collection_id AND {tsv} @@ {any_terms}{condition}
+                ORDER BY rank DESC, id LIMIT :candidates
+            ) AS ranked
+        ),
+        semantic AS (
+            SELECT id, row_number() OVER (ORDER BY distance, id) AS position
+            FROM (
+                SELECT id, {expression} <=> CAST(:query_vector AS vector({info.dimensions})) AS distance
+                FROM langchain_pg_embedding
+                WHERE {nearest}
+                ORDER BY distance LIMIT :candidates
+            ) AS nearest
+        ),
+        fused AS (
+            SELECT id, sum(1.0 / (:rrf_k + position)) AS score
+            FROM (SELECT id, position FROM lexical UNION ALL SELECT id, position FROM semantic) AS ranks
+            GROUP BY id
+        )
+        SELECT e.id, e.document, e.cmetadata, fused.score{", " + VECTOR_BYTES if with_embeddings else ""}
+        FROM fused JOIN langchain_pg_embedding e ON e.id = fused.id
+        ORDER BY fused.score DESC, e.id LIMIT :k
+    """
+    with conn.begin():
+        if ef_search:
+            conn.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        if probes:
+            conn.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+        if iterative_scan and condition:
+            conn.execute(text(f"SET LOCAL hnsw.iterative_scan = {iterative_scan}"))
+        rows = conn.execute(text(sql), values).all()
+    return _documents(rows, with_embeddings)
+
+
+# ===== API USADA PELO DESAFIO =====
+
+def lexical_fast_path(
+    engine: Engine,
+    collection: str,
+    query: str,
+    k: int = 3,
+    params: HybridParams | None = None,
+    metadata_filter: dict | None = None,
+) -> list[tuple[Document, float]] | None:
+    """Resultados só do full-text se a consulta casar forte; None caso contrário
+
+    "Forte": consulta curta (até lexical_max_terms palavras) cujos termos
+    aparecem todos em pelo menos k chunks. Nesse caso o embedding da
+    pergunta nem é calculado.
+    """
+    params = params or HybridParams.from_env()
+    if not 0 < len(query.split()) <= params.lexical_max_terms:
+        return None
+    info = cached_collection_info(engine, collection)
+    if info is None:
+        return None
+    with engine.connect() as conn:
+        results = lexical_search(conn, info, query, k, params, metadata_filter)
+    if len(results) < k:
+        return None
+    stats.lexical += 1
+    return results
+
+
+def hybrid_search_by_vector(
+    engine: Engine,
+    collection: str,
+    query: str,
+    query_vector: list[float],
+    k: int = 3,
+    params: HybridParams | None = None,
+    with_embeddings: bool = False,
+    metadata_filter: dict | None = None,
+) -> list[tuple]:
+    """Busca híbrida com o embedding da pergunta já calculado"""
+    params = params or HybridParams.from_env()
+    info = cached_collection_info(engine, collection)
+    if info is None:
+        return []
+    with engine.connect() as conn:
+        results = hybrid_query(
+            conn, info, query, query_vector, k, params,
+            with_embeddings=with_embeddings, metadata_filter=metadata_filter, **ann_params_from_env(),
+        )
+    stats.hybrid += 1
+    return results
+
+
+def hybrid_search(
+    engine: Engine,
+    embeddings: Embeddings,
+    collection: str,
+    query: str,
+    k: int = 3,
+    params: HybridParams | None = None,
+    metadata_filter: dict | None = None,
+) -> list[tuple[Document, float]]:
+    """Atalho léxico quando possível; senão embedding + consulta híbrida"""
+    results = lexical_fast_path(engine, collection, query, k, params, metadata_filter)
+    if results is not None:
+        return results
+    return hybrid_search_by_vector(
+        engine, collection, query, embeddings.embed_query(query), k, params, metadata_filter=metadata_filter
+    )
+
+
+def search_mode() -> str:
+    """SEARCH_MODE=vector (padrão, só embeddings) ou hybrid (opcional)
+
+    O modo híbrido muda o significado do score (RRF, maior é melhor, em vez
+    da distância de cosseno) e responde consultas curtas sem embedding, por
+    isso só vale quando pedido. Com VECTOR_STORE=numpy não há full-text,
+    então a busca é sempre vetorial.
+    """
+    mode = os.getenv("SEARCH_MODE", "vector").lower()
+    if mode not in ("hybrid", "vector"):
+        raise ValueError("SEARCH_MODE must be 'hybrid' or 'vector'")
+    return mode if vector_store_kind() == "pgvector" else "vector"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice full-text e busca híbrida de uma coleção do PGVector")
+    parser.add_argument("action", choices=["create", "drop", "status", "search"])
+    parser.add_argument("query", nargs="?")
+    parser.add_argument("--collection", default=os.getenv("PGVECTOR_COLLECTION"))
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine(os.getenv("PGVECTOR_URL"))
+    params = HybridParams.from_env()
+    name = fts_index_name(args.collection, params.fts_config)
+    if args.action == "create":
+        print(f"✅ Índice {ensure_fts_index(engine, args.collection, params)} pronto")
+    elif args.action == "drop":
+        drop_fts_index(engine, args.collection, params)
+        print("✅ Índice removido")
+    elif args.action == "search":
+        from retrieval_context import get_context
+        results = hybrid_search(engine, get_context().embeddings, args.collection, args.query, args.k, params)
+        for i, (doc, score) in enumerate(results, start=1):
+            print(f"{i}. ({score:.4f}) {doc.page_content[:120]!r}")
+        print(stats.summary())
+        return
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"), {"name": name}).first()
+    print(row.indexdef if row else "Nenhum índice full-text para esta coleção")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# ========================================
+# PIPELINE DE INGESTÃO EM STREAMING - MEMÓRIA LIMITADA
+# ========================================
+# Em vez de carregar o PDF inteiro, dividir tudo, enriquecer tudo e só
+# então embedar, cada etapa aqui é um gerador:
+#   páginas (processos em paralelo) -> chunks por página -> metadados limpos
+#   -> micro-lotes -> embedding + inserção no PGVector
+# Os micro-lotes são embedados em paralelo pelo motor assíncrono de
+# async_ingestion.py, com um limite rígido de lotes em voo. Assim o pico de
+# memória depende de batch_size * max_in_flight, e não do número de páginas.
+#
+# Os IDs são determinísticos (fonte + página + hash do conteúdo). Antes de
+# embedar, o manifesto de IDs já gravados para a fonte é lido do PGVector:
+# chunks inalterados são pulados e chunks que sumiram do PDF são apagados.
+# Quando algo muda, a versão gravada nos metadados da coleção é trocada
+# (collection_metadata.py), o que invalida o cache de respostas, e os
+# índices das chaves de metadados declaradas são criados se faltarem
+# (metadata_filter.py), assim como o índice full-text da busca híbrida
+# (hybrid_search.py). Com QUANTIZATION=halfvec|binary, o índice HNSW
+# quantizado da coleção também é criado se faltar (quantization.py).
+# A configuração de embeddings (dimensões reduzidas, embedding_dimensions.py)
+# é conferida com a da coleção antes de embedar e gravada nela depois; com
+# EMBEDDING_REDUCTION=pca e sem projeção salva, ela é ajustada nos primeiros
+# EMBEDDING_PCA_FIT_SAMPLE chunks da fonte antes do primeiro lote.
+# Com o NumpyVectorStore (numpy_store.py) o manifesto vem do próprio store,
+# que troca de versão a cada gravação e não tem índices a criar.
+# ========================================
+
+import hashlib
+from collections import Counter
+from itertools import chain, islice
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from langchain_core.documents import Document
+from langchain_postgres import PGVector
+from langchain_text_splitters import TextSplitter
+
+from async_ingestion import EmbeddingLimits, ingest_documents_concurrently
+from collection_metadata import bump_collection_version
+from embedding_dimensions import PCAEmbeddings, check_embedding_spec, ensure_projection, record_embedding_spec
+from hybrid_search import ensure_fts_index, search_mode
+from metadata_filter import ensure_metadata_indexes
+from numpy_store import NumpyVectorStore
+from parallel_pdf import iter_pdf_pages
+from quantization import quantization_from_env
+from vector_index import ensure_quantized_index
+
+def iter_pages(pdf_path: Path | str) -> Iterator[Document]:
+    """Lê o PDF página por página sem manter o documento inteiro em memória
+
+    As fatias de páginas são extraídas em paralelo (parallel_pdf.py) e
+    entregues em ordem assim que ficam prontas.
+    """
+    yield from iter_pdf_pages([pdf_path])
+
+
+def iter_chunks(pages: Iterable[Document], splitter: TextSplitter) -> Iterator[Document]:
+    """Divide cada página assim que ela é lida"""
+    for page in pages:
+        yield from splitter.split_documents([page])
+
+
+def clean_metadata(doc: Document) -> Document:
+    """Remove metadados vazios ou nulos de um documento"""
+    return Document(
+        page_content=doc.page_content,
+        metadata={k: v for k, v in doc.metadata.items() if v not in ("", None)},
+    )
+
+
+def iter_enriched(chunks: Iterable[Document]) -> Iterator[Document]:
+    """Versão em streaming do enrich_chunks"""
+    for chunk in chunks:
+        yield clean_metadata(chunk)
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """Agrupa um iterável em listas de até batch_size itens"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def content_hash(text: str) -> str:
+    """Hash SHA-256 do texto de um chunk"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(doc: Document, occurrence: int = 0) -> str:
+    """ID determinístico a partir da fonte, página e hash do conteúdo
+
+    occurrence diferencia chunks idênticos repetidos na mesma página.
+    """
+    key = "\x00".join([
+        str(doc.metadata.get("source", "")),
+        str(doc.metadata.get("page", "")),
+        content_hash(doc.page_content),
+        str(occurrence),
+    ])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def iter_with_ids(documents: Iterable[Document]) -> Iterator[tuple[Document, str]]:
+    """Associa a cada documento o seu ID determinístico"""
+    seen: Counter = Counter()
+    for doc in documents:
+        key = (doc.metadata.get("source"), doc.metadata.get("page"), doc.page_content)
+        yield doc, chunk_id(doc, seen[key])
+        seen[key] += 1
+
+
+def fetch_manifest(store: PGVector, source: str) -> set[str]:
+    """Lê do PGVector os IDs já gravados para uma fonte (o manifesto)"""
+    if isinstance(store, NumpyVectorStore):
+        return store.ids_where({"source": source})
+    with store.session_maker() as session:
+        collection = store.get_collection(session)
+        if collection is None:
+            return set()
+        rows = session.query(store.EmbeddingStore.id).filter(
+            store.EmbeddingStore.collection_id == collection.uuid,
+            # @> usa o índice GIN jsonb_path_ops criado pelo PGVector
+            store.EmbeddingStore.cmetadata.contains({"source": source}),
+        )
+        return {row.id for row in rows}
+
+
+@dataclass
+class IngestionReport:
+    """Resumo de uma ingestão incremental"""
+    added: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+
+def ingest_documents(
+    documents: Iterable[tuple[Document, str]],
+    store: PGVector,
+    batch_size: int | None = None,
+    max_in_flight: int | None = None,
+    on_batch: Callable[[int, int], None] | None = None,
+) -> int:
+    """Embeda e insere pares (documento, id) em micro-lotes com limite de lotes em voo
+
+    batch_size / max_in_flight None: INGEST_BATCH_SIZE / INGEST_MAX_IN_FLIGHT.
+    on_batch(numero_do_lote, tamanho_do_lote) é chamado ao concluir cada lote.
+    Retorna o total de documentos inseridos.
+    """
+    overrides = {"batch_size": batch_size, "max_concurrency": max_in_flight}
+    limits = EmbeddingLimits.from_env(**{name: value for name, value in overrides.items() if value is not None})
+    return ingest_documents_concurrently(documents, store, limits, on_batch)
+
+
+def fit_projection(documents: Iterable[Document], embeddings) -> Iterable[Document]:
+    """Ajusta a projeção PCA nos primeiros chunks, se faltar, e devolve o fluxo completo
+
+    Só esses fit_sample chunks ficam em memória; nada é embedado antes do ajuste.
+    """
+    if not isinstance(embeddings, PCAEmbeddings) or embeddings.projection is not None:
+        return documents
+    documents = iter(documents)
+    sample = list(islice(documents, embeddings.fit_sample))
+    ensure_projection(embeddings, [doc.page_content for doc in sample])
+    return chain(sample, documents)
+
+
+def ingest_incremental(
+    documents: Iterable[Document],
+    store: PGVector,
+    source: str,
+    batch_size: int | None = None,
+    max_in_flight: int | None = None,
+    on_batch: Callable[[int, int], None] | None = None,
+) -> IngestionReport:
+    """Embeda só os chunks novos ou alterados de uma fonte e apaga os obsoletos"""
+    check_embedding_spec(store, store.embeddings)
+    documents = fit_projection(documents, store.embeddings)
+    manifest = fetch_manifest(store, source)
+    report = IngestionReport()
+    current: set[str] = set()
+
+    def new_only() -> Iterator[tuple[Document, str]]:
+        for doc, doc_id in iter_with_ids(documents):
+            current.add(doc_id)
+            if doc_id in manifest:
+                report.unchanged += 1
+            else:
+                yield doc, doc_id
+
+    report.added = ingest_documents(new_only(), store, batch_size, max_in_flight, on_batch)
+
+    stale = manifest - current
+    if stale:
+        store.delete(ids=sorted(stale))
+    report.deleted = len(stale)
+    if report.added:
+        record_embedding_spec(store, store.embeddings)
+    if not isinstance(store, PGVector):
+        return report
+    if report.added or report.deleted:
+        bump_collection_version(store)
+    if report.added:
+        with store.session_maker() as session:
+            engine = session.get_bind()
+        ensure_metadata_indexes(engine, store.collection_name)
+        if search_mode() == "hybrid":
+            ensure_fts_index(engine, store.collection_name)
+        if quantization_from_env():
+            ensure_quantized_index(engine, store.collection_name, quantization_from_env())
+    return report
+
+
+def ingest_pdf(
+    pdf_path: Path | str,
+    splitter: TextSplitter,
+    store: PGVector,
+    batch_size: int | None = None,
+    max_in_flight: int | None = None,
+    on_batch: Callable[[int, int], None] | None = None,
+) -> IngestionReport:
+    """Pipeline completo e incremental: PDF -> chunks -> metadados limpos -> PGVector"""
+    documents = iter_enriched(iter_chunks(iter_pages(pdf_path), splitter))
+    return ingest_incremental(documents, store, str(pdf_path), batch_size, max_in_flight, on_batch)
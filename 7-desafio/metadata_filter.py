@@ -0,0 +1,280 @@
+# ========================================
+# FILTROS DE METADADOS (JSONB) EMPURRADOS PARA O SQL
+# ========================================
+# A coleção é criada com use_jsonb=True e os chunks guardam metadados como
+# source e page, mas a busca percorria a coleção inteira. Aqui:
+# - filtros no formato do PGVector ({"source": "x.pdf"},
+#   {"page": {"$gte": 3}}, {"$or": [...]}) viram um trecho de WHERE com
+#   parâmetros, usado por knn_search, hybrid_query e lexical_search
+# - as chaves declaradas em METADATA_INDEX_KEYS (padrão "source,page:int")
+#   ganham um índice de expressão B-tree PARCIAL por coleção, sobre
+#   exatamente a expressão que o filtro gera; igualdades em chaves não
+#   declaradas usam cmetadata @> ..., atendido pelo índice GIN
+#   (jsonb_path_ops) que o próprio PGVector cria (ix_cmetadata_gin)
+# - chaves numéricas só são convertidas quando o valor tem o formato do
+#   tipo: uma linha com page "iv" fica fora do índice e do filtro, em vez
+#   de fazer a gravação ou a consulta falharem no cast
+# - a ingestão chama ensure_metadata_indexes depois de gravar, então os
+#   índices existem sem passo manual
+#
+# Com um filtro seletivo o PostgreSQL usa esses índices e só ordena por
+# distância as linhas da fonte pedida: a latência depende do tamanho do
+# filtro, não da coleção.
+# ========================================
+
+import json
+import operator
+import os
+import re
+from dataclasses import dataclass
+from itertools import count
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from collection_metadata import collection_uuid, partial_index_state
+
+TYPES = {"text": None, "int": "bigint", "float": "double precision"}
+# Formato aceito por cada cast (o ->> de um número JSON já vem normalizado;
+# até 18 dígitos sempre cabem em bigint)
+PATTERNS = {"int": r"^-?[0-9]{1,18}$", "float": r"^-?([0-9]+([.][0-9]*)?|[.][0-9]+)([eE][-+]?[0-9]+)?$"}
+COMPARISONS = {"$eq": "=", "$ne": "<>", "$lt": "<", "$lte": "<=", "$gt": ">", "$gte": ">="}
+
+
+@dataclass(frozen=True)
+class MetadataKey:
+    """Chave de metadado declarada para indexação e o tipo usado na comparação"""
+    name: str
+    type: str = "text"
+
+    def __post_init__(self):
+        # O nome entra no SQL do índice (precisa ser literal para casar com a consulta)
+        if not re.fullmatch(r"\w+", self.name):
+            raise ValueError(f"Invalid metadata key {self.name!r}")
+        if self.type not in TYPES:
+            raise ValueError(f"Metadata key type must be one of {tuple(TYPES)}")
+
+    @property
+    def expression(self) -> str:
+        """Expressão indexada; o filtro gera exatamente a mesma
+
+        Valores fora do formato do tipo viram NULL (não satisfazem nenhuma
+        comparação) em vez de um erro de cast.
+        """
+        value = f"(cmetadata ->> '{self.name}')"
+        if not TYPES[self.type]:
+            return value
+        return f"(CASE WHEN {value} ~ '{PATTERNS[self.type]}' THEN {value}::{TYPES[self.type]} END)"
+
+    @property
+    def index_key(self) -> str:
+        """Sufixo do nome do índice; o tipo entra no nome porque muda a expressão"""
+        return self.name if self.type == "text" else f"{self.name}_{self.type}"
+
+
+def declared_keys(spec: str | None = None) -> dict[str, MetadataKey]:
+    """Chaves de METADATA_INDEX_KEYS: "source,page:int" (tipo padrão text)"""
+    spec = os.getenv("METADATA_INDEX_KEYS", "source,page:int") if spec is None else spec
+    keys = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, type_ = item.partition(":")
+        keys[name] = MetadataKey(name, type_ or "text")
+    return keys
+
+
+# ===== FILTRO -> SQL =====
+
+def filter_clause(metadata_filter: dict, params: dict, keys: dict[str, MetadataKey] | None = None) -> str:
+    """Trecho de WHERE para o filtro; os valores são adicionados a params
+
+    Operadores: igualdade direta, $eq, $ne, $lt, $lte, $gt, $gte, $in,
+    $nin, $and e $or (como no filtro do PGVector).
+    """
+    keys = declared_keys() if keys is None else keys
+    names = count(len(params))
+
+    def bind(value) -> str:
+        name = f"meta_{next(names)}"
+        params[name] = value
+        return f":{name}"
+
+    def condition(key: str, operator: str, value) -> str:
+        declared = keys.get(key)
+        if declared is None and operator == "$eq":
+            # Chave não declarada: containment, atendido pelo índice GIN
+            return f"cmetadata @> CAST({bind(json.dumps({key: value}))} AS jsonb)"
+        if declared is None:
+            declared = MetadataKey(key, "float" if isinstance(value, (int, float)) and not isinstance(value, bool) else "text")
+        if operator in ("$in", "$nin"):
+            if not isinstance(value, (list, tuple)):
+                raise ValueError(f"{operator} expects a list")
+            if not value:
+                return "FALSE" if operator == "$in" else "TRUE"
+            values = ", ".join(bind(_coerce(declared, item)) for item in value)
+            return f"{declared.expression} {'IN' if operator == '$in' else 'NOT IN'} ({values})"
+        if operator not in COMPARISONS:
+            raise ValueError(f"Unsupported filter operator {operator!r}")
+        return f"{declared.expression} {COMPARISONS[operator]} {bind(_coerce(declared, value))}"
+
+    def clause(node: dict) -> str:
+        if not isinstance(node, dict) or not node:
+            raise ValueError("Metadata filter must be a non-empty dict")
+        parts = []
+        for key, value in node.items():
+            if key in ("$and", "$or"):
+                if not isinstance(value, list) or not value:
+                    raise ValueError(f"{key} expects a non-empty list")
+                joiner = " AND " if key == "$and" else " OR "
+                parts.append("(" + joiner.join(clause(item) for item in value) + ")")
+            elif key.startswith("$"):
+                raise ValueError(f"Unsupported filter operator {key!r}")
+            elif isinstance(value, dict):
+                parts.extend(condition(key, operator, operand) for operator, operand in value.items())
+            else:
+                parts.append(condition(key, "$eq", value))
+        return "(" + " AND ".join(parts) + ")"
+
+    return clause(metadata_filter)
+
+
+def _coerce(key: MetadataKey, value):
+    if key.type == "int":
+        return int(value)
+    if key.type == "float":
+        return float(value)
+    return str(value)
+
+
+def where_filter(metadata_filter: dict | None, params: dict) -> str:
+    """Trecho " AND (...)" para acrescentar a um WHERE, ou "" sem filtro"""
+    return f" AND {filter_clause(metadata_filter, params)}" if metadata_filter else ""
+
+
+# ===== MESMO FILTRO EM PYTHON (numpy_store.py) =====
+
+OPERATORS = {
+    "$eq": operator.eq, "$ne": operator.ne, "$lt": operator.lt,
+    "$lte": operator.le, "$gt": operator.gt, "$gte": operator.ge,
+}
+
+
+def compile_filter(metadata_filter: dict | None) -> Callable[[dict], bool]:
+    """Função que avalia o filtro sobre um dicionário de metadados
+
+    Mesma semântica do SQL: uma chave ausente nunca satisfaz uma comparação
+    (nem $ne/$nin). O filtro é validado e percorrido uma única vez.
+    """
+    if not metadata_filter:
+        return lambda metadata: True
+
+    def condition(key: str, operator: str, value) -> Callable[[dict], bool]:
+        if operator in ("$in", "$nin"):
+            if not isinstance(value, (list, tuple)):
+                raise ValueError(f"{operator} expects a list")
+            inside = operator == "$in"
+            if not value:
+                return lambda metadata: not inside  # Como no SQL: FALSE / TRUE
+            return lambda metadata: metadata.get(key) is not None and (
+                metadata[key] in [_comparable(metadata[key], item) for item in value]
+            ) == inside
+        if operator not in OPERATORS:
+            raise ValueError(f"Unsupported filter operator {operator!r}")
+        compare = OPERATORS[operator]
+
+        def check(metadata: dict) -> bool:
+            actual = metadata.get(key)
+            if actual is None:
+                return False
+            try:
+                return compare(actual, _comparable(actual, value))
+            except TypeError:
+                return False
+
+        return check
+
+    def clause(node: dict) -> Callable[[dict], bool]:
+        if not isinstance(node, dict) or not node:
+            raise ValueError("Metadata filter must be a non-empty dict")
+        checks = []
+        for key, value in node.items():
+            if key in ("$and", "$or"):
+                if not isinstance(value, list) or not value:
+                    raise ValueError(f"{key} expects a non-empty list")
+                children = [clause(item) for item in value]
+                combine = all if key == "$and" else any
+                checks.append(lambda metadata, children=children, combine=combine: combine(c(metadata) for c in children))
+            elif key.startswith("$"):
+                raise ValueError(f"Unsupported filter operator {key!r}")
+            elif isinstance(value, dict):
+                checks.extend(condition(key, operator, operand) for operator, operand in value.items())
+            else:
+                checks.append(condition(key, "$eq", value))
+        if len(checks) == 1:
+            return checks[0]
+        return lambda metadata: all(check(metadata) for check in checks)
+
+    return clause(metadata_filter)
+
+
+def matches(metadata: dict, metadata_filter: dict | None) -> bool:
+    """Avalia o filtro sobre um dicionário de metadados (veja compile_filter)"""
+    return compile_filter(metadata_filter)(metadata)
+
+
+def _comparable(actual, value):
+    # Números comparam como números (page: 3 == 3.0), o resto como texto
+    if isinstance(actual, (int, float)) and not isinstance(actual, bool):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return value
+    return str(value) if not isinstance(actual, (dict, list, bool)) else value
+
+
+# ===== ÍNDICES CRIADOS NA INGESTÃO =====
+
+def metadata_index_name(collection: str, key: str) -> str:
+    """Nome do índice de uma chave (MetadataKey.index_key)"""
+    return "ix_embedding_meta_" + re.sub(r"\W", "_", collection.lower()) + "_" + key
+
+
+def _legacy_index_names(collection: str, keys: dict[str, MetadataKey]) -> list[str]:
+    """Índices de versões anteriores: GIN duplicado do ix_cmetadata_gin e casts sem proteção"""
+    names = [metadata_index_name(collection, "gin")]
+    names += [metadata_index_name(collection, key.name) for key in keys.values() if key.type != "text"]
+    return names
+
+
+def ensure_metadata_indexes(engine: Engine, collection: str, keys: dict[str, MetadataKey] | None = None) -> list[str]:
+    """Cria (se ainda não existirem) os índices parciais de metadados da coleção
+
+    Um índice com o mesmo nome mas de uma coleção já apagada (outro uuid
+    no predicado) é recriado.
+    """
+    keys = declared_keys() if keys is None else keys
+    with engine.begin() as conn:
+        collection_id = collection_uuid(conn, collection)
+        if collection_id is None:
+            return []
+        for name in _legacy_index_names(collection, keys):
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        predicate = f"WHERE collection_id = '{collection_id}'"
+        statements = {
+            metadata_index_name(collection, key.index_key): f"USING btree ({key.expression}) {predicate}"
+            for key in keys.values()
+        }
+        for name, definition in statements.items():
+            if partial_index_state(conn, name, collection_id) == "stale":
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON langchain_pg_embedding {definition}"))
+    return list(statements)
+
+
+def drop_metadata_indexes(engine: Engine, collection: str, keys: dict[str, MetadataKey] | None = None) -> None:
+    """Remove os índices de metadados da coleção"""
+    keys = declared_keys() if keys is None else keys
+    with engine.begin() as conn:
+        names = [metadata_index_name(collection, key.index_key) for key in keys.values()]
+        for name in names + _legacy_index_names(collection, keys):
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
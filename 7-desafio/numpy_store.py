@@ -0,0 +1,445 @@
+# ========================================
+# VECTOR STORE EM PROCESSO (NUMPY + MEMMAP) - ALTERNATIVA AO PGVECTOR
+# ========================================
+# Todo script de busca dependia do PostgreSQL do docker-compose. Este
+# módulo oferece a mesma superfície usada no repositório
+# (add_documents/add_embeddings com ids, similarity_search_with_score,
+# similarity_search_with_score_by_vector com filter, delete, get_by_ids),
+# sem servidor:
+# - os vetores ficam numa matriz float32 contígua, com as linhas já
+#   normalizadas: a similaridade de cosseno é um único produto
+#   matriz-vetor, e o top-k sai de np.argpartition (sem ordenar tudo)
+# - a matriz é um arquivo binário cru aberto com np.memmap: abrir uma
+#   coleção de 1M vetores só mapeia o arquivo, sem ler nada
+# - textos e metadados ficam num JSONL com um índice de offsets (também
+#   mapeado); só os k documentos devolvidos são lidos do disco. ids e
+#   metadados também vão para um JSONL enxuto, lido de uma vez só quando
+#   um filtro ou uma regravação precisa deles
+# - filtros de metadados (mesmo formato do PGVector) viram uma máscara
+#   booleana, calculada uma vez por filtro; filtros seletivos só
+#   multiplicam as linhas que passam
+# - gravações são só apêndices; apagar (ou regravar um id) marca a linha
+#   antiga como removida, e compact() reescreve os arquivos sem elas
+#
+# O score devolvido é a distância de cosseno (1 - similaridade), como no
+# PGVector. VECTOR_STORE=numpy troca o PGVector por este store no
+# desafio.py e nos scripts de 5-loaders-e-banco-de-dados-vetoriais
+# (a busca híbrida e os índices do PostgreSQL ficam de fora). Um processo
+# escreve por vez; leitores no mesmo processo podem buscar durante as
+# gravações, e leitores em outros processos reabrem a coleção (e veem a
+# nova versão) na primeira busca depois que o header.json muda.
+# ========================================
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from metadata_filter import compile_filter
+
+DEFAULT_STORE_DIR = Path(__file__).parent / ".cache" / "vector_store"
+
+HEADER = "header.json"
+VECTORS = "vectors.f32"
+OFFSETS = "offsets.i64"
+DOCUMENTS = "documents.jsonl"
+RECORDS = "records.jsonl"
+DELETED = "deleted.i64"
+
+
+def vector_store_kind() -> str:
+    """VECTOR_STORE=pgvector (padrão) ou numpy (em processo, sem servidor)"""
+    kind = os.getenv("VECTOR_STORE", "pgvector").lower()
+    if kind not in ("pgvector", "numpy"):
+        raise ValueError("VECTOR_STORE must be 'pgvector' or 'numpy'")
+    return kind
+
+
+def create_vector_store(embeddings: Embeddings, collection_name: str, connection: Any = None) -> VectorStore:
+    """PGVector ou NumpyVectorStore, conforme VECTOR_STORE
+
+    connection (URL ou engine) só é usada pelo PGVector; sem ela vale PGVECTOR_URL.
+    """
+    if vector_store_kind() == "numpy":
+        return NumpyVectorStore(embeddings, collection_name)
+    from langchain_postgres import PGVector
+
+    return PGVector(
+        embeddings=embeddings,
+        collection_name=collection_name,
+        connection=connection or os.getenv("PGVECTOR_URL"),
+        use_jsonb=True,
+    )
+
+
+def _normalized(vectors) -> np.ndarray:
+    # Listas de floats do Python convertem bem mais rápido para float64 do que direto para float32
+    matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float64)).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NumpyVectorStore(VectorStore):
+    """Coleção de vetores numa matriz float32 mapeada em memória"""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        collection_name: str = "langchain",
+        path: Path | str | None = None,
+        pre_delete_collection: bool = False,
+    ):
+        self._embeddings = embeddings
+        self.collection_name = collection_name
+        directory = os.getenv("VECTOR_STORE_DIR", str(DEFAULT_STORE_DIR))
+        self.path = Path(path) if path else Path(directory) / collection_name
+        self._lock = threading.RLock()
+        if pre_delete_collection:
+            self.delete_collection()
+        self._open()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embeddings
+
+    @property
+    def version(self) -> str | None:
+        """Versão da coleção, relida se outro processo gravou nela"""
+        self.refresh()
+        return self._version
+
+    # ===== ARQUIVOS =====
+
+    def _header_signature(self) -> tuple[int, int] | None:
+        """(inode, mtime) do header: _write_header troca o arquivo a cada gravação"""
+        try:
+            stat = (self.path / HEADER).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def refresh(self) -> None:
+        """Reabre a coleção se o header mudou desde a última leitura (gravação de outro processo)"""
+        if self._header_signature() != self._signature:
+            with self._lock:
+                if self._header_signature() != self._signature:
+                    self._open()
+
+    def _open(self) -> None:
+        header = self.path / HEADER
+        # Lida antes do conteúdo: uma troca no meio só causa uma releitura a mais
+        self._signature = self._header_signature()
+        meta = json.loads(header.read_text()) if header.exists() else {}
+        self.dimensions: int | None = meta.get("dimensions")
+        self._version: str | None = meta.get("version")
+        # Metadados da coleção (equivalente ao cmetadata do PGVector)
+        self.metadata: dict = meta.get("metadata", {})
+        # ids e metadados de todas as linhas: lidos só quando necessários (filtro, upsert)
+        self._ids: list[str] | None = None
+        self._metadata: list[dict] | None = None
+        self._rows: dict[str, int] | None = None
+        self._masks: dict[str, np.ndarray] = {}
+        self._map()
+
+    def _map(self) -> None:
+        """(Re)mapeia os arquivos; a tupla é trocada de uma vez para os leitores"""
+        dimensions = self.dimensions or 0
+        offsets = _map_array(self.path / OFFSETS, np.int64)
+        rows = (self.path / VECTORS).stat().st_size // (4 * dimensions) if dimensions and (self.path / VECTORS).exists() else 0
+        # Uma gravação interrompida deixa no máximo linhas a mais em um dos arquivos
+        count = min(len(offsets), rows)
+        matrix = (
+            np.memmap(self.path / VECTORS, dtype=np.float32, mode="r", shape=(count, dimensions))
+            if count else np.empty((0, dimensions), dtype=np.float32)
+        )
+        alive = None
+        if (self.path / DELETED).exists():
+            alive = np.ones(count, dtype=bool)
+            deleted = np.fromfile(self.path / DELETED, dtype=np.int64)
+            alive[deleted[deleted < count]] = False
+        self._state = (matrix, offsets[:count], alive)
+
+    def _write_header(self, bump_version: bool = True) -> None:
+        if bump_version:
+            self._version = uuid.uuid4().hex
+        self.path.mkdir(parents=True, exist_ok=True)
+        temporary = self.path / (HEADER + ".tmp")
+        temporary.write_text(json.dumps({"dimensions": self.dimensions, "version": self._version, "metadata": self.metadata}))
+        os.replace(temporary, self.path / HEADER)
+        # A gravação do próprio processo não força uma releitura
+        self._signature = self._header_signature()
+
+    def update_metadata(self, values: dict) -> None:
+        """Mescla values nos metadados da coleção (valores None removem a chave)"""
+        with self._lock:
+            merged = {**self.metadata, **values}
+            self.metadata = {key: value for key, value in merged.items() if value is not None}
+            self._write_header(bump_version=False)
+
+    def _load_records(self) -> None:
+        """Lê ids e metadados de todas as linhas (uma vez por processo)"""
+        if self._ids is not None:
+            return
+        _, offsets, _ = self._state
+        records = []
+        if len(offsets):
+            # Um único json.loads para o arquivo todo é bem mais rápido que um por linha
+            data = (self.path / RECORDS).read_bytes().rstrip(b"\n")
+            records = json.loads(b"[" + data.replace(b"\n", b",") + b"]")[:len(offsets)]
+        self._ids = [doc_id for doc_id, _ in records]
+        self._metadata = [metadata for _, metadata in records]
+        alive = self._state[2]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids) if alive is None or alive[row]}
+
+    def _read_documents(self, offsets: Iterable[int]) -> list[Document]:
+        documents = []
+        with open(self.path / DOCUMENTS, "rb") as file:
+            for offset in offsets:
+                file.seek(int(offset))
+                record = json.loads(file.readline())
+                documents.append(Document(id=record["id"], page_content=record["page_content"], metadata=record["metadata"]))
+        return documents
+
+    # ===== GRAVAÇÃO =====
+
+    def add_embeddings(
+        self,
+        texts: Sequence[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        """Acrescenta vetores já calculados; ids existentes são substituídos"""
+        texts = list(texts)
+        if not texts:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        vectors = _normalized(embeddings)
+        with self._lock:
+            if self.dimensions is None:
+                self.path.mkdir(parents=True, exist_ok=True)
+                self.dimensions = vectors.shape[1]
+            if vectors.shape[1] != self.dimensions:
+                raise ValueError(f"Expected {self.dimensions} dimensions, got {vectors.shape[1]}")
+            self._load_records()
+            start = len(self._ids)
+            stale = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows]
+
+            lines = [
+                json.dumps({"id": doc_id, "page_content": text, "metadata": metadata or {}}, ensure_ascii=False).encode() + b"\n"
+                for doc_id, text, metadata in zip(ids, texts, metadatas)
+            ]
+            with open(self.path / DOCUMENTS, "ab") as file:
+                position = file.tell()
+                file.write(b"".join(lines))
+            with open(self.path / RECORDS, "ab") as file:
+                file.write(b"".join(
+                    json.dumps([doc_id, metadata or {}], ensure_ascii=False).encode() + b"\n"
+                    for doc_id, metadata in zip(ids, metadatas)
+                ))
+            offsets = position + np.cumsum([0] + [len(line) for line in lines[:-1]], dtype=np.int64)
+            with open(self.path / VECTORS, "ab") as file:
+                file.write(vectors.tobytes())
+            with open(self.path / OFFSETS, "ab") as file:
+                file.write(offsets.tobytes())
+
+            # Um id repetido no mesmo lote: vale a última ocorrência
+            for row, doc_id in enumerate(ids, start=start):
+                if doc_id in self._rows and self._rows[doc_id] >= start:
+                    stale.append(self._rows[doc_id])
+                self._rows[doc_id] = row
+            self._ids.extend(ids)
+            self._metadata.extend(metadata or {} for metadata in metadatas)
+            self._mark_deleted(stale)
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self.embeddings.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> None:
+        """Marca os ids como removidos (o espaço volta com compact())"""
+        if not ids:
+            return
+        with self._lock:
+            self._load_records()
+            rows = [self._rows.pop(doc_id) for doc_id in ids if doc_id in self._rows]
+            if rows:
+                self._mark_deleted(rows)
+
+    def _mark_deleted(self, rows: list[int]) -> None:
+        """Registra as linhas removidas, troca a versão e remapeia"""
+        if rows:
+            with open(self.path / DELETED, "ab") as file:
+                file.write(np.asarray(rows, dtype=np.int64).tobytes())
+        self._masks.clear()
+        self._write_header()
+        self._map()
+
+    def compact(self) -> None:
+        """Reescreve os arquivos só com as linhas vivas"""
+        with self._lock:
+            matrix, offsets, alive = self._state
+            if alive is None:
+                return
+            rows = np.flatnonzero(alive)
+            # Grava a versão compacta ao lado e só então troca os diretórios
+            temporary = self.path.with_name(self.path.name + ".compact")
+            shutil.rmtree(temporary, ignore_errors=True)
+            compacted = NumpyVectorStore(self.embeddings, self.collection_name, temporary)
+            compacted.metadata = dict(self.metadata)
+            for start in range(0, len(rows), 10_000):
+                block = rows[start:start + 10_000]
+                documents = self._read_documents(offsets[block])
+                compacted.add_embeddings(
+                    [doc.page_content for doc in documents], matrix[block],
+                    [doc.metadata for doc in documents], [doc.id for doc in documents],
+                )
+            # Sempre grava o header, mesmo sem linhas vivas: dimensões, versão e
+            # metadados da coleção (spec dos embeddings) não podem se perder
+            compacted.dimensions = self.dimensions
+            compacted._version = self._version
+            compacted._write_header(bump_version=False)
+            shutil.rmtree(self.path)
+            os.replace(temporary, self.path)
+            self._open()
+
+    def delete_collection(self) -> None:
+        """Apaga a coleção do disco"""
+        with self._lock:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._open()
+
+    # ===== LEITURA =====
+
+    def __len__(self) -> int:
+        matrix, _, alive = self._state
+        return len(matrix) if alive is None else int(alive.sum())
+
+    def get_by_ids(self, ids: Sequence[str], /) -> list[Document]:
+        with self._lock:
+            self._load_records()
+            rows = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows]
+            return self._read_documents(self._state[1][rows])
+
+    def ids_where(self, metadata_filter: dict | None = None) -> set[str]:
+        """ids das linhas vivas que satisfazem o filtro (manifesto da ingestão)"""
+        with self._lock:
+            self._load_records()
+            mask = self._filter_mask(metadata_filter, len(self._ids))
+            return {doc_id for doc_id, row in self._rows.items() if mask is None or mask[row]}
+
+    def _filter_mask(self, metadata_filter: dict | None, count: int) -> np.ndarray | None:
+        """Linhas que satisfazem o filtro; avaliado uma vez por filtro até a próxima gravação"""
+        if not metadata_filter:
+            return None
+        key = json.dumps(metadata_filter, sort_keys=True)
+        mask = self._masks.get(key)
+        if mask is None or len(mask) < count:
+            with self._lock:
+                self._load_records()
+                check = compile_filter(metadata_filter)
+                mask = np.fromiter(map(check, self._metadata), bool, len(self._metadata))
+                self._masks[key] = mask
+        return mask[:count]
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        filter: dict | None = None,
+        with_embeddings: bool = False,
+    ) -> list[tuple]:
+        """k vizinhos mais próximos (distância de cosseno), busca exata
+
+        with_embeddings=True devolve (Document, distância, vetor float32
+        normalizado), como vector_index.knn_search.
+        """
+        self.refresh()
+        matrix, offsets, alive = self._state
+        if not len(matrix) or k <= 0:
+            return []
+        query = _normalized(embedding)[0]
+        allowed = alive
+        mask = self._filter_mask(filter, len(matrix))
+        if mask is not None:
+            allowed = mask if allowed is None else allowed & mask
+        if allowed is None:
+            rows, scores = None, matrix @ query
+        elif allowed.sum() * 2 < len(allowed):
+            # Filtro seletivo: multiplica só as linhas que passam
+            rows = np.flatnonzero(allowed)
+            scores = matrix[rows] @ query
+        else:
+            rows, scores = None, matrix @ query
+            scores[~allowed] = -np.inf
+        k = min(k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = top[np.isfinite(scores[top])]
+        similarity = scores[top]
+        if rows is not None:
+            top = rows[top]
+        documents = self._read_documents(offsets[top])
+        return [
+            # max: o arredondamento do float32 pode dar distância levemente negativa
+            (doc, max(0.0, float(1.0 - score))) + ((np.array(matrix[row]),) if with_embeddings else ())
+            for doc, row, score in zip(documents, top, similarity)
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict | None = None, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Mesma conversão do PGVector para a distância de cosseno
+        return lambda distance: 1.0 - distance
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+        collection_name: str = "langchain",
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding, collection_name, **kwargs)
+        store.add_texts(texts, metadatas, ids)
+        return store
+
+
+def _map_array(path: Path, dtype) -> np.ndarray:
+    """Arquivo binário cru como array somente leitura (vazio se não existe)"""
+    if not path.exists() or path.stat().st_size < np.dtype(dtype).itemsize:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(path.stat().st_size // np.dtype(dtype).itemsize,))
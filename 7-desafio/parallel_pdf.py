@@ -0,0 +1,131 @@
+# ========================================
+# LEITURA DE PDFS EM PARALELO (VÁRIOS PROCESSOS)
+# ========================================
+# PyPDFLoader extrai o texto página por página em um único núcleo. Aqui
+# cada PDF é dividido em fatias de páginas (shards) que são extraídas por
+# um ProcessPoolExecutor. Os Documents saem na mesma ordem e com o mesmo
+# conteúdo/metadados do PyPDFLoader (arquivo por arquivo, página por
+# página), e cada fatia é entregue assim que ela e as anteriores terminam,
+# então o chunker começa a trabalhar antes do fim da extração.
+#
+# A memória é limitada por:
+# - quantas fatias podem estar pendentes ao mesmo tempo (max_pending)
+# - um teto de memória por processo (RLIMIT_AS, só em Unix)
+# ========================================
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import pypdf
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+
+
+@dataclass
+class PdfParsingLimits:
+    """Processos, tamanho das fatias e limites de memória da extração"""
+    workers: int = int(os.getenv("PDF_WORKERS", "0")) or os.cpu_count() or 1
+    pages_per_shard: int = int(os.getenv("PDF_PAGES_PER_SHARD", "32"))
+    max_pending: int | None = int(os.getenv("PDF_MAX_PENDING_SHARDS", "0")) or None  # Padrão: 2x workers
+    max_memory_mb: int | None = int(os.getenv("PDF_WORKER_MAX_MEMORY_MB", "0")) or None
+
+
+@dataclass(frozen=True)
+class PdfShard:
+    """Fatia [start, stop) das páginas de um PDF"""
+    path: str
+    start: int
+    stop: int
+    total_pages: int
+
+    @property
+    def whole_file(self) -> bool:
+        return self.start == 0 and self.stop == self.total_pages
+
+
+def plan_shards(paths: Iterable[Path | str], pages_per_shard: int) -> Iterator[PdfShard]:
+    """Divide cada PDF em fatias de até pages_per_shard páginas
+
+    Só lê a tabela de páginas (rápido); a extração fica para os processos.
+    """
+    for path in paths:
+        total = len(pypdf.PdfReader(str(path)).pages)
+        for start in range(0, max(total, 1), pages_per_shard):
+            yield PdfShard(str(path), start, min(start + pages_per_shard, total), total)
+
+
+# ===== EXTRAÇÃO (RODA NOS PROCESSOS) =====
+
+def _limit_memory(max_memory_mb: int | None) -> None:
+    """Teto de memória do processo; estourá-lo gera MemoryError na fatia"""
+    if not max_memory_mb:
+        return
+    try:
+        import resource
+    except ImportError:  # Windows: sem RLIMIT_AS
+        return
+    limit = max_memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def load_shard(shard: PdfShard) -> list[Document]:
+    """Extrai as páginas de uma fatia exatamente como o PyPDFLoader faria"""
+    loader = PyPDFLoader(shard.path)
+    if shard.whole_file:
+        return loader.load()
+    # Metadados do arquivo (producer, total_pages, ...) iguais aos do loader;
+    # só page e page_label mudam de uma página para outra
+    first = next(loader.lazy_load())
+    reader = pypdf.PdfReader(shard.path)
+    documents = []
+    for number in range(shard.start, shard.stop):
+        if number == 0:
+            documents.append(first)
+            continue
+        text = reader.pages[number].extract_text(extraction_mode=loader.parser.extraction_mode)
+        metadata = first.metadata | {"page": number, "page_label": reader.page_labels[number]}
+        documents.append(Document(page_content=text.strip(), metadata=metadata))
+    return documents
+
+
+# ===== FRONT END =====
+
+def iter_pdf_pages(
+    paths: Iterable[Path | str],
+    limits: PdfParsingLimits | None = None,
+) -> Iterator[Document]:
+    """Páginas de vários PDFs, extraídas em paralelo e em ordem determinística"""
+    limits = limits or PdfParsingLimits()
+    shards = list(plan_shards(paths, limits.pages_per_shard))
+
+    # Um processo só (ou nada para dividir): extrai aqui mesmo, sem pool
+    if limits.workers <= 1 or len(shards) <= 1:
+        for shard in shards:
+            yield from load_shard(shard)
+        return
+
+    max_pending = limits.max_pending or 2 * limits.workers
+    pending: deque[Future] = deque()
+    # No macOS e no Windows (spawn) os processos filhos importam de novo o
+    # script principal: quem chama precisa do if __name__ == "__main__"
+    with ProcessPoolExecutor(
+        max_workers=limits.workers,
+        initializer=_limit_memory,
+        initargs=(limits.max_memory_mb,),
+    ) as executor:
+        for shard in shards:
+            pending.append(executor.submit(load_shard, shard))
+            # Janela cheia: entrega a fatia mais antiga antes de enviar outra
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def load_pdfs(paths: Iterable[Path | str], limits: PdfParsingLimits | None = None) -> list[Document]:
+    """Equivalente paralelo de PyPDFLoader(...).load() para vários arquivos"""
+    return list(iter_pdf_pages(paths, limits))
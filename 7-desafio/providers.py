@@ -0,0 +1,52 @@
+# ========================================
+# PROVEDOR DOS MODELOS (OPENAI OU FALSO) - ESCOLHIDO POR MODEL_PROVIDER
+# ========================================
+# Os scripts e o desafio criam os modelos por aqui em vez de instanciar
+# ChatOpenAI / OpenAIEmbeddings diretamente:
+# - MODEL_PROVIDER=openai (padrão): ChatOpenAI e OpenAIEmbeddings
+# - MODEL_PROVIDER=fake: FakeChatModel e FakeEmbeddings (fake_models.py),
+#   sem rede e sem custo, com latência, streaming e erros simulados
+#   (variáveis FAKE_*), para benchmarks e testes de carga reproduzíveis
+# Os parâmetros são os do ChatOpenAI / OpenAIEmbeddings; os que só fazem
+# sentido para o cliente HTTP da OpenAI são ignorados pelos falsos.
+# ========================================
+
+import os
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from fake_models import FakeChatModel, FakeEmbeddings
+
+PROVIDERS = ("openai", "fake")
+
+
+def model_provider() -> str:
+    """Provedor configurado em MODEL_PROVIDER"""
+    provider = os.getenv("MODEL_PROVIDER", "openai").lower()
+    if provider not in PROVIDERS:
+        raise ValueError(f"MODEL_PROVIDER must be one of {PROVIDERS}")
+    return provider
+
+
+def create_chat_model(model: str, **kwargs: Any) -> BaseChatModel:
+    """ChatOpenAI(model=model, **kwargs), ou o modelo falso com MODEL_PROVIDER=fake"""
+    if model_provider() == "fake":
+        # temperature, max_tokens, max_retries, stream_usage, disable_streaming...
+        accepted = {name: value for name, value in kwargs.items() if name in FakeChatModel.model_fields}
+        return FakeChatModel(model=model, **accepted)
+    return ChatOpenAI(model=model, **kwargs)
+
+
+def create_embedding_model(model: str, dimensions: int | None = None, **kwargs: Any) -> Embeddings:
+    """OpenAIEmbeddings(model=model, dimensions=dimensions, **kwargs), ou os embeddings falsos"""
+    if model_provider() == "fake":
+        return FakeEmbeddings(
+            model,
+            dimensions=dimensions,
+            chunk_size=kwargs.get("chunk_size", 1000),
+            max_retries=kwargs.get("max_retries"),
+        )
+    return OpenAIEmbeddings(model=model, dimensions=dimensions, **kwargs)
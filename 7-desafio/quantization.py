@@ -0,0 +1,86 @@
+# ========================================
+# QUANTIZAÇÃO DOS VETORES (HALFVEC / BINÁRIA) COM RESCORING
+# ========================================
+# Com text-embedding-3-small cada vetor ocupa 1536 x 4 bytes, e o índice
+# HNSW sobre embedding::vector(1536) deixa de caber na memória do host.
+# O pgvector (>= 0.7) indexa expressões menores sobre a MESMA coluna:
+# - halfvec: embedding::halfvec(N), float16 (metade do tamanho), cosseno
+# - binary: binary_quantize(embedding)::bit(N), 1 bit por dimensão
+#   (32x menor), distância de Hamming
+# A busca faz um 1º passo no índice quantizado, pegando k x fator
+# candidatos, e reordena só esses pela distância de cosseno com o vetor
+# completo (rescoring), que continua gravado na tabela.
+#
+# O modo fica gravado nos metadados da coleção ao criar o índice
+# (vector_index.py create --quantization ..., ou QUANTIZATION=... na
+# ingestão), então as buscas da coleção passam a usá-lo sozinhas.
+# ========================================
+
+import os
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+QUANTIZATIONS = ("halfvec", "binary")
+
+# Operador de distância e classe de operadores de cada expressão quantizada
+OPERATORS = {"halfvec": "<=>", "binary": "<~>"}
+OPCLASSES = {"halfvec": "halfvec_cosine_ops", "binary": "bit_hamming_ops"}
+
+# Candidatos do 1º passo por resultado: o binário perde bem mais ordem que o float16
+DEFAULT_RESCORE_FACTORS = {"halfvec": 2, "binary": 10}
+
+MIN_PGVECTOR = (0, 7, 0)
+
+
+def validate(quantization: str | None) -> str | None:
+    if quantization not in (None, *QUANTIZATIONS):
+        raise ValueError(f"quantization must be one of {QUANTIZATIONS}")
+    return quantization
+
+
+def quantization_from_env() -> str | None:
+    """QUANTIZATION=halfvec ou binary (vazio = vetores completos, como antes)"""
+    return validate(os.getenv("QUANTIZATION") or None)
+
+
+def rescore_factor(quantization: str) -> int:
+    """QUANTIZATION_RESCORE_FACTOR sobrescreve o padrão do modo"""
+    return int(os.getenv("QUANTIZATION_RESCORE_FACTOR", "0")) or DEFAULT_RESCORE_FACTORS[quantization]
+
+
+def quantized_expression(quantization: str, dimensions: int) -> str:
+    """Expressão indexada; o 1º passo da busca usa exatamente a mesma"""
+    if quantization == "halfvec":
+        return f"(embedding::halfvec({int(dimensions)}))"
+    return f"(binary_quantize(embedding)::bit({int(dimensions)}))"
+
+
+def quantized_query(quantization: str, dimensions: int, param: str) -> str:
+    """O vetor da pergunta (parâmetro :param em texto) no mesmo formato quantizado"""
+    if quantization == "halfvec":
+        return f"CAST(:{param} AS halfvec({int(dimensions)}))"
+    return f"binary_quantize(CAST(:{param} AS vector({int(dimensions)})))::bit({int(dimensions)})"
+
+
+def first_pass_sql(quantization: str, dimensions: int, condition: str, param: str, limit: str) -> str:
+    """ids dos :limit vizinhos pela expressão quantizada (usa o índice da coleção)"""
+    return (
+        f"SELECT id FROM langchain_pg_embedding WHERE collection_id = :collection_id{condition} "
+        f"ORDER BY {quantized_expression(quantization, dimensions)} {OPERATORS[quantization]} "
+        f"{quantized_query(quantization, dimensions, param)} LIMIT :{limit}"
+    )
+
+
+def pgvector_version(conn: Connection) -> tuple[int, ...]:
+    version = conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar() or "0"
+    return tuple(int(part) for part in version.split("."))
+
+
+def check_pgvector(conn: Connection) -> None:
+    """halfvec e binary_quantize só existem a partir do pgvector 0.7"""
+    version = pgvector_version(conn)
+    if version < MIN_PGVECTOR:
+        raise RuntimeError(
+            f"Quantization requires pgvector >= 0.7 (installed: {'.'.join(map(str, version))})"
+        )
@@ -0,0 +1,200 @@
+# ========================================
+# RERANKING LOCAL (MMR + LIMIAR) E CONTEXTO POR ORÇAMENTO DE TOKENS
+# ========================================
+# Em vez de mandar os 3 primeiros resultados ao modelo, a busca traz
+# fetch_k candidatos (padrão 50) JÁ COM os vetores gravados (formato
+# binário do pgvector, sem recalcular embeddings) e, em NumPy:
+# 1. descarta candidatos com similaridade de cosseno abaixo do limiar
+# 2. reordena com MMR (Maximal Marginal Relevance): relevância para a
+#    pergunta menos redundância com o que já foi escolhido
+# 3. enche o contexto na ordem do MMR até o orçamento de tokens
+#
+# Desligado por padrão (RERANK=on liga): sem ele o desafio manda os 3
+# primeiros resultados, como antes.
+#
+# Na busca híbrida a relevância mistura o cosseno com o score RRF. O MMR
+# é incremental (uma multiplicação matriz-vetor por documento escolhido)
+# e custa bem menos de 1 ms para 50 candidatos. Os scores devolvidos são
+# essa relevância (maior é melhor).
+# ========================================
+
+import os
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy.engine import Engine
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from hybrid_search import hybrid_search_by_vector
+from tokenizer import estimate_tokens
+from vector_index import similarity_search_by_vector_with_score
+
+# Tokens de "Documento N:\n" e da linha em branco entre documentos
+DOCUMENT_OVERHEAD_TOKENS = 6
+
+
+@dataclass
+class RerankParams:
+    """Parâmetros do reranking (variáveis RERANK_* e CONTEXT_TOKEN_BUDGET)"""
+    fetch_k: int = 50
+    lambda_mult: float = 0.7  # 1 = só relevância, 0 = só diversidade
+    min_similarity: float = 0.2
+    score_weight: float = 0.5  # Peso do RRF na busca híbrida
+    max_documents: int = 10
+    token_budget: int = 800
+
+    @classmethod
+    def from_env(cls) -> "RerankParams":
+        """Parâmetros de RERANK_* e CONTEXT_TOKEN_BUDGET, lidos no momento da chamada"""
+        return cls(
+            fetch_k=int(os.getenv("RERANK_FETCH_K", cls.fetch_k)),
+            lambda_mult=float(os.getenv("RERANK_MMR_LAMBDA", cls.lambda_mult)),
+            min_similarity=float(os.getenv("RERANK_MIN_SIMILARITY", cls.min_similarity)),
+            score_weight=float(os.getenv("RERANK_SCORE_WEIGHT", cls.score_weight)),
+            max_documents=int(os.getenv("RERANK_MAX_DOCUMENTS", cls.max_documents)),
+            token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", cls.token_budget)),
+        )
+
+
+def rerank_enabled() -> bool:
+    """RERANK=on liga o reranking; o padrão continua nos k=3 resultados fixos
+
+    Ligar muda o prompt (até max_documents chunks no orçamento de tokens),
+    então só vale quando pedido.
+    """
+    return os.getenv("RERANK", "off").lower() in ("on", "1", "true")
+
+
+def _as_float32(vector) -> np.ndarray:
+    # Listas de floats do Python convertem bem mais rápido para float64 do que direto para float32
+    return np.asarray(vector, dtype=np.float64).astype(np.float32)
+
+
+def _norms(matrix: np.ndarray) -> np.ndarray:
+    norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+    norms[norms == 0] = 1.0
+    return norms
+
+
+def mmr(query_vector, embeddings: np.ndarray, k: int, lambda_mult: float = 0.7) -> tuple[list[int], np.ndarray]:
+    """Índices escolhidos por MMR, em ordem, e a similaridade de cada candidato
+
+    embeddings: matriz candidatos x dimensões.
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = _norms(vectors)
+    query = _as_float32(query_vector)
+    relevance = (vectors @ query) / (norms * (np.linalg.norm(query) or 1.0))
+    return _mmr_order(vectors, norms, relevance, k, lambda_mult), relevance
+
+
+def _mmr_order(vectors: np.ndarray, norms: np.ndarray, relevance: np.ndarray, k: int, lambda_mult: float) -> list[int]:
+    """MMR incremental: uma multiplicação matriz-vetor por documento escolhido"""
+    if not len(vectors) or k <= 0:
+        return []
+    chosen = [int(np.argmax(relevance))]
+    # Maior similaridade de cada candidato com algum já escolhido
+    redundancy = (vectors @ vectors[chosen[0]]) / (norms * norms[chosen[0]])
+    available = np.ones(len(vectors), dtype=bool)
+    available[chosen[0]] = False
+    while len(chosen) < min(k, len(vectors)):
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        chosen.append(best)
+        available[best] = False
+        np.maximum(redundancy, (vectors @ vectors[best]) / (norms * norms[best]), out=redundancy)
+    return chosen
+
+
+def rerank(
+    query_vector,
+    candidates: list[tuple[Document, float, np.ndarray]],
+    params: RerankParams | None = None,
+    score_weight: float = 0.0,
+) -> list[tuple[Document, float]]:
+    """Limiar de relevância + MMR sobre candidatos (Document, score, vetor)
+
+    A relevância é a similaridade de cosseno com a pergunta. Com
+    score_weight > 0 (busca híbrida) ela é misturada ao score da busca
+    normalizado pelo maior (o RRF), para não perder os acertos do
+    full-text que têm vetor pouco parecido com a pergunta.
+    """
+    params = params or RerankParams.from_env()
+    if not candidates:
+        return []
+    vectors = np.stack([vector for _, _, vector in candidates])
+    norms = _norms(vectors)
+    query = _as_float32(query_vector)
+    relevance = (vectors @ query) / (norms * (np.linalg.norm(query) or 1.0))
+    if score_weight:
+        scores = np.array([score for _, score, _ in candidates], dtype=np.float32)
+        relevance = (1 - score_weight) * relevance + score_weight * scores / (scores.max() or 1.0)
+    keep = np.flatnonzero(relevance >= params.min_similarity)
+    if not len(keep):
+        keep = np.array([int(np.argmax(relevance))])  # Nunca devolve contexto vazio
+    order = _mmr_order(vectors[keep], norms[keep], relevance[keep], params.max_documents, params.lambda_mult)
+    return [(candidates[keep[i]][0], float(relevance[keep[i]])) for i in order]
+
+
+def pack_to_budget(
+    results: list[tuple[Document, float]],
+    token_budget: int,
+    model: str | None = None,
+) -> list[tuple[Document, float]]:
+    """Mantém a ordem e inclui cada documento que ainda cabe no orçamento
+
+    Documentos grandes demais são pulados (os seguintes ainda podem caber);
+    o primeiro sempre entra.
+    """
+    model = model or os.getenv("OPENAI_MODEL_CHAT", "gpt-3.5-turbo")
+    sizes = estimate_tokens([doc.page_content for doc, _ in results], model)
+    packed, used = [], 0
+    for (doc, score), size in zip(results, sizes):
+        size += DOCUMENT_OVERHEAD_TOKENS
+        if packed and used + size > token_budget:
+            continue
+        packed.append((doc, score))
+        used += size
+    return packed
+
+
+def retrieve(
+    engine: Engine,
+    collection: str,
+    query: str,
+    query_vector: list[float],
+    params: RerankParams | None = None,
+    hybrid: bool = True,
+    metadata_filter: dict | None = None,
+) -> list[tuple[Document, float]]:
+    """fetch_k candidatos com vetores (híbrida ou vetorial) -> MMR -> orçamento"""
+    params = params or RerankParams.from_env()
+    if hybrid:
+        candidates = hybrid_search_by_vector(
+            engine, collection, query, query_vector, params.fetch_k,
+            with_embeddings=True, metadata_filter=metadata_filter,
+        )
+        reranked = rerank(query_vector, candidates, params, params.score_weight)
+    else:
+        # Na busca só vetorial o score é a distância, já contida no cosseno
+        candidates = similarity_search_by_vector_with_score(
+            engine, collection, query_vector, params.fetch_k, with_embeddings=True, metadata_filter=metadata_filter
+        )
+        reranked = rerank(query_vector, candidates, params)
+    return pack_to_budget(reranked, params.token_budget)
+
+
+def retrieve_from_store(
+    store: VectorStore,
+    query_vector: list[float],
+    params: RerankParams | None = None,
+    metadata_filter: dict | None = None,
+) -> list[tuple[Document, float]]:
+    """Como retrieve, para o store em processo (numpy_store.py)"""
+    params = params or RerankParams.from_env()
+    candidates = store.similarity_search_with_score_by_vector(
+        query_vector, params.fetch_k, filter=metadata_filter, with_embeddings=True
+    )
+    return pack_to_budget(rerank(query_vector, candidates, params), params.token_budget)
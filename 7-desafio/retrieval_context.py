@@ -0,0 +1,182 @@
+# ========================================
+# CONTEXTO DE RECUPERAÇÃO COMPARTILHADO - RAG DO DESAFIO
+# ========================================
+# Este módulo constrói UMA vez por processo os objetos caros do RAG:
+# engine SQLAlchemy com pool de conexões, cliente HTTP reaproveitado
+# (keep-alive/TLS), OpenAIEmbeddings, PGVector, ChatOpenAI e a chain
+# prompt | llm já compilada. O loop de perguntas do desafio.py e qualquer
+# servidor que embrulhe o RAG devem usar get_context().
+# Com VECTOR_STORE=numpy o store é o NumpyVectorStore (numpy_store.py) e
+# não há engine (o PostgreSQL não é usado). Os embeddings seguem
+# EMBEDDING_DIMENSIONS / EMBEDDING_REDUCTION (embedding_dimensions.py), e
+# a configuração é conferida com a gravada na coleção ao construir.
+# Com MODEL_PROVIDER=fake, embeddings e chat são os modelos falsos de
+# fake_models.py (sem rede), para testes de carga (providers.py).
+# ========================================
+
+import asyncio
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Coroutine
+
+import httpx
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+from langchain_core.vectorstores import VectorStore
+
+from answer_cache import AnswerCache, answer_cache_from_env
+from collection_metadata import collection_version
+from embedding_dimensions import check_embedding_spec, create_embeddings
+from numpy_store import create_vector_store, vector_store_kind
+from providers import create_chat_model
+
+load_dotenv()
+
+# ===== PROMPT DO DESAFIO =====
+# Compilado uma única vez na importação do módulo
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Você é um assistente especializado em Prompt Engineering. Use o contexto fornecido para responder a pergunta do usuário. Se a resposta não estiver no contexto, diga que não encontrou a informação nos documentos."),
+    ("user", """Contexto dos documentos:
+{context}
+
+Pergunta: {question}
+
+Responda com base no contexto fornecido.""")
+])
+
+
+@dataclass(frozen=True)
+class RetrievalContext:
+    """Objetos compartilhados por todas as perguntas do processo"""
+    engine: Engine | None  # None com VECTOR_STORE=numpy
+    http_client: httpx.Client
+    http_async_client: httpx.AsyncClient
+    embeddings: Embeddings
+    store: VectorStore  # PGVector ou NumpyVectorStore
+    llm: BaseChatModel
+    prompt: ChatPromptTemplate
+    chain: Runnable
+    answer_cache: AnswerCache | None
+
+
+_context: RetrievalContext | None = None
+_lock = threading.Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def create_db_engine() -> Engine:
+    """Cria a engine do PostgreSQL com pool de conexões configurável"""
+    # PGVECTOR_POOL_SIZE: conexões mantidas abertas no pool
+    # PGVECTOR_MAX_OVERFLOW: conexões extras permitidas em picos
+    return create_engine(
+        os.getenv("PGVECTOR_URL"),
+        pool_size=int(os.getenv("PGVECTOR_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("PGVECTOR_MAX_OVERFLOW", "10")),
+        pool_pre_ping=True,  # Descarta conexões mortas antes de usar
+        pool_recycle=1800,  # Recicla conexões a cada 30 minutos
+    )
+
+
+def create_http_limits() -> httpx.Limits:
+    """Limites do pool HTTP usado para falar com a OpenAI"""
+    max_connections = int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "20"))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=60.0,
+    )
+
+
+def build_context() -> RetrievalContext:
+    """Constrói um novo contexto (use get_context para o compartilhado)"""
+    engine = create_db_engine() if vector_store_kind() == "pgvector" else None
+    # Os clientes HTTP mantêm as conexões TLS abertas entre as chamadas
+    http_client = httpx.Client(limits=create_http_limits(), timeout=60.0)
+    http_async_client = httpx.AsyncClient(limits=create_http_limits(), timeout=60.0)
+
+    collection = os.getenv("PGVECTOR_COLLECTION")
+    # Cache em disco: perguntas repetidas não chamam a API de embeddings
+    embeddings = create_embeddings(collection, http_client=http_client, http_async_client=http_async_client)
+    # PGVector com a engine do pool (JSONB nos metadados) ou o store em processo
+    store = create_vector_store(embeddings, collection, engine)
+    # Perguntas embedadas com outra configuração não casariam com os vetores gravados
+    check_embedding_spec(store, embeddings)
+    # ChatOpenAI, ou o modelo falso com MODEL_PROVIDER=fake (providers.py)
+    llm = create_chat_model(
+        model=os.getenv("OPENAI_MODEL_CHAT", "gpt-3.5-turbo"),
+        temperature=0.7,
+        stream_usage=True,  # Último chunk do stream traz a contagem de tokens
+        http_client=http_client,
+        http_async_client=http_async_client,
+    )
+    return RetrievalContext(
+        engine=engine,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        embeddings=embeddings,
+        store=store,
+        llm=llm,
+        prompt=PROMPT,
+        chain=PROMPT | llm,
+        # Invalidado quando a versão da coleção muda (nova ingestão)
+        answer_cache=answer_cache_from_env(
+            lambda: collection_version(engine, collection) if engine is not None else store.version
+        ),
+    )
+
+
+def get_context() -> RetrievalContext:
+    """Retorna o contexto do processo, criando-o na primeira chamada"""
+    global _context
+    if _context is None:
+        with _lock:
+            # Checagem dupla: outra thread pode ter criado enquanto esperávamos
+            if _context is None:
+                _context = build_context()
+    return _context
+
+
+def warm_up(context: RetrievalContext | None = None) -> None:
+    """Abre uma conexão do pool e o handshake TLS antes da primeira pergunta"""
+    context = context or get_context()
+    if context.engine is not None:
+        with context.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    # Qualquer resposta serve: o objetivo é deixar a conexão TLS aberta no pool
+    context.http_client.head(os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"))
+
+
+def run_sync(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """Executa uma corrotina no loop de eventos do processo
+
+    O http_async_client fica preso ao loop em que foi usado pela primeira
+    vez; reutilizar sempre o mesmo loop evita o erro de "Event loop is
+    closed" que asyncio.run causaria a partir da segunda chamada.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coroutine)
+
+
+def close_context() -> None:
+    """Libera o pool de conexões, os clientes HTTP e o loop de eventos do processo"""
+    global _context, _loop
+    with _lock:
+        if _context is None:
+            return
+        _context.http_client.close()
+        # O cliente assíncrono fecha no mesmo loop em que abriu as conexões
+        run_sync(_context.http_async_client.aclose())
+        if _context.engine is not None:
+            _context.engine.dispose()
+        _context = None
+        _loop.close()
+        _loop = None
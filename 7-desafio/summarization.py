@@ -0,0 +1,383 @@
+# ========================================
+# MOTOR DE SUMARIZAÇÃO MAP-REDUCE HIERÁRQUICO
+# ========================================
+# O map-reduce de 2-chains-e-processamento junta TODOS os resumos num único
+# prompt de reduce: com um livro inteiro esse prompt estoura a janela de
+# contexto, e a fase map não tem limite explícito de paralelismo.
+# Aqui a sumarização tem três partes:
+# - map: cada chunk é resumido via abatch_as_completed, com até
+#   max_concurrency chamadas ao modelo ao mesmo tempo
+# - collapse: enquanto os resumos juntos passam de reduce_tokens tokens,
+#   resumos vizinhos são agrupados até o orçamento e cada grupo vira um
+#   resumo (todos os grupos de um nível em paralelo). Cada nível divide o
+#   número de resumos, então a profundidade cresce com log(n)
+# - reduce: os resumos restantes, que cabem no orçamento, viram o resumo
+#   final numa única chamada
+# astream devolve o progresso de cada etapa enquanto ela roda.
+#
+# Com um SummaryCache (summary_cache.py) cada resumo, de chunk ou de grupo,
+# é reaproveitado pelo hash do texto de entrada + prompt + modelo. Os
+# grupos do collapse terminam nos resumos cujo hash cai num múltiplo de
+# collapse_fanout (além do limite de tokens), então as fronteiras não se
+# deslocam quando um chunk muda: a edição de um parágrafo refaz só os
+# chunks tocados e um nó por nível acima deles.
+#
+# AdaptiveSummarizer escolhe a estratégia pelo total de tokens, contado
+# localmente antes de qualquer chamada: um único prompt (stuff) quando o
+# texto cabe em stuff_tokens, refine (poucas chamadas em sequência, cada
+# uma com o resumo até ali e a próxima seção) quando ele cabe em até
+# refine_max_steps seções desse tamanho, e o map-reduce paralelo acima
+# disso. No map-reduce do roteador o map resume seções de até
+# stuff_tokens (documentos vizinhos juntos, com fronteiras definidas pelo
+# conteúdo), e não cada chunk pequeno. A escolha e o custo estimado
+# (chamadas, tokens de entrada e rodadas em sequência) vão para o log.
+# ========================================
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
+
+from summary_cache import SummaryCache, chain_key
+from tokenizer import estimate_tokens
+
+# Os mesmos prompts de 2-chains-e-processamento/7-pipeline-de-sumarizacao.py
+MAP_PROMPT = PromptTemplate.from_template("Write a concise summary of the following text:\n{context}")
+REDUCE_PROMPT = PromptTemplate.from_template("Combine the following summaries into a single concise summary:\n{context}")
+# O resumo até aqui e a próxima seção vão juntos em {context} (ver AdaptiveSummarizer)
+REFINE_PROMPT = PromptTemplate.from_template(
+    "Refine the existing summary with the additional text, writing a single concise summary:\n{context}"
+)
+SEPARATOR = "\n"
+STRATEGIES = ("stuff", "refine", "map_reduce")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SummaryLimits:
+    """Paralelismo e orçamento de tokens da sumarização"""
+    max_concurrency: int = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "8"))
+    # Tokens dos resumos juntados num prompt de collapse/reduce (sem o texto do prompt)
+    reduce_tokens: int = int(os.getenv("SUMMARY_REDUCE_TOKENS", "3000"))
+    # Resumos por grupo do collapse, em média (fronteiras definidas pelo conteúdo)
+    collapse_fanout: int = int(os.getenv("SUMMARY_COLLAPSE_FANOUT", "16"))
+    max_depth: int = 10
+    # Roteador (AdaptiveSummarizer): até quantos tokens um único prompt resolve,
+    # quantas chamadas em sequência o refine pode usar e o tamanho estimado de um resumo
+    stuff_tokens: int = int(os.getenv("SUMMARY_STUFF_TOKENS", "8000"))
+    refine_max_steps: int = int(os.getenv("SUMMARY_REFINE_MAX_STEPS", "3"))
+    summary_tokens: int = int(os.getenv("SUMMARY_OUTPUT_TOKENS", "200"))
+
+
+@dataclass
+class SummaryProgress:
+    """Evento de progresso; o último (stage="done") traz o resumo final"""
+    stage: str  # "stuff", "refine", "map", "collapse", "reduce" ou "done"
+    level: int  # 0 no map, 1.. nos níveis de collapse
+    done: int
+    total: int
+    elapsed: float
+    summary: str | None = None
+    cached: int = 0  # quantos dos `done` vieram do cache
+
+    def describe(self) -> str:
+        label = {"collapse": f"collapse nível {self.level}", "done": "concluído"}.get(self.stage, self.stage)
+        cached = f", {self.cached} do cache" if self.cached else ""
+        return f"{label}: {self.done}/{self.total}{cached} ({self.elapsed:.1f}s)"
+
+
+def group_by_budget(tokens: list[int], budget: int, cut_after: list[bool] | None = None) -> list[list[int]]:
+    """Agrupa índices consecutivos até budget tokens por grupo
+
+    Um resumo maior que o orçamento fica sozinho no seu grupo (e é
+    condensado sozinho). cut_after[i] fecha o grupo depois do índice i.
+    """
+    groups: list[list[int]] = []
+    used = 0
+    closed = True
+    for index, size in enumerate(tokens):
+        if not closed and used + size <= budget:
+            groups[-1].append(index)
+            used += size
+        else:
+            groups.append([index])
+            used = size
+        closed = bool(cut_after and cut_after[index])
+    return groups
+
+
+def content_boundaries(texts: list[str], fanout: int) -> list[bool]:
+    """Fronteiras que dependem só do próprio texto: em média uma a cada fanout"""
+    return [int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16) % fanout == 0 for text in texts]
+
+
+class MapReduceSummarizer:
+    """Sumarização map-reduce com collapse recursivo por orçamento de tokens"""
+
+    def __init__(
+        self,
+        llm: BaseLanguageModel | Runnable,
+        map_prompt: PromptTemplate = MAP_PROMPT,
+        reduce_prompt: PromptTemplate = REDUCE_PROMPT,
+        limits: SummaryLimits | None = None,
+        token_model: str | None = None,
+        cache: SummaryCache | None = None,
+    ):
+        self.map_chain = map_prompt | llm | StrOutputParser()
+        self.reduce_chain = reduce_prompt | llm | StrOutputParser()
+        self.limits = limits or SummaryLimits()
+        self.cache = cache
+        # Entradas iguais com outro prompt ou modelo não reaproveitam o resumo
+        self.map_key = chain_key(map_prompt, llm)
+        self.reduce_key = chain_key(reduce_prompt, llm)
+        # Modelo usado para contar tokens (tiktoken); padrão: o do próprio llm
+        self.token_model = token_model or getattr(llm, "model_name", None)
+
+    def count_tokens(self, texts: list[str]) -> list[int]:
+        return estimate_tokens(texts, self.token_model)
+
+    async def _stream_batch(
+        self,
+        chain: Runnable,
+        key: str,
+        contexts: list[str],
+        results: list[str],
+        stage: str,
+        level: int,
+        started: float,
+    ) -> AsyncIterator[SummaryProgress]:
+        """Roda chain em cada contexto (até max_concurrency por vez) e preenche results
+
+        Contextos já resumidos vêm do cache; os novos são gravados nele
+        assim que ficam prontos (uma execução interrompida não perde nada).
+        O SQLite roda numa thread, sem parar as chamadas ainda em andamento.
+        """
+        results[:] = [""] * len(contexts)
+        cached = await asyncio.to_thread(self.cache.lookup, key, contexts) if self.cache else {}
+        for index, summary in cached.items():
+            results[index] = summary
+        if cached:
+            yield SummaryProgress(stage, level, len(cached), len(contexts), time.perf_counter() - started, cached=len(cached))
+        pending = [index for index in range(len(contexts)) if index not in cached]
+        config = {"max_concurrency": self.limits.max_concurrency}
+        done = len(cached)
+        async for position, output in chain.abatch_as_completed([{"context": contexts[i]} for i in pending], config):
+            if isinstance(output, Exception):
+                raise output
+            index = pending[position]
+            results[index] = output
+            if self.cache:
+                await asyncio.to_thread(self.cache.store, key, contexts[index], output)
+            done += 1
+            yield SummaryProgress(stage, level, done, len(contexts), time.perf_counter() - started, cached=len(cached))
+
+    async def astream(self, documents: list[Document]) -> AsyncIterator[SummaryProgress]:
+        """Sumariza os documentos, devolvendo o progresso de cada etapa"""
+        started = time.perf_counter()
+        summaries: list[str] = []
+        async for event in self._stream_batch(
+            self.map_chain, self.map_key, [doc.page_content for doc in documents], summaries, "map", 0, started
+        ):
+            yield event
+
+        level = 0
+        budget = self.limits.reduce_tokens
+        while len(summaries) > 1:
+            tokens = self.count_tokens(summaries)
+            if sum(tokens) + len(tokens) - 1 <= budget:
+                break
+            level += 1
+            if level > self.limits.max_depth:
+                raise RuntimeError(
+                    f"Summaries still exceed {budget} tokens after {self.limits.max_depth} collapse levels; "
+                    "raise SUMMARY_REDUCE_TOKENS"
+                )
+            # +1 por resumo: o separador entre eles
+            groups = group_by_budget(
+                [size + 1 for size in tokens], budget,
+                content_boundaries(summaries, self.limits.collapse_fanout),
+            )
+            collapsed: list[str] = []
+            async for event in self._stream_batch(
+                self.reduce_chain, self.reduce_key,
+                [SEPARATOR.join(summaries[i] for i in group) for group in groups],
+                collapsed, "collapse", level, started,
+            ):
+                yield event
+            summaries = collapsed
+
+        if len(summaries) == 1:
+            # Um único resumo (documento curto ou último collapse) já é o resultado
+            final = summaries[0]
+        elif summaries:
+            reduced: list[str] = []
+            async for event in self._stream_batch(
+                self.reduce_chain, self.reduce_key, [SEPARATOR.join(summaries)], reduced, "reduce", level + 1, started
+            ):
+                yield event
+            final = reduced[0]
+        else:
+            final = ""
+        yield SummaryProgress("done", level + 1, 1, 1, time.perf_counter() - started, final)
+
+    async def asummarize(
+        self,
+        documents: list[Document],
+        on_progress: Callable[[SummaryProgress], None] | None = None,
+    ) -> str:
+        """Resumo final; on_progress recebe cada evento de progresso"""
+        final = ""
+        async for event in self.astream(documents):
+            if on_progress:
+                on_progress(event)
+            if event.stage == "done":
+                final = event.summary
+        return final
+
+    def summarize(
+        self,
+        documents: list[Document],
+        on_progress: Callable[[SummaryProgress], None] | None = None,
+    ) -> str:
+        """Versão síncrona de asummarize (para scripts)"""
+        return asyncio.run(self.asummarize(documents, on_progress))
+
+
+# ===== ROTEADOR: STUFF, REFINE OU MAP-REDUCE =====
+
+@dataclass
+class SummaryPlan:
+    """Estratégia escolhida e o custo estimado antes de chamar o modelo"""
+    strategy: str
+    documents: int
+    input_tokens: int
+    calls: int  # chamadas ao modelo
+    prompt_tokens: int  # tokens de entrada somando todas as chamadas
+    rounds: int  # chamadas em sequência: é o que define a latência
+
+    def describe(self) -> str:
+        return (
+            f"{self.strategy}: {self.input_tokens:,} tokens em {self.documents} documentos -> "
+            f"~{self.calls} chamadas, ~{self.prompt_tokens:,} tokens de entrada, {self.rounds} em sequência"
+        )
+
+
+def estimate_plan(
+    strategy: str,
+    tokens: list[int],
+    limits: SummaryLimits,
+    sections: list[list[int]] | None = None,
+) -> SummaryPlan:
+    """Custo estimado de uma estratégia para documentos com esses tokens
+
+    sections: documentos resumidos juntos no map (padrão: um por documento).
+    """
+    total = sum(tokens)
+    summary = limits.summary_tokens
+    if strategy == "stuff":
+        return SummaryPlan(strategy, len(tokens), total, 1, total, 1)
+    if strategy == "refine":
+        steps = len(group_by_budget(tokens, max(1, limits.stuff_tokens - summary)))
+        return SummaryPlan(strategy, len(tokens), total, steps, total + (steps - 1) * summary, steps)
+    # map-reduce: um resumo por seção e collapse até caber em reduce_tokens
+    count = len(sections) if sections else len(tokens)
+    calls, prompt_tokens = count, total
+    rounds = math.ceil(count / limits.max_concurrency)
+    while count > 1 and count * summary > limits.reduce_tokens:
+        groups = max(math.ceil(count / limits.collapse_fanout), math.ceil(count * summary / limits.reduce_tokens))
+        calls += groups
+        prompt_tokens += count * summary
+        rounds += math.ceil(groups / limits.max_concurrency)
+        count = groups
+    if count > 1:
+        calls, prompt_tokens, rounds = calls + 1, prompt_tokens + count * summary, rounds + 1
+    return SummaryPlan(strategy, len(tokens), total, calls, prompt_tokens, rounds)
+
+
+class AdaptiveSummarizer(MapReduceSummarizer):
+    """Escolhe stuff, refine ou map-reduce pelo número de tokens da entrada
+
+    strategy força uma das três (para comparações).
+    """
+
+    def __init__(
+        self,
+        llm: BaseLanguageModel | Runnable,
+        map_prompt: PromptTemplate = MAP_PROMPT,
+        reduce_prompt: PromptTemplate = REDUCE_PROMPT,
+        refine_prompt: PromptTemplate = REFINE_PROMPT,
+        limits: SummaryLimits | None = None,
+        token_model: str | None = None,
+        cache: SummaryCache | None = None,
+        strategy: str | None = None,
+    ):
+        super().__init__(llm, map_prompt, reduce_prompt, limits, token_model, cache)
+        if strategy not in (None, *STRATEGIES):
+            raise ValueError(f"strategy must be one of {STRATEGIES}")
+        self.strategy = strategy
+        self.refine_chain = refine_prompt | llm | StrOutputParser()
+        self.refine_key = chain_key(refine_prompt, llm)
+
+    def map_sections(self, texts: list[str], tokens: list[int]) -> list[list[int]]:
+        """Documentos vizinhos agrupados até stuff_tokens para o map"""
+        return group_by_budget(tokens, self.limits.stuff_tokens, content_boundaries(texts, self.limits.collapse_fanout))
+
+    def plan(self, documents: list[Document]) -> SummaryPlan:
+        """Conta os tokens localmente e escolhe a estratégia"""
+        texts = [doc.page_content for doc in documents]
+        tokens = self.count_tokens(texts)
+        strategy = self.strategy
+        if strategy is None:
+            if sum(tokens) <= self.limits.stuff_tokens:
+                strategy = "stuff"
+            elif estimate_plan("refine", tokens, self.limits).calls <= self.limits.refine_max_steps:
+                strategy = "refine"
+            else:
+                strategy = "map_reduce"
+        sections = self.map_sections(texts, tokens) if strategy == "map_reduce" else None
+        return estimate_plan(strategy, tokens, self.limits, sections)
+
+    async def astream(self, documents: list[Document]) -> AsyncIterator[SummaryProgress]:
+        plan = self.plan(documents)
+        logger.info("Summary plan %s", plan.describe())
+        if plan.strategy == "map_reduce" or not documents:
+            texts = [doc.page_content for doc in documents]
+            sections = [
+                Document(page_content=SEPARATOR.join(texts[i] for i in group))
+                for group in self.map_sections(texts, self.count_tokens(texts))
+            ]
+            async for event in super().astream(sections):
+                yield event
+            return
+
+        started = time.perf_counter()
+        texts = [doc.page_content for doc in documents]
+        if plan.strategy == "stuff":
+            sections = [SEPARATOR.join(texts)]
+        else:
+            tokens = self.count_tokens(texts)
+            groups = group_by_budget(tokens, max(1, self.limits.stuff_tokens - self.limits.summary_tokens))
+            sections = [SEPARATOR.join(texts[i] for i in group) for group in groups]
+
+        # A 1ª seção (o texto todo, no stuff) é resumida com o prompt do map
+        results: list[str] = []
+        async for event in self._stream_batch(self.map_chain, self.map_key, sections[:1], results, plan.strategy, 1, started):
+            yield SummaryProgress(plan.strategy, 1, 1, len(sections), event.elapsed, cached=event.cached)
+        summary = results[0]
+        for step, section in enumerate(sections[1:], start=2):
+            context = f"Existing summary:\n{summary}\n\nAdditional text:\n{section}"
+            async for event in self._stream_batch(self.refine_chain, self.refine_key, [context], results, "refine", step, started):
+                yield SummaryProgress("refine", step, step, len(sections), event.elapsed, cached=event.cached)
+            summary = results[0]
+        yield SummaryProgress("done", len(sections), 1, 1, time.perf_counter() - started, summary)
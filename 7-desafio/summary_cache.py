@@ -0,0 +1,122 @@
+# ========================================
+# CACHE PERSISTENTE DE RESUMOS (SQLITE) - RESSUMARIZAÇÃO INCREMENTAL
+# ========================================
+# Documentos que mudam pouco são ressumarizados todos os dias, e o map
+# refazia o resumo de cada chunk a cada execução. SummaryCache guarda cada
+# resumo num arquivo SQLite com a chave (hash do texto de entrada, hash do
+# prompt e modelo). O MapReduceSummarizer (summarization.py) consulta o
+# cache no map, no collapse e no reduce: numa nova execução só os chunks
+# alterados e os nós da árvore acima deles vão para o modelo.
+# O tamanho é limitado por max_entries com remoção LRU (menos usados) em
+# lotes, com a contagem em memória, como no cache de embeddings
+# (embedding_cache.py).
+# ========================================
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from langchain_core.prompts import BasePromptTemplate
+
+from embedding_cache import CacheStats, evict_lru, text_hash
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / ".cache" / "summaries.sqlite"
+# Limite de parâmetros por consulta IN (...) do SQLite
+_SQLITE_BATCH = 500
+
+
+def chain_key(prompt: BasePromptTemplate, llm) -> str:
+    """Identifica o prompt e o modelo de uma chain de resumo"""
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+    template = getattr(prompt, "template", None) or repr(prompt)
+    return hashlib.sha256(f"{model}\x00{template}".encode("utf-8")).hexdigest()[:16]
+
+
+class SummaryCache:
+    """Resumos já gerados, com remoção LRU, em SQLite"""
+
+    def __init__(self, path: Path | str = DEFAULT_CACHE_PATH, max_entries: int = 1_000_000):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # check_same_thread=False: o summarizer pode ser usado de várias threads
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS summaries (
+                chain TEXT NOT NULL,
+                key TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (chain, key)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_summaries_last_used ON summaries (last_used)")
+        self._conn.commit()
+        # Contado uma vez na abertura; depois acompanhado a cada gravação
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()
+
+    def lookup(self, chain: str, texts: list[str]) -> dict[int, str]:
+        """Resumos já cacheados, por posição em texts, marcados como usados agora"""
+        keys = [text_hash(text) for text in texts]
+        found: dict[str, str] = {}
+        now = time.time()
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), _SQLITE_BATCH):
+                batch = unique[start:start + _SQLITE_BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, summary FROM summaries WHERE chain = ? AND key IN ({marks})",
+                    [chain, *batch],
+                ).fetchall()
+                found.update(rows)
+                self._conn.execute(
+                    f"UPDATE summaries SET last_used = ? WHERE chain = ? AND key IN ({marks})",
+                    [now, chain, *batch],
+                )
+            self._conn.commit()
+        hits = {index: found[key] for index, key in enumerate(keys) if key in found}
+        self.stats.hits += len(hits)
+        self.stats.misses += len(keys) - len(hits)
+        return hits
+
+    def store(self, chain: str, text: str, summary: str) -> None:
+        """Grava um resumo assim que ele fica pronto e aplica a remoção LRU"""
+        with self._lock:
+            # Só as linhas novas entram na contagem; as existentes são atualizadas
+            changes = self._conn.total_changes
+            self._conn.execute(
+                "INSERT OR IGNORE INTO summaries VALUES (?, ?, ?, ?)",
+                (chain, text_hash(text), summary, time.time()),
+            )
+            if self._conn.total_changes == changes:
+                self._conn.execute(
+                    "UPDATE summaries SET summary = ?, last_used = ? WHERE chain = ? AND key = ?",
+                    (summary, time.time(), chain, text_hash(text)),
+                )
+            else:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._count = evict_lru(self._conn, "summaries", self.max_entries)
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Fecha a conexão com o arquivo do cache"""
+        with self._lock:
+            self._conn.close()
+
+
+def summary_cache_from_env() -> SummaryCache | None:
+    """Cache em SUMMARY_CACHE_PATH, a menos que SUMMARY_CACHE=off"""
+    if os.getenv("SUMMARY_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    return SummaryCache(
+        path=os.getenv("SUMMARY_CACHE_PATH", str(DEFAULT_CACHE_PATH)),
+        max_entries=int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "1000000")),
+    )
@@ -0,0 +1,107 @@
+# ========================================
+# TOKENIZADOR DO MODELO DE EMBEDDINGS - CARREGADO UMA VEZ, CACHE EM DISCO
+# ========================================
+# O tiktoken baixa o arquivo BPE do encoding na primeira vez que ele é
+# usado e, por padrão, guarda numa pasta temporária. Aqui o cache fica em
+# 7-desafio/.cache/tiktoken (ou TIKTOKEN_CACHE_DIR), o encoding do
+# OPENAI_MODEL é carregado uma única vez por processo e a contagem de
+# tokens é feita em lote (lotes grandes divididos entre várias threads).
+#
+# Para rodar sem acesso à rede, baixe o encoding uma vez antes:
+#   python tokenizer.py
+# ========================================
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import tiktoken
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_DIR = Path(__file__).parent / ".cache" / "tiktoken"
+# Lido pelo tiktoken no momento do download/leitura do arquivo BPE
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(CACHE_DIR))
+
+DEFAULT_ENCODING = "cl100k_base"
+THREADS = min(8, os.cpu_count() or 1)
+PARALLEL_THRESHOLD = 256  # Abaixo disso, contar direto é mais rápido que usar threads
+
+
+def embedding_model() -> str:
+    """Modelo de embeddings configurado (o mesmo do retrieval_context)"""
+    return os.getenv("OPENAI_MODEL", "text-embedding-3-small")
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(name: str) -> tiktoken.Encoding | None:
+    """Carrega um encoding uma vez por processo; None se não estiver disponível
+
+    A falha também fica em cache: sem rede, o download não é tentado de novo.
+    """
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+def get_encoding(model: str | None = None) -> tiktoken.Encoding:
+    """Encoding do modelo, carregado do cache em disco na primeira chamada"""
+    model = model or embedding_model()
+    try:
+        name = tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        name = DEFAULT_ENCODING  # Modelos novos/desconhecidos
+    encoding = _load_encoding(name)
+    if encoding is None:
+        raise RuntimeError(
+            f"Tokenizer {name!r} is not cached in {os.environ['TIKTOKEN_CACHE_DIR']}; "
+            "run `python 7-desafio/tokenizer.py` once with network access"
+        )
+    return encoding
+
+
+def _count(encoding: tiktoken.Encoding, texts: list[str]) -> list[int]:
+    return [len(encoding.encode_ordinary(text)) for text in texts]
+
+
+@lru_cache(maxsize=1)
+def _executor() -> ThreadPoolExecutor:
+    # O encode do tiktoken (Rust) libera o GIL: threads usam vários núcleos
+    return ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix="tokenizer")
+
+
+def count_tokens(texts: list[str], model: str | None = None) -> list[int]:
+    """Tokens de cada texto, contados em lote
+
+    Lotes grandes são divididos em THREADS fatias contadas em paralelo por
+    um pool reaproveitado (encode_ordinary_batch cria um pool a cada
+    chamada, o que custa mais do que contar lotes pequenos).
+    """
+    encoding = get_encoding(model)
+    if len(texts) < PARALLEL_THRESHOLD:
+        return _count(encoding, texts)
+    step = -(-len(texts) // THREADS)
+    slices = [texts[i:i + step] for i in range(0, len(texts), step)]
+    return [size for sizes in _executor().map(_count, [encoding] * len(slices), slices) for size in sizes]
+
+
+def estimate_tokens(texts: list[str], model: str | None = None) -> list[int]:
+    """Como count_tokens, mas cai para ~4 caracteres/token sem o tokenizador"""
+    try:
+        return count_tokens(texts, model)
+    except RuntimeError:
+        return [max(1, len(t) // 4) for t in texts]
+
+
+def main():
+    """Baixa (se preciso) e guarda em disco os encodings dos modelos configurados"""
+    for model in (embedding_model(), os.getenv("OPENAI_MODEL_CHAT", "gpt-3.5-turbo")):
+        encoding = get_encoding(model)
+        print(f"✅ {model}: {encoding.name} ({encoding.n_vocab} tokens) em {os.environ['TIKTOKEN_CACHE_DIR']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+# ========================================
+# ÍNDICES ANN (HNSW / IVFFLAT) PARA UMA COLEÇÃO DO PGVECTOR
+# ========================================
+# O PGVector cria a coluna embedding sem dimensão fixa e sem índice
+# vetorial, então toda busca percorre todas as linhas. Este módulo cria,
+# reconstrói e remove índices HNSW ou IVFFlat PARCIAIS (um por coleção)
+# sobre a expressão embedding::vector(N), e faz a busca kNN com a mesma
+# expressão para que o PostgreSQL use o índice. ef_search / probes são
+# ajustados por transação (SET LOCAL).
+# Com --quantization halfvec|binary o índice é sobre a expressão
+# quantizada e a busca reordena os candidatos pelo vetor completo
+# (quantization.py).
+# O uuid e a dimensão de cada coleção ficam em memória e são relidos quando
+# a versão, o uuid ou a quantização dela mudam (cached_collection_info).
+#
+# Uso: python vector_index.py create --kind hnsw --m 16 --ef-construction 64 [--quantization binary]
+#      python vector_index.py create --kind ivfflat --lists 1000
+#      python vector_index.py rebuild | drop | status [--collection nome]
+# ========================================
+
+import argparse
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from collection_metadata import partial_index_state, update_collection_metadata
+from metadata_filter import where_filter
+from quantization import OPCLASSES, check_pgvector, first_pass_sql, quantized_expression, rescore_factor, validate
+
+load_dotenv()
+
+KINDS = ("hnsw", "ivfflat")
+
+
+@dataclass(frozen=True)
+class CollectionInfo:
+    """Identificação de uma coleção e da dimensão dos seus vetores"""
+    name: str
+    uuid: uuid.UUID
+    dimensions: int
+    quantization: str | None = None  # Modo do índice ANN (quantization.py)
+
+
+def collection_info(conn: Connection, name: str) -> CollectionInfo:
+    """Lê o uuid da coleção, a dimensão dos vetores gravados nela e a quantização"""
+    row = conn.execute(
+        text("SELECT uuid, cmetadata::jsonb ->> 'quantization' AS quantization FROM langchain_pg_collection WHERE name = :name"),
+        {"name": name},
+    ).first()
+    if row is None:
+        raise ValueError(f"Collection {name!r} not found")
+    collection_id = row.uuid
+    dimensions = conn.execute(
+        text("SELECT vector_dims(embedding) FROM langchain_pg_embedding WHERE collection_id = :id LIMIT 1"),
+        {"id": collection_id},
+    ).scalar()
+    if dimensions is None:
+        raise ValueError(f"Collection {name!r} is empty")
+    return CollectionInfo(name, collection_id, dimensions, row.quantization)
+
+
+def index_name(collection: str) -> str:
+    """Nome do índice vetorial da coleção (um por coleção)"""
+    return "ix_embedding_ann_" + re.sub(r"\W", "_", collection.lower())
+
+
+def vector_expression(dimensions: int) -> str:
+    """Expressão indexada; consultas precisam usar exatamente a mesma"""
+    return f"(embedding::vector({int(dimensions)}))"
+
+
+def vector_literal(vector: list[float]) -> str:
+    """Texto no formato do pgvector ('[1.0,2.0,...]') para qualquer sequência numérica"""
+    return "[" + ",".join(repr(float(x)) for x in vector) + "]"
+
+
+# Formato binário do pgvector: 2 bytes de dimensão, 2 reservados e os float4
+# big-endian. Bem mais rápido de trazer e converter do que o texto '[...]'.
+VECTOR_BYTES = "vector_send(embedding) AS vector_bytes"
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Converte o resultado de vector_send(embedding) em float32"""
+    return np.frombuffer(data, dtype=">f4", offset=4).astype(np.float32)
+
+
+# ===== GERENCIAMENTO DOS ÍNDICES =====
+
+def create_index(
+    engine: Engine,
+    collection: str,
+    kind: str = "hnsw",
+    m: int = 16,
+    ef_construction: int = 64,
+    lists: int | None = None,
+    quantization: str | None = None,
+) -> str:
+    """Cria (ou recria) o índice ANN parcial da coleção
+
+    quantization (halfvec ou binary) indexa a expressão quantizada e fica
+    gravada nos metadados da coleção para as buscas.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}")
+    validate(quantization)
+    name = index_name(collection)
+    with engine.begin() as conn:
+        info = collection_info(conn, collection)
+        if quantization:
+            check_pgvector(conn)
+            expression = f"{quantized_expression(quantization, info.dimensions)} {OPCLASSES[quantization]}"
+        else:
+            expression = f"{vector_expression(info.dimensions)} vector_cosine_ops"
+        if kind == "hnsw":
+            params = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+        else:
+            if lists is None:
+                rows = conn.execute(
+                    text("SELECT count(*) FROM langchain_pg_embedding WHERE collection_id = :id"),
+                    {"id": info.uuid},
+                ).scalar()
+                # Recomendação do pgvector: linhas/1000 até 1M, sqrt(linhas) acima
+                lists = max(1, rows // 1000 if rows <= 1_000_000 else int(rows ** 0.5))
+            params = f"lists = {int(lists)}"
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text(
+            f"CREATE INDEX {name} ON langchain_pg_embedding "
+            f"USING {kind} ({expression}) "
+            f"WITH ({params}) WHERE collection_id = '{info.uuid}'"
+        ))
+        update_collection_metadata(conn, collection, {"quantization": quantization})
+    invalidate_collection_info(collection)
+    return name
+
+
+def ensure_quantized_index(engine: Engine, collection: str, quantization: str) -> str | None:
+    """Cria o índice HNSW quantizado se a coleção ainda não o usa (ingestão)
+
+    Um índice de mesmo nome de uma coleção já apagada (outro uuid no
+    predicado) não conta: é recriado para a coleção atual.
+    """
+    with engine.connect() as conn:
+        try:
+            info = collection_info(conn, collection)
+        except ValueError:
+            return None  # Coleção ainda vazia
+        state = partial_index_state(conn, index_name(collection), info.uuid)
+    if info.quantization == quantization and state == "valid":
+        return None
+    return create_index(engine, collection, "hnsw", quantization=quantization)
+
+
+def rebuild_index(engine: Engine, collection: str) -> None:
+    """Reconstrói o índice (ex.: IVFFlat depois de muitas inserções)"""
+    with engine.begin() as conn:
+        conn.execute(text(f"REINDEX INDEX {index_name(collection)}"))
+
+
+def drop_index(engine: Engine, collection: str) -> None:
+    """Remove o índice ANN da coleção"""
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index_name(collection)}"))
+        update_collection_metadata(conn, collection, {"quantization": None})
+    invalidate_collection_info(collection)
+
+
+def index_status(engine: Engine, collection: str) -> dict | None:
+    """Definição e tamanho do índice da coleção, ou None se não existir"""
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT indexdef, pg_size_pretty(pg_relation_size(indexname::regclass)) AS size "
+                "FROM pg_indexes WHERE indexname = :name"
+            ),
+            {"name": index_name(collection)},
+        ).mappings().first()
+    return dict(row) if row else None
+
+
+# ===== BUSCA KNN USANDO O ÍNDICE =====
+
+def nearest_where(
+    info: CollectionInfo,
+    condition: str,
+    params: dict,
+    param: str,
+    limit: int,
+    ef_search: int | None = None,
+    exact: bool = False,
+) -> tuple[str, int | None]:
+    """WHERE da busca kNN e o ef_search a aplicar
+
+    Sem quantização: as linhas da coleção (mais o filtro). Com quantização:
+    os candidatos do 1º passo no índice quantizado, que serão reordenados
+    pela distância completa; o ef_search sobe até o número de candidatos,
+    porque o HNSW nunca devolve mais que ef_search linhas.
+    """
+    if not info.quantization or exact:
+        return f"collection_id = :collection_id{condition}", ef_search
+    params["rescore"] = limit * rescore_factor(info.quantization)
+    first_pass = first_pass_sql(info.quantization, info.dimensions, condition, param, "rescore")
+    # 1000 é o máximo de hnsw.ef_search
+    return f"id IN ({first_pass})", min(1000, max(ef_search or 40, params["rescore"]))
+
+
+def knn_search(
+    conn: Connection,
+    info: CollectionInfo,
+    query_vector: list[float],
+    k: int = 3,
+    ef_search: int | None = None,
+    probes: int | None = None,
+    exact: bool = False,
+    with_embeddings: bool = False,
+    metadata_filter: dict | None = None,
+    iterative_scan: str | None = None,
+) -> list[tuple]:
+    """Busca os k vizinhos mais próximos (distância de cosseno)
+
+    ef_search (HNSW) e probes (IVFFlat) valem só para esta transação,
+    por isso conn não pode estar com uma transação aberta.
+    exact=True desliga os índices para obter o resultado exato.
+    with_embeddings=True devolve (Document, distância, vetor float32).
+    metadata_filter: filtro no formato do PGVector (metadata_filter.py);
+    iterative_scan (pgvector >= 0.8) evita que o HNSW devolva menos de k
+    linhas quando o filtro descarta muitos vizinhos.
+    Em coleção quantizada, o índice escolhe k x fator candidatos e a
+    distância devolvida é a do vetor completo.
+    """
+    params = {"query": vector_literal(query_vector), "collection_id": info.uuid, "k": k}
+    condition = where_filter(metadata_filter, params)
+    where, ef_search = nearest_where(info, condition, params, "query", k, ef_search, exact)
+    with conn.begin():
+        if ef_search:
+            conn.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+        if probes:
+            conn.execute(text(f"SET LOCAL ivfflat.probes = {int(probes)}"))
+        if iterative_scan and condition:
+            conn.execute(text(f"SET LOCAL hnsw.iterative_scan = {iterative_scan}"))
+        if exact:
+            conn.execute(text("SET LOCAL enable_indexscan = off"))
+        expression = vector_expression(info.dimensions)
+        extra = f", {VECTOR_BYTES}" if with_embeddings else ""
+        rows = conn.execute(
+            text(
+                f"SELECT id, document, cmetadata{extra}, {expression} <=> CAST(:query AS vector({info.dimensions})) AS distance "
+                f"FROM langchain_pg_embedding WHERE {where} "
+                f"ORDER BY distance LIMIT :k"
+            ),
+            params,
+        ).all()
+    return [
+        (Document(id=row.id, page_content=row.document, metadata=row.cmetadata or {}), row.distance)
+        + ((decode_vector(row.vector_bytes),) if with_embeddings else ())
+        for row in rows
+    ]
+
+
+@dataclass
+class _CachedCollection:
+    """collection_info em memória e o que o identifica no banco"""
+    key: tuple  # (uuid, versão, quantização) lidos de langchain_pg_collection
+    info: CollectionInfo | None  # None: coleção ainda vazia
+    checked_at: float
+
+
+_collections: dict[str, _CachedCollection] = {}
+# Mesmo intervalo do cache de respostas (answer_cache.py)
+COLLECTION_CHECK_INTERVAL = 5.0
+
+
+def cached_collection_info(engine: Engine, collection: str) -> CollectionInfo | None:
+    """collection_info guardado em memória; None se a coleção está vazia
+
+    A cada COLLECTION_CHECK_INTERVAL segundos o uuid, a versão
+    (collection_metadata.py) e a quantização da coleção são conferidos:
+    uma nova ingestão, um índice recriado ou uma coleção apagada e criada
+    de novo, mesmo por outro processo, fazem o collection_info ser relido.
+    """
+    now = time.monotonic()
+    cached = _collections.get(collection)
+    if cached is not None and now - cached.checked_at < COLLECTION_CHECK_INTERVAL:
+        return cached.info
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT uuid, cmetadata::jsonb ->> 'version' AS version, cmetadata::jsonb ->> 'quantization' AS quantization "
+                "FROM langchain_pg_collection WHERE name = :name"
+            ),
+            {"name": collection},
+        ).first()
+        if row is None:
+            _collections.pop(collection, None)
+            return None
+        key = (row.uuid, row.version, row.quantization)
+        if cached is not None and cached.info is not None and cached.key == key:
+            info = cached.info
+        else:
+            try:
+                info = collection_info(conn, collection)
+            except ValueError:
+                info = None  # Coleção ainda não populada
+    _collections[collection] = _CachedCollection(key, info, now)
+    return info
+
+
+def invalidate_collection_info(collection: str | None = None) -> None:
+    """Esquece o collection_info em memória (de uma coleção ou de todas)
+
+    Para quem apaga ou recria coleções: a próxima busca relê uuid e dimensão.
+    """
+    if collection is None:
+        _collections.clear()
+    else:
+        _collections.pop(collection, None)
+
+
+def similarity_search_by_vector_with_score(
+    engine: Engine,
+    collection: str,
+    query_vector: list[float],
+    k: int = 3,
+    with_embeddings: bool = False,
+    metadata_filter: dict | None = None,
+) -> list[tuple]:
+    """Busca kNN a partir de um vetor já calculado, usando o índice"""
+    info = cached_collection_info(engine, collection)
+    if info is None:
+        return []
+    with engine.connect() as conn:
+        return knn_search(
+            conn, info, query_vector, k,
+            with_embeddings=with_embeddings, metadata_filter=metadata_filter, **ann_params_from_env(),
+        )
+
+
+def similarity_search_with_score(
+    engine: Engine,
+    embeddings: Embeddings,
+    collection: str,
+    query: str,
+    k: int = 3,
+    metadata_filter: dict | None = None,
+) -> list[tuple[Document, float]]:
+    """Equivalente ao PGVector.similarity_search_with_score, mas usando o índice"""
+    return similarity_search_by_vector_with_score(
+        engine, collection, embeddings.embed_query(query), k, metadata_filter=metadata_filter
+    )
+
+
+def ann_params_from_env() -> dict:
+    """ef_search / probes / iterative_scan configurados por variável de ambiente"""
+    iterative_scan = os.getenv("PGVECTOR_ITERATIVE_SCAN") or None
+    if iterative_scan not in (None, "strict_order", "relaxed_order"):
+        raise ValueError("PGVECTOR_ITERATIVE_SCAN must be strict_order or relaxed_order")
+    return {
+        "ef_search": int(os.getenv("PGVECTOR_EF_SEARCH", "0")) or None,
+        "probes": int(os.getenv("PGVECTOR_PROBES", "0")) or None,
+        "iterative_scan": iterative_scan,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerencia o índice ANN de uma coleção do PGVector")
+    parser.add_argument("action", choices=["create", "rebuild", "drop", "status"])
+    parser.add_argument("--collection", default=os.getenv("PGVECTOR_COLLECTION"))
+    parser.add_argument("--kind", choices=KINDS, default="hnsw")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--quantization", choices=["halfvec", "binary"], default=None)
+    args = parser.parse_args()
+
+    engine = create_engine(os.getenv("PGVECTOR_URL"))
+    if args.action == "create":
+        name = create_index(engine, args.collection, args.kind, args.m, args.ef_construction, args.lists, args.quantization)
+        print(f"✅ Índice {name} criado")
+    elif args.action == "rebuild":
+        rebuild_index(engine, args.collection)
+        print("✅ Índice reconstruído")
+    elif args.action == "drop":
+        drop_index(engine, args.collection)
+        print("✅ Índice removido")
+    print(index_status(engine, args.collection) or "Nenhum índice ANN para esta coleção")
+
+
+if __name__ == "__main__":
+    main()
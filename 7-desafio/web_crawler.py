@@ -0,0 +1,248 @@
+# ========================================
+# CRAWLER CONCORRENTE PARA O WEBBASELOADER
+# ========================================
+# WebBaseLoader(...).load() busca uma URL por vez com requests. Para
+# milhares de páginas de documentação, este crawler:
+# - busca as URLs em paralelo numa única sessão aiohttp (keep-alive), com
+#   limite global e limite POR HOST de conexões simultâneas
+# - guarda ETag/Last-Modified de cada URL em SQLite e faz GET condicional:
+#   páginas que respondem 304 (inalteradas) são puladas
+# - transforma o HTML em Document (mesmo texto e metadados do
+#   WebBaseLoader) num pool de processos, fora do loop de eventos
+# - entrega os Documents assim que ficam prontos, com uma fila limitada,
+#   então o splitter começa antes de o crawl terminar
+#
+# O estado condicional só é gravado quando o crawl termina sem erro; se a
+# ingestão quebrar no meio, as páginas são buscadas de novo na próxima vez.
+# ========================================
+
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator
+
+import aiohttp
+from bs4 import BeautifulSoup
+from langchain_community.document_loaders.web_base import default_header_template
+from langchain_core.documents import Document
+
+DEFAULT_STATE_PATH = Path(__file__).parent / ".cache" / "crawl_state.sqlite"
+
+
+@dataclass
+class CrawlerConfig:
+    """Limites de concorrência e de memória do crawler"""
+    max_concurrency: int = int(os.getenv("CRAWL_MAX_CONCURRENCY", "32"))
+    per_host: int = int(os.getenv("CRAWL_PER_HOST", "4"))
+    parse_workers: int = int(os.getenv("CRAWL_PARSE_WORKERS", "0")) or os.cpu_count() or 1
+    timeout: float = float(os.getenv("CRAWL_TIMEOUT", "30"))
+    max_pending: int = 256  # Documents prontos esperando o consumidor
+    parser: str = "html.parser"
+
+
+@dataclass
+class CrawlStats:
+    """Resultado do crawl"""
+    fetched: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    errors: dict[str, str] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        return f"baixadas {self.fetched} | inalteradas {self.unchanged} | falhas {self.failed}"
+
+
+# ===== ESTADO DO GET CONDICIONAL =====
+
+class CrawlState:
+    """ETag / Last-Modified de cada URL já baixada, persistidos em SQLite"""
+
+    def __init__(self, path: Path | str = DEFAULT_STATE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT
+            )"""
+        )
+        self._validators = {
+            url: (etag, last_modified)
+            for url, etag, last_modified in self._conn.execute("SELECT url, etag, last_modified FROM pages")
+        }
+        self._pending: dict[str, tuple[str | None, str | None]] = {}
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Cabeçalhos If-None-Match / If-Modified-Since para a URL"""
+        etag, last_modified = self._validators.get(url, (None, None))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def update(self, url: str, etag: str | None, last_modified: str | None) -> None:
+        """Guarda os validadores de uma página baixada (gravados no commit)"""
+        if etag or last_modified:
+            self._pending[url] = (etag, last_modified)
+
+    def commit(self) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified) VALUES (?, ?, ?)",
+            [(url, etag, last_modified) for url, (etag, last_modified) in self._pending.items()],
+        )
+        self._conn.commit()
+        self._validators.update(self._pending)
+        self._pending.clear()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# ===== HTML -> DOCUMENT (RODA NO POOL) =====
+
+def parse_html(url: str, html: str, parser: str = "html.parser") -> Document:
+    """Mesmo texto e metadados que o WebBaseLoader geraria para a página"""
+    soup = BeautifulSoup(html, "xml" if url.endswith(".xml") else parser)
+    metadata = {"source": url}
+    if title := soup.find("title"):
+        metadata["title"] = title.get_text()
+    if description := soup.find("meta", attrs={"name": "description"}):
+        metadata["description"] = description.get("content", "No description found.")
+    if html_tag := soup.find("html"):
+        metadata["language"] = html_tag.get("lang", "No language found.")
+    return Document(page_content=soup.get_text(), metadata=metadata)
+
+
+def _parse_executor(workers: int) -> Executor:
+    # Com spawn (macOS, Windows) quem chama precisa do if __name__ == "__main__",
+    # como em parallel_pdf.py
+    return ProcessPoolExecutor(max_workers=workers) if workers > 1 else ThreadPoolExecutor(max_workers=1)
+
+
+# ===== CRAWL ASSÍNCRONO =====
+
+async def _fetch(
+    session: aiohttp.ClientSession,
+    pool: Executor,
+    url: str,
+    config: CrawlerConfig,
+    state: CrawlState,
+    stats: CrawlStats,
+) -> Document | None:
+    """GET condicional + parsing de uma URL; None se inalterada ou com erro"""
+    try:
+        async with session.get(url, headers=state.conditional_headers(url)) as response:
+            if response.status == 304:
+                stats.unchanged += 1
+                return None
+            response.raise_for_status()
+            html = await response.text()
+            validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        document = await asyncio.get_running_loop().run_in_executor(pool, parse_html, url, html, config.parser)
+    except Exception as error:  # Uma página com problema não derruba o crawl
+        stats.failed += 1
+        stats.errors[url] = repr(error)
+        return None
+    state.update(url, *validators)
+    stats.fetched += 1
+    return document
+
+
+async def acrawl(
+    urls: Iterable[str],
+    config: CrawlerConfig | None = None,
+    state: CrawlState | None = None,
+    stats: CrawlStats | None = None,
+) -> AsyncIterator[Document]:
+    """Busca as URLs em paralelo e gera os Documents na ordem em que ficam prontos"""
+    config = config or CrawlerConfig()
+    state = state or CrawlState()
+    stats = stats if stats is not None else CrawlStats()
+    pending_urls: asyncio.Queue[str] = asyncio.Queue()
+    for url in dict.fromkeys(urls):  # Sem URLs repetidas
+        pending_urls.put_nowait(url)
+    ready: asyncio.Queue[Document | None] = asyncio.Queue(maxsize=config.max_pending)
+
+    # limit / limit_per_host: o conector segura as requisições excedentes
+    connector = aiohttp.TCPConnector(limit=config.max_concurrency, limit_per_host=config.per_host)
+    timeout = aiohttp.ClientTimeout(total=config.timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=default_header_template) as session:
+        with _parse_executor(config.parse_workers) as pool:
+
+            async def worker():
+                while not pending_urls.empty():
+                    document = await _fetch(session, pool, pending_urls.get_nowait(), config, state, stats)
+                    if document is not None:
+                        await ready.put(document)
+
+            async def run_workers():
+                await asyncio.gather(*(worker() for _ in range(config.max_concurrency)))
+                await ready.put(None)  # Fim do crawl
+
+            runner = asyncio.create_task(run_workers())
+            try:
+                while (document := await ready.get()) is not None:
+                    yield document
+                await runner
+            finally:
+                runner.cancel()
+
+
+def crawl(
+    urls: Iterable[str],
+    config: CrawlerConfig | None = None,
+    state: CrawlState | None = None,
+    stats: CrawlStats | None = None,
+) -> Iterator[Document]:
+    """Versão síncrona de acrawl, para alimentar o splitter diretamente
+
+    O loop de eventos roda numa thread própria; os Documents passam por uma
+    fila limitada. O estado condicional é gravado ao final do crawl.
+    """
+    config = config or CrawlerConfig()
+    state = state or CrawlState()
+    documents: queue.Queue = queue.Queue(maxsize=config.max_pending)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        # Espera em fatias para perceber quando o consumidor desistiu
+        while not stop.is_set():
+            try:
+                documents.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    async def pump():
+        async for document in acrawl(urls, config, state, stats):
+            if not await asyncio.to_thread(put, document):
+                return
+
+    def run():
+        try:
+            asyncio.run(pump())
+            put(done)
+        except BaseException as error:
+            put(error)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while (item := documents.get()) is not done:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+        state.commit()
+    finally:
+        stop.set()
+        thread.join()